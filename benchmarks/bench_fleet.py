@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark against a local stand-in fleet of HTTP/HTTPS servers.
+
+Starts one listener per simulated host on 127.0.0.2, 127.0.0.3, ... (Linux
+routes all of 127.0.0.0/8 to loopback; other systems need the aliases
+configured) and generates a reproducible list of targets with a mix of
+latency, header profiles, redirect chains, body sizes and 429/5xx/timeout
+behavior. Each engine then scans the whole list in a fresh process, and
+URLs/sec, p50/p95/p99 scan latency, peak RSS and CPU time are written to a
+JSON file. Pass --compare with an earlier file to flag regressions.
+
+With --origin-sample, every origin serving a single fault-free header
+profile must be extrapolated; the 'nonce' profile checks that per-response
+nonces and session cookies do not escalate such origins to a full scan.
+
+Usage:
+  python benchmarks/bench_fleet.py --targets 2000 --hosts 50 --engines threads,async -o run.json
+  python benchmarks/bench_fleet.py --targets 2000 --hosts 50 --compare baseline.json -o run.json
+  python benchmarks/bench_fleet.py --targets 400 --hosts 10 --profiles nonce --origin-sample 3 -o run.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import random
+import secrets
+import shutil
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Response headers sent for each header profile; {nonce} is fresh in every response
+HEADER_PROFILES = {
+    'bare': {},
+    'typical': {
+        'Server': 'nginx',
+        'Set-Cookie': 'session=abc; Path=/; HttpOnly',
+        'X-Frame-Options': 'SAMEORIGIN',
+        'Strict-Transport-Security': 'max-age=31536000',
+    },
+    'hardened': {
+        'Set-Cookie': 'session=abc; Path=/; Secure; HttpOnly; SameSite=Strict',
+        'Strict-Transport-Security': 'max-age=31536000; includeSubDomains; preload',
+        'Content-Security-Policy': "default-src 'self'",
+        'X-Frame-Options': 'DENY',
+        'X-Content-Type-Options': 'nosniff',
+        'Referrer-Policy': 'strict-origin-when-cross-origin',
+        'Permissions-Policy': 'geolocation=(), microphone=(), camera=()',
+        'Cross-Origin-Resource-Policy': 'same-origin',
+        'Cache-Control': 'no-store',
+        'X-XSS-Protection': '0',
+    },
+    'nonce': {
+        'Set-Cookie': 'session={nonce}; Path=/; Secure; HttpOnly; SameSite=Lax',
+        'Strict-Transport-Security': 'max-age=31536000',
+        'Content-Security-Policy': "script-src 'nonce-{nonce}'; report-uri /csp?token={nonce}",
+        'X-Frame-Options': 'DENY',
+        'X-Content-Type-Options': 'nosniff',
+    },
+}
+
+
+class FleetHandler(BaseHTTPRequestHandler):
+    """Serves a target whose behavior is encoded in its query string.
+
+    l: latency in ms, p: header profile, r: redirects left, b: body bytes,
+    e: probability of answering 429, f: probability of answering 503,
+    t: probability of stalling past the client timeout (s: stall seconds).
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self.do_GET(send_body=False)
+
+    def do_GET(self, send_body=True):
+        parsed = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        time.sleep(float(query.get('l', 0)) / 1000)
+
+        if random.random() < float(query.get('t', 0)):
+            time.sleep(float(query.get('s', 5)))
+        roll = random.random()
+        if roll < float(query.get('e', 0)):
+            return self._empty(429, {'Retry-After': '0'})
+        if roll < float(query.get('e', 0)) + float(query.get('f', 0)):
+            return self._empty(503, {})
+
+        redirects = int(query.get('r', 0))
+        if redirects > 0:
+            query['r'] = str(redirects - 1)
+            location = parsed.path + '?' + '&'.join(f"{key}={value}" for key, value in query.items())
+            return self._empty(302, {'Location': location})
+
+        body = b'x' * int(query.get('b', 0))
+        self.send_response(200)
+        nonce = secrets.token_hex(8)
+        for name, value in HEADER_PROFILES[query.get('p', 'typical')].items():
+            self.send_header(name, value.replace('{nonce}', nonce))
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def _empty(self, status, headers):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+
+class FleetServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def handle_error(self, request, client_address):
+        # Clients give up on stalled targets; a broken pipe is expected
+        if not isinstance(sys.exc_info()[1], (ConnectionError, ssl.SSLError)):
+            super().handle_error(request, client_address)
+
+
+def make_certificate(directory):
+    """Create a throwaway self-signed certificate with openssl, or return None."""
+    if not shutil.which('openssl'):
+        return None
+    cert, key = os.path.join(directory, 'cert.pem'), os.path.join(directory, 'key.pem')
+    subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-keyout', key,
+                    '-out', cert, '-days', '1', '-subj', '/CN=localhost'],
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return cert, key
+
+
+def serve_fleet(hosts, certificate, ready, stop):
+    """Run one HTTP and, with a certificate, one HTTPS listener per host until stop is set."""
+    servers = []
+    ports = {}
+    for address in hosts:
+        http_server = FleetServer((address, 0), FleetHandler)
+        servers.append(http_server)
+        https_port = None
+        if certificate:
+            https_server = FleetServer((address, 0), FleetHandler)
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(*certificate)
+            # Handshake in the handler thread, not in the accept loop
+            https_server.socket = context.wrap_socket(https_server.socket, server_side=True,
+                                                      do_handshake_on_connect=False)
+            servers.append(https_server)
+            https_port = https_server.server_address[1]
+        ports[address] = (http_server.server_address[1], https_port)
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    ready.put(ports)
+    stop.wait()
+    for server in servers:
+        server.shutdown()
+
+
+def build_targets(args, ports):
+    """Generate the target URL list; the same seed gives the same list."""
+    rng = random.Random(args.seed)
+    profiles = args.profiles.split(',')
+    addresses = list(ports)
+    targets = []
+    for i in range(args.targets):
+        address = addresses[i % len(addresses)]
+        http_port, https_port = ports[address]
+        secure = https_port is not None and rng.random() < args.https
+        latency = max(0, rng.gauss(args.latency, args.latency_jitter))
+        query = {
+            'l': f"{latency:.1f}",
+            'p': rng.choice(profiles),
+            'r': rng.randint(1, args.max_redirects) if rng.random() < args.redirects else 0,
+            'b': args.body,
+            'e': args.status_429,
+            'f': args.status_5xx,
+            't': args.timeouts,
+            's': args.timeout + 1,
+        }
+        scheme, port = ('https', https_port) if secure else ('http', http_port)
+        targets.append(f"{scheme}://{address}:{port}/t{i}?" + '&'.join(f"{k}={v}" for k, v in query.items()))
+    return targets
+
+
+def make_scanner(engine, args):
+    """Build the scanner for an engine name; add new engines here."""
+    import sentinelheaders_core
+
+    options = {'timeout': args.timeout, 'delay': 0, 'host_concurrency': args.host_concurrency,
+               'fetch_mode': args.fetch_mode, 'origin_sample': args.origin_sample}
+    if engine == 'threads':
+        return sentinelheaders_core.SecurityHeadersScanner(threads=args.threads, **options)
+    if engine == 'threads-auto':
+        return sentinelheaders_core.SecurityHeadersScanner(threads=args.threads, autotune=True, **options)
+    if engine == 'async':
+        return sentinelheaders_core.AsyncSecurityHeadersScanner(max_connections=args.connections,
+                                                                max_per_host=args.host_concurrency, **options)
+    if engine == 'processes':
+        return sentinelheaders_core.ProcessPoolScanner(args.processes, threads=args.threads, **options)
+    raise ValueError(f"Unknown engine: {engine}")
+
+ENGINES = ('threads', 'threads-auto', 'async', 'processes')
+
+
+def percentile(ordered, q):
+    position = q / 100 * (len(ordered) - 1)
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def run_engine(engine, args, targets, results):
+    """Scan every target with one engine in this (fresh) process and report metrics."""
+    sys.path.insert(0, REPO_ROOT)
+    scanner = make_scanner(engine, args)
+    scanner.size_pools(args.hosts)
+
+    latencies = []
+    errors = 0
+
+    def on_result(index, record):
+        nonlocal errors
+        if record.error:
+            errors += 1
+        else:
+            latencies.append(record.elapsed * 1000)
+
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        cpu_before = os.times()
+        start = time.perf_counter()
+        scanned = scanner.stream_multiple_urls(targets, on_result=on_result)
+        elapsed = time.perf_counter() - start
+        cpu_after = os.times()
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    latencies.sort()
+    cpu = {field: getattr(cpu_after, field) - getattr(cpu_before, field)
+           for field in ('user', 'system', 'children_user', 'children_system')}
+    peak_rss = None
+    if resource:
+        # ru_maxrss is in KiB on Linux and bytes on macOS
+        scale = 1 if sys.platform == 'darwin' else 1024
+        peak_rss = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                       resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) * scale / 2 ** 20
+    results.put({
+        'engine': engine,
+        'urls': scanned,
+        'errors': errors,
+        'elapsed_s': round(elapsed, 3),
+        'urls_per_sec': round(scanned / elapsed, 1),
+        'latency_ms': {f"p{q}": round(percentile(latencies, q), 1) for q in (50, 95, 99)} if latencies else {},
+        'peak_rss_mb': round(peak_rss, 1) if peak_rss is not None else None,
+        'cpu_s': round(sum(cpu.values()), 3),
+        'cpu_user_s': round(cpu['user'] + cpu['children_user'], 3),
+        'cpu_system_s': round(cpu['system'] + cpu['children_system'], 3),
+        'extrapolated': scanner.stats.get('extrapolated'),
+        'origins_escalated': scanner.stats.get('origins_escalated'),
+    })
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline, tolerance):
+    """Print per-engine deltas against a baseline report; return True on regression."""
+    previous = {run['engine']: run for run in baseline['runs']}
+    regressed = False
+    print(f"\n{'engine':<14} {'URLs/s':>10} {'baseline':>10} {'delta':>8} {'p95 ms':>9} {'baseline':>10} {'delta':>8}")
+    for run in report['runs']:
+        old = previous.get(run['engine'])
+        if not old:
+            continue
+        throughput = run['urls_per_sec'] / old['urls_per_sec'] - 1
+        p95, old_p95 = run['latency_ms'].get('p95'), old['latency_ms'].get('p95')
+        latency = p95 / old_p95 - 1 if p95 and old_p95 else 0.0
+        worse = throughput < -tolerance or latency > tolerance
+        regressed |= worse
+        print(f"{run['engine']:<14} {run['urls_per_sec']:>10.1f} {old['urls_per_sec']:>10.1f} {throughput:>+7.1%} "
+              f"{p95 or 0:>9.1f} {old_p95 or 0:>10.1f} {latency:>+7.1%}{'  REGRESSION' if worse else ''}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark scan engines against a local stand-in fleet')
+    parser.add_argument('--targets', type=int, default=2000, help='Number of target URLs (default: 2000)')
+    parser.add_argument('--hosts', type=int, default=50, help='Simulated hosts, one loopback address each (default: 50)')
+    parser.add_argument('--engines', default='threads,async',
+                        help=f"Comma-separated engines to run: {', '.join(ENGINES)} (default: threads,async)")
+    parser.add_argument('--threads', type=int, default=32, help='Threads for thread engines (default: 32)')
+    parser.add_argument('--connections', type=int, default=256, help='Connections for the async engine (default: 256)')
+    parser.add_argument('--processes', type=int, default=2, help='Processes for the processes engine (default: 2)')
+    parser.add_argument('--host-concurrency', type=int, default=8, help='Concurrent requests per host (default: 8)')
+    parser.add_argument('--fetch-mode', default='get', help='Scanner fetch mode (default: get)')
+    parser.add_argument('--timeout', type=float, default=3, help='Scanner timeout in seconds (default: 3)')
+    parser.add_argument('--latency', type=float, default=20, help='Mean server latency in ms (default: 20)')
+    parser.add_argument('--latency-jitter', type=float, default=10, help='Latency standard deviation in ms (default: 10)')
+    parser.add_argument('--profiles', default='bare,typical,hardened', help='Header profiles to mix (default: all)')
+    parser.add_argument('--body', type=int, default=20000, help='Response body bytes (default: 20000)')
+    parser.add_argument('--https', type=float, default=0.25, help='Fraction of HTTPS targets (default: 0.25)')
+    parser.add_argument('--redirects', type=float, default=0.1, help='Fraction of targets behind redirects (default: 0.1)')
+    parser.add_argument('--max-redirects', type=int, default=3, help='Longest redirect chain (default: 3)')
+    parser.add_argument('--status-429', type=float, default=0.0, help='Per-request probability of a 429 (default: 0)')
+    parser.add_argument('--status-5xx', type=float, default=0.0, help='Per-request probability of a 503 (default: 0)')
+    parser.add_argument('--timeouts', type=float, default=0.0, help='Per-request probability of a stall past the timeout (default: 0)')
+    parser.add_argument('--origin-sample', type=int, default=0, metavar='K',
+                        help='Scan K sample URLs per origin and extrapolate the rest (default: off)')
+    parser.add_argument('--seed', type=int, default=1, help='Target generation seed (default: 1)')
+    parser.add_argument('-o', '--output', default='fleet-results.json', help='Report file (default: fleet-results.json)')
+    parser.add_argument('--compare', metavar='BASELINE', help='Earlier report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='Relative throughput drop or p95 rise counted as a regression (default: 0.10)')
+    args = parser.parse_args()
+
+    engines = args.engines.split(',')
+    unknown = [engine for engine in engines if engine not in ENGINES]
+    if unknown:
+        parser.error(f"unknown engines: {', '.join(unknown)}")
+
+    context = multiprocessing.get_context('spawn')
+    hosts = [f"127.0.{(i + 2) // 256}.{(i + 2) % 256}" for i in range(args.hosts)]
+    with tempfile.TemporaryDirectory() as tmp:
+        certificate = make_certificate(tmp) if args.https > 0 else None
+        if args.https > 0 and not certificate:
+            print("openssl not found; running without HTTPS targets", file=sys.stderr)
+        ready, stop = context.Queue(), context.Event()
+        fleet = context.Process(target=serve_fleet, args=(hosts, certificate, ready, stop), daemon=True)
+        fleet.start()
+        try:
+            ports = ready.get(timeout=60)
+            targets = build_targets(args, ports)
+            runs = []
+            for engine in engines:
+                results = context.Queue()
+                worker = context.Process(target=run_engine, args=(engine, args, targets, results))
+                worker.start()
+                while True:
+                    try:
+                        run = results.get(timeout=1)
+                        break
+                    except queue.Empty:
+                        if not worker.is_alive():
+                            sys.exit(f"{engine} worker exited with code {worker.exitcode}")
+                worker.join()
+                runs.append(run)
+                latency = run['latency_ms']
+                print(f"{engine:<14} {run['urls_per_sec']:>8.1f} URLs/s  p50 {latency.get('p50', 0):.1f} ms  "
+                      f"p95 {latency.get('p95', 0):.1f} ms  p99 {latency.get('p99', 0):.1f} ms  "
+                      f"RSS {run['peak_rss_mb']} MB  CPU {run['cpu_s']:.2f} s  errors {run['errors']}"
+                      + (f"  extrapolated {run['extrapolated']}  escalated {run['origins_escalated']}"
+                         if args.origin_sample else ''))
+        finally:
+            stop.set()
+            fleet.join(timeout=10)
+
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        'runs': runs,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
+
+    # One profile and no injected faults: every origin's samples agree
+    uniform = (len(args.profiles.split(',')) == 1
+               and not (args.status_429 or args.status_5xx or args.timeouts))
+    escalated = [run['engine'] for run in runs if run['origins_escalated']]
+    if args.origin_sample and uniform and escalated:
+        print(f"Origins escalated despite uniform profiles: {', '.join(escalated)}", file=sys.stderr)
+
+    regressed = False
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressed = compare(report, baseline, args.tolerance)
+    if regressed or (args.origin_sample and uniform and escalated):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
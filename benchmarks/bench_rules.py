@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for per-response header rule evaluation.
+
+Times RuleSet.evaluate against a reference implementation of the previous
+per-rule lookup loop, for a few representative response header profiles.
+
+Usage: python benchmarks/bench_rules.py [--number N]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime
+
+from requests.structures import CaseInsensitiveDict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sentinelheaders_core import DEFAULT_RULES, SECURITY_HEADERS, SecurityHeadersScanner
+
+# Headers a typical page sends besides the security headers
+COMMON_HEADERS = {
+    'Date': 'Mon, 01 Jan 2024 00:00:00 GMT',
+    'Content-Type': 'text/html; charset=utf-8',
+    'Content-Length': '48213',
+    'Connection': 'keep-alive',
+    'Vary': 'Accept-Encoding',
+    'Age': '120',
+    'Via': '1.1 varnish',
+    'X-Cache': 'HIT',
+    'X-Request-Id': '5f2c9a0e-1b7d-4c1e-9a2f-1f0c3b2d4e5a',
+    'Server': 'nginx',
+    'Set-Cookie': 'session=abc; Path=/; Secure; HttpOnly, theme=dark; Path=/',
+    'ETag': '"abc123"',
+    'Last-Modified': 'Sun, 31 Dec 2023 00:00:00 GMT',
+    'Accept-Ranges': 'bytes',
+}
+
+PROFILES = {
+    'bare': {'Content-Type': 'text/html', 'Content-Length': '0'},
+    'typical': COMMON_HEADERS,
+    'hardened': dict(COMMON_HEADERS, **{name: info['example'] for name, info in SECURITY_HEADERS.items()}),
+}
+
+
+def legacy_result(url):
+    """The plain dict results were before ScanRecord."""
+    return {
+        'url': url,
+        'timestamp': datetime.now().isoformat(),
+        'status_code': None,
+        'headers': {},
+        'missing_headers': [],
+        'present_headers': [],
+        'security_score': 0,
+        'security_policies': {},
+        'recommendations': [],
+        'error': None
+    }
+
+
+def legacy_evaluate(result, url, headers):
+    """The per-rule CaseInsensitiveDict lookups rule evaluation used to do."""
+    policies = {}
+    if url.startswith('https://'):
+        policies['HTTPS_Enforcement'] = {'status': 'PASS', 'details': 'Site uses HTTPS'}
+    else:
+        policies['HTTPS_Enforcement'] = {'status': 'FAIL', 'details': 'Site not using HTTPS'}
+    server_header = headers.get('Server', '')
+    if server_header:
+        policies['Server_Info_Disclosure'] = {'status': 'WARN', 'details': f'Server header disclosed: {server_header}'}
+    else:
+        policies['Server_Info_Disclosure'] = {'status': 'PASS', 'details': 'Server header not disclosed'}
+    set_cookie = headers.get('Set-Cookie', '')
+    if set_cookie:
+        if 'Secure' in set_cookie and 'HttpOnly' in set_cookie:
+            policies['Cookie_Security'] = {'status': 'PASS', 'details': 'Cookies have security attributes'}
+        else:
+            policies['Cookie_Security'] = {'status': 'FAIL', 'details': 'Cookies missing security attributes'}
+    else:
+        policies['Cookie_Security'] = {'status': 'INFO', 'details': 'No cookies set'}
+    result['security_policies'] = policies
+
+    set_cookie_headers = headers.get("Set-Cookie", "")
+    if set_cookie_headers:
+        flags = ['Secure', 'HttpOnly', 'SameSite']
+        missing_flags = [f for f in flags if f.lower() not in set_cookie_headers.lower()]
+        if missing_flags:
+            result['security_score'] -= 10
+            policies['Set-Cookie'] = {'status': 'FAIL', 'details': f"Missing attributes: {', '.join(missing_flags)}"}
+        else:
+            policies['Set-Cookie'] = {'status': 'PASS', 'details': "All recommended attributes set"}
+
+    for header_name, header_info in SECURITY_HEADERS.items():
+        if header_name in headers:
+            result['present_headers'].append({
+                'name': header_name,
+                'value': headers[header_name],
+                'severity': header_info['severity'],
+                'points': header_info['points']
+            })
+            result['security_score'] += header_info['points']
+        else:
+            result['missing_headers'].append({
+                'name': header_name,
+                'description': header_info['description'],
+                'severity': header_info['severity'],
+                'example': header_info['example'],
+                'points': header_info['points'],
+                'impact': header_info['impact']
+            })
+            result['recommendations'].append(f"[!] Implement {header_name}: {header_info['description']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-response header rule evaluation')
+    parser.add_argument('--number', type=int, default=20000, help='Evaluations per measurement (default: 20000)')
+    parser.add_argument('--repeat', type=int, default=5, help='Measurements per case; the best is reported (default: 5)')
+    args = parser.parse_args()
+
+    scanner = SecurityHeadersScanner(user_agent='bench')
+    url = 'https://example.com'
+
+    print(f"{'profile':<10} {'headers':>7} {'legacy us':>10} {'compiled us':>12} {'speedup':>8}")
+    for name, raw in PROFILES.items():
+        headers = CaseInsensitiveDict(raw)
+
+        def run_legacy():
+            legacy_evaluate(legacy_result(url), url, headers)
+
+        def run_compiled():
+            DEFAULT_RULES.evaluate(scanner._new_result(url), headers)
+
+        timings = []
+        for run in (run_legacy, run_compiled):
+            best = min(timeit.repeat(run, number=args.number, repeat=args.repeat))
+            timings.append(best / args.number * 1e6)
+        legacy, compiled = timings
+        print(f"{name:<10} {len(headers):>7} {legacy:>10.2f} {compiled:>12.2f} {legacy / compiled:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Load test of the `sentinelheaders.py serve` API against a local stand-in target.
+
+Starts a target server on loopback and the scan daemon in a subprocess,
+then runs four phases:
+
+  latency       --clients threads submit single-URL jobs with "wait" and
+                time each response, reporting jobs/sec and p50/p95/p99
+  cold          the same kind of scan as a fresh `sentinelheaders.py -u`
+                process per URL, the cost the daemon avoids
+  backpressure  --burst batch jobs against slow target pages, submitted
+                without waiting; once the job queue is full the daemon
+                must answer 429, and every accepted job must still finish
+  malformed     POST /scan requests with a bad Content-Length or body must
+                get a JSON error promptly instead of a dropped or stuck
+                connection
+
+The report is written as JSON. The benchmark exits non-zero if the
+backpressure phase sees no 429 or an accepted job fails, if a malformed
+request is not refused with the expected status, or if --compare
+finds throughput or p95 latency worse than the baseline by more than
+--tolerance.
+
+Usage:
+  python benchmarks/bench_serve.py --requests 2000 --clients 16 -o serve.json
+  python benchmarks/bench_serve.py --compare baseline.json -o serve.json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(REPO_ROOT, 'sentinelheaders.py')
+
+
+class TargetHandler(BaseHTTPRequestHandler):
+    """Answers every GET with a small page, after ?delay=MS milliseconds if given."""
+
+    protocol_version = 'HTTP/1.1'
+    # Kept-alive scanner connections would otherwise stall 40 ms per response on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        delay = parse_qs(urlparse(self.path).query).get('delay')
+        if delay:
+            time.sleep(int(delay[0]) / 1000)
+        body = b'ok'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('X-Frame-Options', 'DENY')
+        self.send_header('X-Content-Type-Options', 'nosniff')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TargetServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def api_call(connection, method, path, document=None):
+    """(status, decoded JSON body) of one API request on a kept-alive connection."""
+    body = json.dumps(document).encode() if document is not None else None
+    connection.request(method, path, body=body, headers={'Content-Type': 'application/json'})
+    response = connection.getresponse()
+    return response.status, json.loads(response.read())
+
+
+def start_daemon(port, args):
+    """Start the scan daemon and wait until its API answers."""
+    command = [sys.executable, SCRIPT, 'serve', f'127.0.0.1:{port}', '--delay', '0', '--no-color',
+               '--threads', str(args.threads), '--host-concurrency', str(args.threads),
+               '--queue-size', str(args.queue_size), '--timeout', '10']
+    daemon = subprocess.Popen(command, cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            api_call(connection, 'GET', '/status')
+            connection.close()
+            return daemon
+        except OSError:
+            if daemon.poll() is not None:
+                break
+            time.sleep(0.1)
+    daemon.kill()
+    sys.exit(f"scan daemon did not start: {' '.join(command)}")
+
+
+def percentile(ordered, q):
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)] if ordered else 0.0
+
+
+def run_latency(api_port, target, args):
+    """Single-URL jobs with "wait" from --clients threads; returns (latencies in ms, failures, 429s, seconds).
+
+    A job answered with 429 is resubmitted after a short pause, as a client
+    honouring Retry-After would, and its latency includes the wait.
+    """
+    latencies = []
+    failures = []
+    throttled = [0]
+    counter = iter(range(args.requests))
+    lock = threading.Lock()
+
+    def client():
+        connection = http.client.HTTPConnection('127.0.0.1', api_port, timeout=60)
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                break
+            started = time.perf_counter()
+            status, job = api_call(connection, 'POST', '/scan', {'url': f'{target}/r{i}', 'wait': 30})
+            while status == 429:
+                with lock:
+                    throttled[0] += 1
+                time.sleep(0.05)
+                status, job = api_call(connection, 'POST', '/scan', {'url': f'{target}/r{i}', 'wait': 30})
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                if status == 200 and job['status'] == 'done' and not job['results'][0]['error']:
+                    latencies.append(elapsed)
+                else:
+                    failures.append(status)
+        connection.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(args.clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sorted(latencies), failures, throttled[0], time.perf_counter() - started
+
+
+def run_cold(target, runs):
+    """Wall times in ms of fresh single-URL CLI scans."""
+    times = []
+    for i in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, SCRIPT, '-u', f'{target}/cold{i}', '--no-color'], cwd=REPO_ROOT,
+                       check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append((time.perf_counter() - started) * 1000)
+    return times
+
+
+def run_backpressure(api_port, target, args):
+    """Submit --burst slow batch jobs without waiting, then wait for the accepted ones to finish."""
+    connection = http.client.HTTPConnection('127.0.0.1', api_port, timeout=60)
+    accepted = []
+    rejected = 0
+    for i in range(args.burst):
+        urls = [f'{target}/slow{i}-{n}?delay={args.slow_ms}' for n in range(args.batch)]
+        status, job = api_call(connection, 'POST', '/scan', {'urls': urls})
+        if status == 202:
+            accepted.append(job['id'])
+        elif status == 429:
+            rejected += 1
+        else:
+            sys.exit(f"unexpected status {status} from POST /scan: {job}")
+
+    failed = 0
+    deadline = time.monotonic() + 300
+    for job_id in accepted:
+        while True:
+            status, job = api_call(connection, 'GET', f'/jobs/{job_id}')
+            if status != 200 or job['status'] in ('done', 'failed') or time.monotonic() > deadline:
+                break
+            time.sleep(0.2)
+        if status != 200 or job['status'] != 'done' or any(result['error'] for result in job['results']):
+            failed += 1
+    connection.close()
+    return {'submitted': args.burst, 'accepted': len(accepted), 'rejected': rejected, 'failed': failed}
+
+
+# (Content-Length header value, body, status the API must answer with)
+MALFORMED_REQUESTS = [
+    ('abc', b'{}', 400),
+    ('-5', b'{}', 400),
+    ('1.5', b'{}', 400),
+    (str(64 * 1024 * 1024), b'', 413),
+    ('8', b'not json', 400),
+    ('11', b'{"urls":[]}', 400),
+]
+
+
+def run_malformed(api_port):
+    """Send each MALFORMED_REQUESTS entry on a fresh connection; returns the descriptions of wrong answers."""
+    wrong = []
+    for length, body, expected in MALFORMED_REQUESTS:
+        request = (f'POST /scan HTTP/1.1\r\nHost: 127.0.0.1\r\nContent-Type: application/json\r\n'
+                   f'Content-Length: {length}\r\n\r\n').encode() + body
+        with socket.create_connection(('127.0.0.1', api_port), timeout=5) as connection:
+            connection.sendall(request)
+            response = http.client.HTTPResponse(connection)
+            try:
+                response.begin()
+                status, document = response.status, json.loads(response.read())
+            except (OSError, ValueError, http.client.HTTPException) as e:
+                status, document = None, {'error': repr(e)}
+        if status != expected or 'error' not in document:
+            wrong.append(f"Content-Length {length!r}: expected {expected}, got {status} {document}")
+    return wrong
+
+
+def compare(report, baseline, tolerance):
+    """Print throughput and p95 deltas against a baseline report; return True on regression."""
+    regressed = False
+    for metric, higher_is_better in (('jobs_per_sec', True), ('p95_ms', False)):
+        new, old = report['latency'][metric], baseline['latency'][metric]
+        delta = new / old - 1 if old else 0.0
+        worse = -delta > tolerance if higher_is_better else delta > tolerance
+        regressed |= worse
+        print(f"{metric:<13} {new:>10.1f} {old:>10.1f} {delta:>+7.1%}{'  REGRESSION' if worse else ''}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the sentinelheaders.py serve API')
+    parser.add_argument('--requests', type=int, default=1000, help='Single-URL jobs in the latency phase (default: 1000)')
+    parser.add_argument('--clients', type=int, default=16, help='Concurrent API clients (default: 16)')
+    parser.add_argument('--threads', type=int, default=32, help='Scanner --threads of the daemon (default: 32)')
+    parser.add_argument('--queue-size', type=int, default=32, help='Daemon --queue-size (default: 32)')
+    parser.add_argument('--cold-runs', type=int, default=5, help='Fresh CLI scans timed for comparison (default: 5)')
+    parser.add_argument('--burst', type=int, default=80, help='Batch jobs submitted in the backpressure phase (default: 80)')
+    parser.add_argument('--batch', type=int, default=20, help='URLs per backpressure job (default: 20)')
+    parser.add_argument('--slow-ms', type=int, default=200, help='Target latency of backpressure URLs (default: 200)')
+    parser.add_argument('-o', '--output', default='serve-results.json', help='Report file (default: serve-results.json)')
+    parser.add_argument('--compare', metavar='BASELINE', help='Earlier report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help='Relative throughput or p95 loss counted as a regression (default: 0.15)')
+    args = parser.parse_args()
+
+    target_server = TargetServer(('127.0.0.1', 0), TargetHandler)
+    threading.Thread(target=target_server.serve_forever, daemon=True).start()
+    target = f'http://127.0.0.1:{target_server.server_address[1]}'
+    api_port = free_port()
+    daemon = start_daemon(api_port, args)
+    try:
+        latencies, failures, throttled, seconds = run_latency(api_port, target, args)
+        backpressure = run_backpressure(api_port, target, args)
+        malformed = run_malformed(api_port)
+    finally:
+        daemon.terminate()
+        daemon.wait()
+    cold = run_cold(target, args.cold_runs)
+    target_server.shutdown()
+
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'clients': args.clients,
+        'threads': args.threads,
+        'latency': {
+            'requests': args.requests,
+            'failed': len(failures),
+            'throttled': throttled,
+            'jobs_per_sec': round(len(latencies) / seconds, 1),
+            'p50_ms': round(percentile(latencies, 0.50), 1),
+            'p95_ms': round(percentile(latencies, 0.95), 1),
+            'p99_ms': round(percentile(latencies, 0.99), 1),
+        },
+        'cold_cli_median_ms': round(statistics.median(cold), 1) if cold else None,
+        'backpressure': backpressure,
+        'malformed_failures': malformed,
+    }
+    latency = report['latency']
+    print(f"latency       {latency['jobs_per_sec']:.1f} jobs/s  p50 {latency['p50_ms']:.1f} ms  "
+          f"p95 {latency['p95_ms']:.1f} ms  p99 {latency['p99_ms']:.1f} ms  "
+          f"429s {latency['throttled']}  failed {latency['failed']}")
+    if cold:
+        print(f"cold CLI      median {report['cold_cli_median_ms']:.1f} ms per URL")
+    print(f"backpressure  {backpressure['accepted']} accepted, {backpressure['rejected']} rejected with 429, "
+          f"{backpressure['failed']} accepted jobs failed")
+    print(f"malformed     {len(MALFORMED_REQUESTS) - len(malformed)}/{len(MALFORMED_REQUESTS)} refused as expected")
+    for description in malformed:
+        print(f"  {description}")
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
+
+    failed = bool(failures) or backpressure['failed'] > 0 or bool(malformed)
+    if args.burst > args.queue_size + 1 and not backpressure['rejected']:
+        print("backpressure phase saw no 429 although the burst exceeded the queue")
+        failed = True
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        failed |= compare(report, baseline, args.tolerance)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for sentinelheaders.py commands.
+
+Runs each command in a fresh interpreter --repeat times and reports the
+min/median wall time, then runs it once more to record which heavy modules
+were actually executed (lazily imported modules only count once loaded, so
+-X importtime alone would miss them). Reference and post-processing
+commands (--help, --help-headers, --summarize) are expected not to load the
+HTTP stack; the benchmark exits non-zero if one does, or if --compare finds
+a command slower than the baseline by more than --tolerance.
+
+The same commands are also timed against the scripts of an earlier git
+revision (--against, by default the first commit) exported to a temporary
+directory, so a startup cost that no earlier report saw, such as a script
+that is recompiled on every run, shows up as a delta against that code.
+
+Usage:
+  python benchmarks/bench_startup.py --repeat 20 -o startup.json
+  python benchmarks/bench_startup.py --compare baseline.json -o startup.json
+  python benchmarks/bench_startup.py --against HEAD~5 --commands help,help-headers
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT_NAME = 'sentinelheaders.py'
+
+# Modules that only scans should need
+HTTP_STACK = ('requests', 'urllib3', 'asyncio', 'ssl', 'sqlite3')
+
+# Runs a command like the interpreter would and writes the modules it loaded to argv[1] at exit
+LOADED_PROBE = """
+import atexit, json, runpy, sys
+def dump(path=sys.argv.pop(1)):
+    loaded = [name for name, module in list(sys.modules.items())
+              if '.' not in name and type(module).__name__ != '_LazyModule']
+    with open(path, 'w') as f:
+        json.dump(loaded, f)
+atexit.register(dump)
+sys.argv.pop(0)
+if sys.argv[0] == '-c':
+    sys.argv.pop(0)
+    exec(sys.argv[0])
+else:
+    runpy.run_path(sys.argv[0], run_name='__main__')
+"""
+
+
+class QuietHandler(BaseHTTPRequestHandler):
+    """Answers every GET with a small page and a couple of security headers."""
+
+    def do_GET(self):
+        body = b'ok'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('X-Frame-Options', 'DENY')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def write_columns_file(path, rows=1000):
+    """Save a small result columns file for --summarize."""
+    sys.path.insert(0, REPO_ROOT)
+    from sentinelheaders_core import DEFAULT_RULES, ResultColumns, ScanRecord
+
+    columns = ResultColumns(DEFAULT_RULES.names)
+    for i in range(rows):
+        record = ScanRecord(f"https://site{i % 50}.example.com/{i}", DEFAULT_RULES)
+        record.status_code = 200
+        record.security_score = 40 + i % 60
+        record.elapsed = 0.05
+        columns.append(record)
+    columns.save(path)
+
+
+def commands(root, columns_file, port):
+    """Command name -> (interpreter arguments, whether it scans) for the scripts in root."""
+    script = os.path.join(root, SCRIPT_NAME)
+    return {
+        'import': (['-c', 'import sentinelheaders'], False),
+        'help': ([script, '--help'], False),
+        'help-headers': ([script, '--help-headers', '--no-color'], False),
+        'summarize': ([script, '--summarize', columns_file, '--no-color'], False),
+        'scan-one': ([script, '-u', f'http://127.0.0.1:{port}/', '--no-color'], True),
+    }
+
+
+def export_revision(revision, directory):
+    """Write the top-level Python files of a git revision to directory; return the resolved commit."""
+    def git(*arguments):
+        return subprocess.run(['git'] + list(arguments), cwd=REPO_ROOT, check=True,
+                              capture_output=True).stdout
+    commit = git('rev-parse', '--short', revision + '^{commit}').decode().strip()
+    for name in git('ls-tree', '--name-only', commit).decode().splitlines():
+        if name.endswith('.py'):
+            with open(os.path.join(directory, name), 'wb') as f:
+                f.write(git('show', f'{commit}:{name}'))
+    return commit
+
+
+def first_commit():
+    return subprocess.run(['git', 'rev-list', '--max-parents=0', 'HEAD'], cwd=REPO_ROOT, check=True,
+                          capture_output=True, text=True).stdout.split()[-1]
+
+
+def time_command(arguments, repeat, cwd=REPO_ROOT):
+    """Wall times in ms of repeat fresh runs."""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable] + arguments, cwd=cwd, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append((time.perf_counter() - started) * 1000)
+    return times
+
+
+def loaded_modules(arguments, tmp):
+    """Top-level modules executed by one run of the command."""
+    path = os.path.join(tmp, 'loaded.json')
+    subprocess.run([sys.executable, '-c', LOADED_PROBE, path] + arguments, cwd=REPO_ROOT, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    with open(path, encoding='utf-8') as f:
+        return set(json.load(f))
+
+
+def compare(report, baseline, tolerance):
+    """Print per-command deltas against a baseline report; return True on regression."""
+    previous = {run['command']: run for run in baseline['runs']}
+    regressed = False
+    print(f"\n{'command':<14} {'median ms':>10} {'baseline':>10} {'delta':>8}")
+    for run in report['runs']:
+        old = previous.get(run['command'])
+        if not old:
+            continue
+        delta = run['median_ms'] / old['median_ms'] - 1
+        worse = delta > tolerance
+        regressed |= worse
+        print(f"{run['command']:<14} {run['median_ms']:>10.1f} {old['median_ms']:>10.1f} {delta:>+7.1%}"
+              f"{'  REGRESSION' if worse else ''}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark sentinelheaders.py startup time per command')
+    parser.add_argument('--repeat', type=int, default=20, help='Runs per command (default: 20)')
+    parser.add_argument('--commands', help='Comma-separated subset of commands to run (default: all)')
+    parser.add_argument('-o', '--output', default='startup-results.json', help='Report file (default: startup-results.json)')
+    parser.add_argument('--compare', metavar='BASELINE', help='Earlier report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help='Relative median slowdown counted as a regression (default: 0.15)')
+    parser.add_argument('--against', metavar='REV',
+                        help='Git revision whose scripts are timed for comparison (default: the first commit)')
+    parser.add_argument('--no-against', action='store_true', help='Do not time an earlier revision')
+    args = parser.parse_args()
+
+    if os.environ.get('PYTHONDONTWRITEBYTECODE'):
+        print("PYTHONDONTWRITEBYTECODE is set: modules are recompiled on every run", file=sys.stderr)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    runs = []
+    failed = False
+    against = None
+    with tempfile.TemporaryDirectory() as tmp:
+        columns_file = os.path.join(tmp, 'results.columns')
+        write_columns_file(columns_file)
+        port = server.server_address[1]
+        available = commands(REPO_ROOT, columns_file, port)
+        selected = args.commands.split(',') if args.commands else list(available)
+        unknown = [name for name in selected if name not in available]
+        if unknown:
+            parser.error(f"unknown commands: {', '.join(unknown)}")
+
+        earlier = None
+        if not args.no_against:
+            earlier_root = os.path.join(tmp, 'against')
+            os.mkdir(earlier_root)
+            try:
+                against = export_revision(args.against or first_commit(), earlier_root)
+            except (OSError, subprocess.CalledProcessError) as e:
+                print(f"Not timing an earlier revision: {e}", file=sys.stderr)
+            else:
+                earlier = commands(earlier_root, columns_file, port)
+
+        for name in selected:
+            arguments, scans = available[name]
+            times = time_command(arguments, args.repeat)
+            modules = loaded_modules(arguments, tmp)
+            stack = [module for module in HTTP_STACK if module in modules]
+            unexpected = bool(stack) and not scans
+            failed |= unexpected
+            run = {
+                'command': name,
+                'min_ms': round(min(times), 1),
+                'median_ms': round(statistics.median(times), 1),
+                'http_stack': stack,
+                'modules_loaded': len(modules),
+            }
+            line = (f"{name:<14} min {min(times):>7.1f} ms  median {statistics.median(times):>7.1f} ms  "
+                    f"loads: {', '.join(stack) or '-'}{'  UNEXPECTED' if unexpected else ''}")
+            if earlier:
+                try:
+                    earlier_times = time_command(earlier[name][0], args.repeat, cwd=earlier_root)
+                except subprocess.CalledProcessError:
+                    # The command did not exist yet at that revision
+                    line += f"  {against}: not available"
+                else:
+                    run['against_median_ms'] = round(statistics.median(earlier_times), 1)
+                    delta = run['median_ms'] / run['against_median_ms'] - 1
+                    line += f"  {against} median {run['against_median_ms']:.1f} ms ({delta:+.1%})"
+            runs.append(run)
+            print(line)
+    server.shutdown()
+
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'against': against,
+        'runs': runs,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        failed |= compare(report, baseline, args.tolerance)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark ResultColumns summaries over synthetic scan results.
+
+Fills a columnar store with N rows spread over a set of domains, then times
+summary() with NumPy (when installed) and with the pure-Python fallback,
+plus a save/load round trip.
+
+Usage: python benchmarks/bench_summary.py [--rows N] [--domains N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import sentinelheaders_core
+from sentinelheaders_core import DEFAULT_RULES, ResultColumns
+
+
+def build_columns(rows, domain_count, seed=0):
+    """Fill a store with random rows without going through ScanRecord."""
+    rng = random.Random(seed)
+    columns = ResultColumns(DEFAULT_RULES.names)
+    columns.domains = [f"site{i}.example.com" for i in range(domain_count)]
+    full_mask = (1 << len(DEFAULT_RULES.names)) - 1
+    columns.score.extend(rng.randint(-10, 100) for _ in range(rows))
+    columns.status.extend(rng.choice((200, 200, 200, 301, 403, 404, 500)) for _ in range(rows))
+    columns.latency.extend(rng.expovariate(5) for _ in range(rows))
+    columns.mask.extend(rng.getrandbits(len(DEFAULT_RULES.names)) & full_mask for _ in range(rows))
+    columns.failed.extend(rng.random() < 0.05 for _ in range(rows))
+    columns.domain.extend(rng.randrange(domain_count) for _ in range(rows))
+    return columns
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:<28} {time.perf_counter() - start:8.3f} s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark columnar result summaries')
+    parser.add_argument('--rows', type=int, default=1000000, help='Rows to summarize (default: 1000000)')
+    parser.add_argument('--domains', type=int, default=50000, help='Distinct domains (default: 50000)')
+    args = parser.parse_args()
+
+    columns = timed(f"build {args.rows} rows", lambda: build_columns(args.rows, args.domains))
+    numpy = sentinelheaders_core.numpy
+    if numpy is not None:
+        fast = timed("summary (numpy)", columns.summary)
+    sentinelheaders_core.numpy = None
+    try:
+        slow = timed("summary (pure python)", columns.summary)
+    finally:
+        sentinelheaders_core.numpy = numpy
+    if numpy is not None and fast != slow:
+        print("warning: numpy and pure Python summaries differ")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.shrc')
+        timed("save", lambda: columns.save(path))
+        print(f"{'file size':<28} {os.path.getsize(path) / args.rows:8.1f} bytes/row")
+        timed("load", lambda: ResultColumns.load(path))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,5104 @@
+#!/usr/bin/env python3
+
+#### AI CODER HERE ####
+#### SNECKEY0DAY ####
+
+
+"""
+HTTP Security Headers Scanner v3.0
+A professional-grade security assessment tool for web applications.
+Copyright (c) 2025 Security Headers Scanner. All rights reserved.
+
+The scanner is implemented here and started by sentinelheaders.py; as an
+imported module its compiled bytecode is cached between runs.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import gzip
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import signal
+import sys
+import time
+import random
+import socket
+import struct
+import contextvars
+import threading
+import queue
+import heapq
+import bisect
+from array import array
+from datetime import datetime
+from collections import deque
+from itertools import accumulate, chain, islice
+from typing import Container, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from urllib.parse import urlparse, urljoin, urlsplit, urlunsplit
+
+def lazy_import(name: str, optional: bool = False):
+    """Import a module whose code only runs on first attribute access."""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        if optional:
+            return None
+        raise ImportError(f"No module named '{name}'", name=name)
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    parent, _, child = name.rpartition('.')
+    if parent:
+        # As the import statement does, so 'import parent.child' finds it
+        setattr(sys.modules[parent], child, module)
+    return module
+
+# Loaded on first use, so --help, --help-headers and --summarize never pay for the HTTP stack
+requests = lazy_import('requests')
+urllib3 = lazy_import('urllib3')
+asyncio = lazy_import('asyncio')
+ssl = lazy_import('ssl')
+sqlite3 = lazy_import('sqlite3')
+futures = lazy_import('concurrent.futures')
+http_server = lazy_import('http.server')
+email_utils = lazy_import('email.utils')
+cProfile = lazy_import('cProfile')
+pstats = lazy_import('pstats')
+tracemalloc = lazy_import('tracemalloc')
+inspect = lazy_import('inspect')
+numpy = lazy_import('numpy', optional=True)  # optional: summaries fall back to pure Python
+
+# Color codes for terminal output
+class Colors:
+    RED = '\033[91m'
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    BLUE = '\033[94m'
+    MAGENTA = '\033[95m'
+    CYAN = '\033[96m'
+    WHITE = '\033[97m'
+    BOLD = '\033[1m'
+    UNDERLINE = '\033[4m'
+    DIM = '\033[2m'
+    RESET = '\033[0m'
+
+def disable_colors():
+    """Turn off colored output."""
+    for attr in dir(Colors):
+        if not attr.startswith('_'):
+            setattr(Colors, attr, '')
+
+def print_banner():
+    """Print the professional security tool banner."""
+    banner = f"""
+{Colors.CYAN}┌─────────────────────────────────────────────────────────────────────────────────┐
+│                                                                                 │
+│    {Colors.BOLD}[#] HTTP SECURITY HEADERS SCANNER v3.0{Colors.RESET}{Colors.CYAN}                                       │
+│                                                                                 │
+│    {Colors.WHITE}[*] Professional Security Assessment Tool{Colors.RESET}{Colors.CYAN}                                    │
+│    {Colors.DIM}[*] WAF Bypass | Threading | Security Policy Analysis{Colors.RESET}{Colors.CYAN}                        │
+│    {Colors.DIM}[*] Copyright (c) 2025 Security Headers Scanner{Colors.RESET}{Colors.CYAN}                              │
+│                                                                                 │
+└─────────────────────────────────────────────────────────────────────────────────┘{Colors.RESET}
+"""
+    print(banner)
+
+def print_separator(char="─", length=81):
+    """Print a separator line."""
+    print(f"{Colors.BLUE}{char * length}{Colors.RESET}")
+
+def print_section_header(title: str):
+    """Print a formatted section header."""
+    print(f"\n{Colors.BOLD}{Colors.BLUE}[+] {title.upper()}{Colors.RESET}")
+    print_separator()
+
+def format_bytes(size: float) -> str:
+    """Format a byte count for display."""
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if abs(size) < 1024 or unit == 'GB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+def severity_color(severity: str) -> str:
+    """Get color for severity level."""
+    colors = {
+        'CRITICAL': Colors.RED,
+        'HIGH': Colors.YELLOW,
+        'MEDIUM': Colors.CYAN,
+        'LOW': Colors.GREEN
+    }
+    return colors.get(severity, Colors.WHITE)
+
+class ScanStats:
+    """Thread-safe counters collected during a scan run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def incr(self, name: str, amount: int = 1):
+        """Add amount to a counter."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def get(self, name: str, default: int = 0) -> int:
+        """Get the current value of a counter."""
+        with self._lock:
+            return self._counters.get(name, default)
+
+    def snapshot(self) -> Dict[str, int]:
+        """Return a copy of all counters."""
+        with self._lock:
+            return dict(self._counters)
+
+    def merge(self, counters: Dict[str, int]):
+        """Add counters collected elsewhere into this instance."""
+        with self._lock:
+            for name, amount in counters.items():
+                self._counters[name] = self._counters.get(name, 0) + amount
+
+class DnsCache:
+    """getaddrinfo() answers shared by every scan in the process, with background prefetch.
+    
+    The system resolver does not report record TTLs, so answers are kept for a
+    fixed ttl, and names that do not exist for negative_ttl: a dead domain
+    costs one resolver round trip per run instead of one per attempt.
+    Concurrent lookups of a host share a single resolver call.
+    """
+    
+    # Resolver errors meaning the name does not exist, as opposed to a transient failure
+    NEGATIVE_ERRORS = frozenset(getattr(socket, name) for name in ('EAI_NONAME', 'EAI_NODATA', 'EAI_FAIL')
+                                if hasattr(socket, name))
+    MAX_ENTRIES = 100000
+    
+    def __init__(self, ttl: float = 300, negative_ttl: float = 60, workers: int = 16,
+                 stats: Optional[ScanStats] = None):
+        self._lock = threading.Lock()
+        self._entries = {}
+        # Lookups in flight: host -> [done event, answer]
+        self._pending = {}
+        self._queue = queue.Queue()
+        self._threads = []
+        self.configure(ttl, negative_ttl, workers, stats)
+    
+    def configure(self, ttl: float, negative_ttl: float, workers: int, stats: Optional[ScanStats] = None):
+        """Set answer lifetimes, the number of prefetch threads and where counters go."""
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.workers = workers
+        self.stats = stats or ScanStats()
+    
+    def negative(self, host: str) -> Optional[socket.gaierror]:
+        """The cached resolver error if host is known not to exist."""
+        with self._lock:
+            entry = self._entries.get(host)
+        if entry is not None and entry[0] > time.monotonic() and isinstance(entry[1], socket.gaierror):
+            return entry[1]
+        return None
+    
+    def resolve(self, host: str, wait: bool = True) -> Optional[List[Tuple]]:
+        """getaddrinfo() stream entries for host, with port 0.
+        
+        With wait=False, returns None instead of blocking when the answer is
+        not cached yet.
+        """
+        answer = self._answer(host, wait)
+        if isinstance(answer, Exception):
+            # A fresh copy, as other threads may be raising the cached one
+            raise type(answer)(*answer.args)
+        return answer
+    
+    def _answer(self, host: str, wait: bool):
+        with self._lock:
+            entry = self._entries.get(host)
+            if entry is not None and entry[0] > time.monotonic():
+                self.stats.incr('dns_cache_hits')
+                return entry[1]
+            if not wait:
+                return None
+            pending = self._pending.get(host)
+            if pending is None:
+                pending = self._pending[host] = [threading.Event(), None]
+                owner = True
+            else:
+                owner = False
+        if owner:
+            return self._lookup(host, pending)
+        pending[0].wait()
+        self.stats.incr('dns_cache_hits')
+        return pending[1]
+    
+    def _lookup(self, host: str, pending: List) -> Union[List[Tuple], Exception]:
+        self.stats.incr('dns_lookups')
+        ttl = self.ttl
+        answer = None
+        try:
+            answer = socket.getaddrinfo(host, None, 0, socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            answer = e
+            ttl = self.negative_ttl if e.errno in self.NEGATIVE_ERRORS else 0
+            self.stats.incr('dns_failures')
+        except (OSError, UnicodeError) as e:
+            answer, ttl = e, 0
+        finally:
+            with self._lock:
+                if answer is not None and ttl > 0:
+                    if host not in self._entries and len(self._entries) >= self.MAX_ENTRIES:
+                        del self._entries[next(iter(self._entries))]
+                    self._entries[host] = (time.monotonic() + ttl, answer)
+                del self._pending[host]
+            pending[1] = answer
+            pending[0].set()
+        return answer
+    
+    def prefetch(self, host: str):
+        """Resolve host on a background thread unless it is cached or already being resolved."""
+        if not self.workers or not host:
+            return
+        with self._lock:
+            entry = self._entries.get(host)
+            if (entry is not None and entry[0] > time.monotonic()) or host in self._pending:
+                return
+            pending = self._pending[host] = [threading.Event(), None]
+            if len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._prefetch_worker, name='dns-prefetch', daemon=True)
+                self._threads.append(thread)
+                thread.start()
+        self.stats.incr('dns_prefetched')
+        self._queue.put((host, pending))
+    
+    def _prefetch_worker(self):
+        while True:
+            host, pending = self._queue.get()
+            self._lookup(host, pending)
+
+# Shared by both engines; scanners configure it from their options
+DNS_CACHE = DnsCache()
+
+class HostResolutionError(Exception):
+    """Raised when a scan's host is known not to resolve, so no request is made."""
+    
+    def __init__(self, host: str, error: Exception):
+        super().__init__(f"Failed to resolve '{host}' ({error})")
+
+def with_port(entries: List[Tuple], port: int, family: int = socket.AF_UNSPEC) -> List[Tuple]:
+    """Point cached getaddrinfo() entries of the given family at port."""
+    return [(entry_family, kind, proto, name, address[:1] + (port,) + address[2:])
+            for entry_family, kind, proto, name, address in entries
+            if family == socket.AF_UNSPEC or entry_family == family]
+
+def resolve_host(host: str, port: int) -> List[Tuple]:
+    """Resolve a host to getaddrinfo() stream socket entries through the DNS cache."""
+    return with_port(DNS_CACHE.resolve(host), port, urllib3.util.connection.allowed_gai_family())
+
+class TimedConnectionMixin:
+    """Adds DNS, connect, TLS and time-to-first-byte time of a urllib3 connection to the scan being timed."""
+
+    TLS = False
+
+    def _new_conn(self):
+        host = self._dns_host
+        started = time.perf_counter()
+        try:
+            addresses = list(dict.fromkeys(entry[4][0] for entry in resolve_host(host, self.port)))
+        except socket.gaierror as e:
+            add_scan_time('dns', time.perf_counter() - started)
+            # The error urllib3 raises when its own lookup fails
+            if hasattr(urllib3.exceptions, 'NameResolutionError'):
+                raise urllib3.exceptions.NameResolutionError(self.host, self, e) from e
+            raise urllib3.exceptions.NewConnectionError(self, f"Failed to establish a new connection: {e}") from e
+        except (OSError, UnicodeError):
+            addresses = None
+        resolved = time.perf_counter()
+        add_scan_time('dns', resolved - started)
+        if not addresses:
+            # Let urllib3 resolve again and raise its usual error
+            return super()._new_conn()
+
+        try:
+            for position, address in enumerate(addresses, 1):
+                # Only the socket goes to the address; Host, SNI and certificates still use the name
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except urllib3.exceptions.ConnectTimeoutError:
+                    if position == len(addresses):
+                        raise
+        finally:
+            self._dns_host = host
+            connected = time.perf_counter()
+            add_scan_time('connect', connected - resolved)
+            self._socket_seconds = connected - started
+
+    def connect(self):
+        if not self.TLS or _timed_scan.get() is None:
+            return super().connect()
+        self._socket_seconds = 0.0
+        started = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            add_scan_time('tls', time.perf_counter() - started - self._socket_seconds)
+
+    def request(self, *args, **kwargs):
+        super().request(*args, **kwargs)
+        self._sent_at = time.perf_counter()
+
+    def getresponse(self, *args, **kwargs):
+        try:
+            return super().getresponse(*args, **kwargs)
+        finally:
+            if _timed_scan.get() is not None:
+                add_scan_time('ttfb', time.perf_counter() - self._sent_at)
+
+def timed_subclass(base: type, mixin: Optional[type] = None, **attributes) -> type:
+    """Subclass a urllib3 class under the base's name and module, so error messages read the same."""
+    namespace = dict(attributes, __module__=base.__module__, __qualname__=base.__qualname__)
+    return type(base.__name__, (mixin, base) if mixin else (base,), namespace)
+
+# Timed urllib3 pool classes by scheme, filled in by load_http_stack()
+TIMED_POOL_CLASSES = {}
+_http_stack_lock = threading.Lock()
+
+def load_http_stack():
+    """Import requests and urllib3 and define the timed transport classes on top of them.
+    
+    Runs when the first session is created, so runs that never send a request
+    through requests do not import it.
+    """
+    global TimedHTTPConnection, TimedHTTPSConnection, TimedHTTPConnectionPool, TimedHTTPSConnectionPool
+    global TimedRetry, PooledHTTPAdapter
+    with _http_stack_lock:
+        if TIMED_POOL_CLASSES:
+            return
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        
+        TimedHTTPConnection = timed_subclass(urllib3.connection.HTTPConnection, TimedConnectionMixin)
+        TimedHTTPSConnection = timed_subclass(urllib3.connection.HTTPSConnection, TimedConnectionMixin, TLS=True)
+        TimedHTTPConnectionPool = timed_subclass(urllib3.HTTPConnectionPool, ConnectionCls=TimedHTTPConnection)
+        TimedHTTPSConnectionPool = timed_subclass(urllib3.HTTPSConnectionPool, ConnectionCls=TimedHTTPSConnection)
+
+        class TimedRetry(Retry):
+            """Retry policy that adds its backoff sleeps to the scan being timed and gives up at the run deadline."""
+
+            # Scanner whose run deadline, read on every attempt, ends the retries
+            owner = None
+
+            @property
+            def deadline(self) -> Optional[float]:
+                return self.owner.deadline if self.owner is not None else None
+
+            def new(self, **kw):
+                retry = super().new(**kw)
+                retry.owner = self.owner
+                return retry
+
+            def is_exhausted(self):
+                return super().is_exhausted() or (self.deadline is not None and time.time() >= self.deadline)
+
+            def get_backoff_time(self):
+                backoff = super().get_backoff_time()
+                if self.deadline is not None:
+                    backoff = min(backoff, max(self.deadline - time.time(), 0))
+                return backoff
+
+            def sleep(self, response=None):
+                started = time.perf_counter()
+                try:
+                    super().sleep(response)
+                finally:
+                    add_scan_time('backoff', time.perf_counter() - started)
+
+        class PooledHTTPAdapter(HTTPAdapter):
+            """HTTPAdapter that keeps connection reuse counters across its pools and times scan phases."""
+
+            def __init__(self, *args, **kwargs):
+                # Counters of pools already evicted from the pool manager
+                self._retired_connections = 0
+                self._retired_requests = 0
+                self._retired_lock = threading.Lock()
+                super().__init__(*args, **kwargs)
+
+            def init_poolmanager(self, *args, **kwargs):
+                super().init_poolmanager(*args, **kwargs)
+                pools = self.poolmanager.pools
+                dispose = pools.dispose_func
+
+                def retire(pool):
+                    with self._retired_lock:
+                        self._retired_connections += pool.num_connections
+                        self._retired_requests += pool.num_requests
+                    # urllib3 2.x does not set a dispose function
+                    if dispose is not None:
+                        dispose(pool)
+
+                pools.dispose_func = retire
+                self.poolmanager.pool_classes_by_scheme = TIMED_POOL_CLASSES
+
+            def proxy_manager_for(self, proxy, **proxy_kwargs):
+                manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+                # SOCKS proxies bring their own connection classes
+                if not proxy.lower().startswith('socks'):
+                    manager.pool_classes_by_scheme = TIMED_POOL_CLASSES
+                return manager
+
+            def connection_stats(self) -> Tuple[int, int]:
+                """Return (connections opened, requests sent) for all pools."""
+                with self._retired_lock:
+                    connections = self._retired_connections
+                    requests_sent = self._retired_requests
+                pools = self.poolmanager.pools
+                for key in pools.keys():
+                    pool = pools.get(key)
+                    if pool is not None:
+                        connections += pool.num_connections
+                        requests_sent += pool.num_requests
+                return connections, requests_sent
+        
+        TIMED_POOL_CLASSES.update(http=TimedHTTPConnectionPool, https=TimedHTTPSConnectionPool)
+
+class CacheEntry:
+    """A cached scan result (a ScanRecord state) together with its HTTP validators."""
+    
+    __slots__ = ('result', 'etag', 'last_modified', 'fresh')
+    
+    def __init__(self, result, etag: Optional[str], last_modified: Optional[str], fresh: bool):
+        self.result = result
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fresh = fresh
+    
+    def conditional_headers(self) -> Dict[str, str]:
+        """Request headers that let the server answer 304 Not Modified."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+class ResultCache:
+    """On-disk SQLite cache of scan results keyed by normalized URL.
+    
+    Entries younger than ttl seconds are served as-is. Older entries are
+    revalidated with If-None-Match/If-Modified-Since and reused on a 304.
+    When the cache holds more than max_entries rows, the least recently
+    used ones are evicted.
+    """
+    
+    # Inserts between eviction passes
+    EVICT_EVERY = 500
+    
+    def __init__(self, path: str, ttl: float = 86400, max_entries: int = 1000000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._open()
+    
+    def _open(self):
+        self._lock = threading.Lock()
+        self._inserts = 0
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS records ('
+                'url TEXT PRIMARY KEY, result TEXT NOT NULL, etag TEXT, last_modified TEXT, '
+                'stored_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS records_accessed ON records (accessed_at)')
+    
+    def __getstate__(self):
+        # Worker processes reopen the database instead of sharing a connection
+        return {'path': self.path, 'ttl': self.ttl, 'max_entries': self.max_entries}
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._open()
+    
+    def get(self, url: str) -> Optional[CacheEntry]:
+        """Look up a URL, marking the entry as recently used."""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                'SELECT result, etag, last_modified, stored_at FROM records WHERE url = ?', (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute('UPDATE records SET accessed_at = ? WHERE url = ?', (now, url))
+        result, etag, last_modified, stored_at = row
+        return CacheEntry(json.loads(result), etag, last_modified, now - stored_at < self.ttl)
+    
+    def store(self, url: str, result: Dict, headers):
+        """Store a fresh scan result state along with the response validators."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?, ?)',
+                (url, json.dumps(result), headers.get('ETag'), headers.get('Last-Modified'), now, now)
+            )
+            self._inserts += 1
+            if self._inserts % self.EVICT_EVERY == 0:
+                self._evict()
+    
+    def refresh(self, url: str, headers):
+        """Restart the TTL of an entry the server confirmed with 304 Not Modified."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                'UPDATE records SET stored_at = ?, etag = COALESCE(?, etag), '
+                'last_modified = COALESCE(?, last_modified) WHERE url = ?',
+                (time.time(), headers.get('ETag'), headers.get('Last-Modified'), url)
+            )
+    
+    def _evict(self):
+        """Drop least recently used entries above max_entries; caller holds the lock."""
+        count, = self._conn.execute('SELECT COUNT(*) FROM records').fetchone()
+        if count > self.max_entries:
+            self._conn.execute(
+                'DELETE FROM records WHERE url IN '
+                '(SELECT url FROM records ORDER BY accessed_at LIMIT ?)',
+                (count - self.max_entries,)
+            )
+    
+    def close(self):
+        """Apply the size cap and close the database."""
+        with self._lock, self._conn:
+            self._evict()
+        self._conn.close()
+
+class BaselineStore:
+    """SQLite index of per-URL result fingerprints from the previous run, for --baseline.
+    
+    Each canonical URL maps to a 64-bit hash of the security headers
+    present and the policy statuses of its last result, with the score,
+    status code and a compact copy of both sets to explain a difference.
+    Header and policy names are kept in an append-only vocabulary, so the
+    header set is stored as a bitmask. Lookups go through the primary key,
+    one B-tree search per result however large the baseline is. Results
+    of the current run are staged and only replace the baseline when
+    close() ends a completed run, so an interrupted run can be resumed
+    against the same baseline.
+    """
+    
+    CHANGES = ('regressed', 'improved', 'changed', 'new', 'unchanged')
+    # Staged rows written per transaction
+    FLUSH_EVERY = 1000
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.counts = dict.fromkeys(self.CHANGES, 0)
+        # (change, url, details) of every regressed, improved or changed result
+        self.changes = []
+        self._staged = []
+        self._conn = sqlite3.connect(path, timeout=30)
+        with self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            for table in ('fingerprints', 'staged'):
+                self._conn.execute(
+                    f'CREATE TABLE IF NOT EXISTS {table} ('
+                    'url TEXT PRIMARY KEY, fingerprint INTEGER NOT NULL, score INTEGER NOT NULL, '
+                    'status_code INTEGER, present TEXT NOT NULL, policies TEXT NOT NULL, '
+                    'scanned_at REAL NOT NULL) WITHOUT ROWID'
+                )
+            self._conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+            # Rows left by an interrupted run are compared again
+            self._conn.execute('DELETE FROM staged')
+            meta = dict(self._conn.execute('SELECT key, value FROM meta'))
+        self.headers = json.loads(meta.get('headers', '[]'))
+        self.policies = json.loads(meta.get('policies', '[]'))
+        self._header_bits = {name: 1 << position for position, name in enumerate(self.headers)}
+    
+    def compare(self, result: ScanRecord) -> str:
+        """Classify a result against the baseline, setting result.change, and stage it for the next run."""
+        rules = result.rules
+        names = {name for name in rules.names if result.present & rules.bits[name]}
+        statuses = {name: details['status'] for name, details in result.security_policies.items()}
+        digest = hashlib.blake2b('\n'.join(
+            ['error' if result.error else 'ok'] + sorted(names) + sorted(f'{k}={v}' for k, v in statuses.items())
+        ).encode('utf-8'), digest_size=8).digest()
+        fingerprint = int.from_bytes(digest, 'big', signed=True)
+        url = canonical_url(result.url)
+        
+        row = self._conn.execute(
+            'SELECT fingerprint, score, status_code, present, policies FROM fingerprints WHERE url = ?', (url,)
+        ).fetchone()
+        if row is None:
+            change = 'new'
+        elif row[0] == fingerprint:
+            change = 'unchanged'
+        elif result.security_score < row[1]:
+            change = 'regressed'
+        elif result.security_score > row[1]:
+            change = 'improved'
+        else:
+            change = 'changed'
+        if change not in ('new', 'unchanged'):
+            self.changes.append((change, result.url, self._explain(result, names, statuses, row)))
+        self.counts[change] += 1
+        result.change = change
+        
+        self._staged.append((url, fingerprint, result.security_score, result.status_code,
+                             self._encode_headers(names), self._encode_policies(statuses), result.scanned_at))
+        if len(self._staged) >= self.FLUSH_EVERY:
+            self._flush()
+        return change
+    
+    def _encode_headers(self, names: Iterable[str]) -> str:
+        """Bitmask over the header vocabulary, in hex."""
+        bits = 0
+        for name in names:
+            bit = self._header_bits.get(name)
+            if bit is None:
+                bit = self._header_bits[name] = 1 << len(self.headers)
+                self.headers.append(name)
+            bits |= bit
+        return format(bits, 'x')
+    
+    def _encode_policies(self, statuses: Dict[str, str]) -> str:
+        """Policy statuses in vocabulary order, '-' for policies not evaluated."""
+        for name in statuses:
+            if name not in self.policies:
+                self.policies.append(name)
+        return ','.join(statuses.get(name, '-') for name in self.policies)
+    
+    def _explain(self, result: ScanRecord, names: set, statuses: Dict[str, str], row: Tuple) -> str:
+        """Describe what differs between a result and its baseline row."""
+        _, score, status_code, present, policies = row
+        bits = int(present, 16)
+        old_names = {name for position, name in enumerate(self.headers) if bits >> position & 1}
+        old_statuses = {name: status for name, status in zip(self.policies, policies.split(',')) if status != '-'}
+        
+        parts = [f"score {score} -> {result.security_score}"] if score != result.security_score else []
+        if result.error:
+            # A failed scan evaluates no policies, so only the error and the lost headers are worth listing
+            statuses = old_statuses
+            if status_code is not None:
+                parts.append(f"scan failed: {result.error}")
+        elif status_code is None:
+            old_statuses = statuses
+            parts.append("reachable again")
+        lost, gained = sorted(old_names - names), sorted(names - old_names)
+        if lost:
+            parts.append(f"lost {', '.join(lost)}")
+        if gained:
+            parts.append(f"gained {', '.join(gained)}")
+        for name in sorted(set(statuses) | set(old_statuses)):
+            if statuses.get(name) != old_statuses.get(name):
+                parts.append(f"{name} {old_statuses.get(name, '-')} -> {statuses.get(name, '-')}")
+        return '; '.join(parts)
+    
+    def _flush(self):
+        with self._conn:
+            self._conn.executemany('INSERT OR REPLACE INTO staged VALUES (?, ?, ?, ?, ?, ?, ?)', self._staged)
+        self._staged = []
+    
+    def close(self):
+        """Make this run's results the baseline of the next run and close the database."""
+        self._flush()
+        with self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO fingerprints SELECT * FROM staged')
+            self._conn.execute('DELETE FROM staged')
+            self._conn.executemany('INSERT OR REPLACE INTO meta VALUES (?, ?)',
+                                   [('headers', json.dumps(self.headers)), ('policies', json.dumps(self.policies))])
+        self._conn.close()
+
+# Security headers checked by default and their impact; --rules replaces this table
+SECURITY_HEADERS = {
+    'Cross-Origin-Resource-Policy': {
+        'description': 'Prevents other sites from loading this resource unless allowed.',
+        'severity': 'MEDIUM',
+        'points': 8,
+        'example': 'Cross-Origin-Resource-Policy: same-origin',
+        'purpose': 'Mitigates data leaks via embedded resources.',
+        'impact': 'Prevents resource access from different origins, reducing attack surface.'
+    },
+    'X-Powered-By': {
+        'description': 'Reveals technology stack, which can aid attackers.',
+        'severity': 'LOW',
+        'points': 4,
+        'example': 'X-Powered-By: Express',
+        'purpose': 'Should be removed to avoid leaking implementation details.',
+        'impact': 'Leaking technology (e.g., PHP/ASP.NET) may guide targeted exploitation.'
+    },
+
+    'Set-Cookie': {
+        'description': 'Must enforce HttpOnly, Secure, and SameSite attributes for cookies.',
+        'severity': 'HIGH',
+        'points': 15,
+        'example': 'Set-Cookie: sessionid=abc123; Secure; HttpOnly; SameSite=Strict',
+        'purpose': 'Ensures session cookies are protected from XSS, interception, and CSRF.',
+        'impact': 'Weak cookie settings may lead to session hijacking or XSS attacks.'
+    },
+    'Cache-Control': {
+        'description': 'Controls caching behavior for sensitive content',
+        'purpose': 'Prevents caching of sensitive data',
+        'example': 'no-cache, no-store, must-revalidate',
+        'severity': 'MEDIUM',
+        'points': 10,
+        'impact': 'Sensitive data exposure through browser cache'
+    },
+    'Strict-Transport-Security': {
+        'description': 'Forces HTTPS connections and prevents protocol downgrade attacks',
+        'purpose': 'Protects against man-in-the-middle attacks by ensuring HTTPS',
+        'example': 'max-age=31536000; includeSubDomains; preload',
+        'severity': 'CRITICAL',
+        'points': 25,
+        'impact': 'High risk of MITM attacks and protocol downgrade'
+    },
+    'Content-Security-Policy': {
+        'description': 'Prevents XSS attacks by controlling resource loading',
+        'purpose': 'Defines approved sources of content to prevent XSS',
+        'example': "default-src 'self'; script-src 'self' 'unsafe-inline'",
+        'severity': 'CRITICAL',
+        'points': 25,
+        'impact': 'High risk of XSS and code injection attacks'
+    },
+    'X-Frame-Options': {
+        'description': 'Prevents clickjacking attacks by controlling iframe embedding',
+        'purpose': 'Protects against clickjacking attacks',
+        'example': 'DENY or SAMEORIGIN',
+        'severity': 'HIGH',
+        'points': 15,
+        'impact': 'Vulnerable to clickjacking and UI redressing attacks'
+    },
+    'X-Content-Type-Options': {
+        'description': 'Prevents MIME type sniffing attacks',
+        'purpose': 'Stops browsers from MIME type sniffing',
+        'example': 'nosniff',
+        'severity': 'HIGH',
+        'points': 15,
+        'impact': 'Risk of MIME confusion attacks and content sniffing'
+    },
+    'Referrer-Policy': {
+        'description': 'Controls referrer information leakage',
+        'purpose': 'Protects user privacy by controlling referrer data',
+        'example': 'strict-origin-when-cross-origin',
+        'severity': 'MEDIUM',
+        'points': 10,
+        'impact': 'Information disclosure through referrer headers'
+    },
+    'Permissions-Policy': {
+        'description': 'Controls browser features and APIs access',
+        'purpose': 'Restricts access to sensitive browser features',
+        'example': 'geolocation=(), microphone=(), camera=()',
+        'severity': 'MEDIUM',
+        'points': 10,
+        'impact': 'Unauthorized access to browser features and APIs'
+    },
+    'X-XSS-Protection': {
+        'description': 'Enables XSS filtering in legacy browsers',
+        'purpose': 'Provides basic XSS protection for older browsers',
+        'example': '1; mode=block',
+        'severity': 'LOW',
+        'points': 5,
+        'impact': 'Limited XSS protection in legacy browsers'
+    }
+}
+
+# Security policies reported alongside the header rules
+SECURITY_POLICIES = {
+    'HTTPS_Enforcement': 'Checks if site enforces HTTPS',
+    'Server_Info_Disclosure': 'Detects server information disclosure',
+    'Cookie_Security': 'Analyzes cookie security attributes',
+    'Mixed_Content': 'Checks for mixed content issues',
+    'Deprecated_Protocols': 'Identifies deprecated protocol usage'
+}
+
+class RuleSet:
+    """Security header rules compiled for single-pass evaluation.
+    
+    Rule i owns bit 1 << i of a result's present-header mask, and every
+    rule's missing-header entry and recommendation are built once and
+    shared by all results. Evaluating a response walks its headers once by
+    lowercase name, keeps the ones a rule or policy reads, and answers
+    every check from that map.
+    """
+    
+    REQUIRED_FIELDS = ('description', 'severity', 'points', 'example', 'impact')
+    SEVERITIES = ('CRITICAL', 'HIGH', 'MEDIUM', 'LOW', 'INFO')
+    COOKIE_FLAG_PENALTY = 10
+    
+    # Bits of ScanRecord.cookie
+    COOKIE_SET = 1
+    COOKIE_SECURED = 2  # 'Secure' and 'HttpOnly' both appear, as Cookie_Security checks
+    COOKIE_FLAGS = ((4, 'Secure', 'secure'), (8, 'HttpOnly', 'httponly'), (16, 'SameSite', 'samesite'))
+    COOKIE_FLAGS_MISSING = 4 | 8 | 16
+    
+    # Rule sets by fingerprint, so unpickled results share one instance
+    _shared = {}
+    
+    def __init__(self, headers: Dict[str, Dict]):
+        for name, info in headers.items():
+            missing = [field for field in self.REQUIRED_FIELDS if field not in info]
+            if missing:
+                raise ValueError(f"Rule '{name}' is missing {', '.join(missing)}")
+            if info['severity'] not in self.SEVERITIES:
+                raise ValueError(f"Rule '{name}' has unknown severity {info['severity']!r}")
+            if not isinstance(info['points'], int):
+                raise ValueError(f"Rule '{name}' points must be an integer")
+        self.headers = headers
+        self.names = tuple(headers)
+        self.bits = {name: 1 << i for i, name in enumerate(self.names)}
+        self.fingerprint = hashlib.sha1(json.dumps(headers, sort_keys=True).encode()).hexdigest()[:12]
+        # (bit, lowercase name, points) per rule, in table order
+        self._lookup = tuple((1 << i, name.lower(), info['points'])
+                             for i, (name, info) in enumerate(headers.items()))
+        self._missing = tuple(
+            {'name': name, 'description': info['description'], 'severity': info['severity'],
+             'example': info['example'], 'points': info['points'], 'impact': info['impact']}
+            for name, info in headers.items()
+        )
+        self._recommendations = tuple(f"[!] Implement {name}: {info['description']}"
+                                      for name, info in headers.items())
+        self._watched = frozenset(key for _, key, _ in self._lookup) | {'server', 'set-cookie'}
+        self._shared.setdefault(self.fingerprint, self)
+    
+    def __reduce__(self):
+        return RuleSet.shared, (self.headers,)
+    
+    @classmethod
+    def shared(cls, headers: Dict[str, Dict]) -> 'RuleSet':
+        """Get the instance for a rule table, building it on first use."""
+        fingerprint = hashlib.sha1(json.dumps(headers, sort_keys=True).encode()).hexdigest()[:12]
+        return cls._shared.get(fingerprint) or cls(headers)
+    
+    @classmethod
+    def from_file(cls, filename: str) -> 'RuleSet':
+        """Load rules from a JSON object mapping header names to rule fields."""
+        with open(filename, encoding='utf-8') as f:
+            headers = json.load(f)
+        if not isinstance(headers, dict) or not all(isinstance(v, dict) for v in headers.values()):
+            raise ValueError("expected a JSON object mapping header names to rule objects")
+        return cls(headers)
+    
+    def normalize(self, headers) -> Dict[str, str]:
+        """Map the lowercased names of the headers any rule reads to their values."""
+        watched = self._watched
+        if hasattr(headers, 'lower_items'):
+            # Already keyed by lowercase name; items() would look every key up again
+            items = headers.lower_items()
+        else:
+            items = ((name.lower(), value) for name, value in headers.items())
+        return {key: value for key, value in items if key in watched}
+    
+    def cookie_state(self, set_cookie: Optional[str]) -> int:
+        """Encode the cookie checks of a Set-Cookie value as COOKIE_* bits."""
+        if not set_cookie:
+            return 0
+        state = self.COOKIE_SET
+        if 'Secure' in set_cookie and 'HttpOnly' in set_cookie:
+            state |= self.COOKIE_SECURED
+        lowered = set_cookie.lower()
+        for bit, _, flag in self.COOKIE_FLAGS:
+            if flag not in lowered:
+                state |= bit
+        return state
+    
+    def policies(self, url: str, server: Optional[str], cookie: int, cookie_flags: bool = True) -> Dict:
+        """Expand policy results from the encoded server and cookie state."""
+        policies = {}
+        
+        if url.startswith('https://'):
+            policies['HTTPS_Enforcement'] = {'status': 'PASS', 'details': 'Site uses HTTPS'}
+        else:
+            policies['HTTPS_Enforcement'] = {'status': 'FAIL', 'details': 'Site not using HTTPS'}
+        
+        if server:
+            policies['Server_Info_Disclosure'] = {
+                'status': 'WARN',
+                'details': f'Server header disclosed: {server}'
+            }
+        else:
+            policies['Server_Info_Disclosure'] = {'status': 'PASS', 'details': 'Server header not disclosed'}
+        
+        if not cookie & self.COOKIE_SET:
+            policies['Cookie_Security'] = {'status': 'INFO', 'details': 'No cookies set'}
+            return policies
+        if cookie & self.COOKIE_SECURED:
+            policies['Cookie_Security'] = {'status': 'PASS', 'details': 'Cookies have security attributes'}
+        else:
+            policies['Cookie_Security'] = {'status': 'FAIL', 'details': 'Cookies missing security attributes'}
+        
+        if cookie_flags:
+            missing_flags = [flag for bit, flag, _ in self.COOKIE_FLAGS if cookie & bit]
+            if missing_flags:
+                policies['Set-Cookie'] = {
+                    'status': 'FAIL',
+                    'details': f"Missing attributes: {', '.join(missing_flags)}"
+                }
+            else:
+                policies['Set-Cookie'] = {'status': 'PASS', 'details': "All recommended attributes set"}
+        return policies
+    
+    def check_policies(self, url: str, headers: Dict[str, str]) -> Dict:
+        """Check additional security policies against a normalized header map."""
+        return self.policies(url, headers.get('server'), self.cookie_state(headers.get('set-cookie')),
+                             cookie_flags=False)
+    
+    def evaluate(self, record: 'ScanRecord', headers) -> None:
+        """Score a response's headers into record in one pass."""
+        normalized = self.normalize(headers)
+        cookie = self.cookie_state(normalized.get('set-cookie'))
+        score = -self.COOKIE_FLAG_PENALTY if cookie & self.COOKIE_FLAGS_MISSING else 0
+        present = 0
+        values = []
+        for bit, key, points in self._lookup:
+            value = normalized.get(key)
+            if value is not None:
+                present |= bit
+                values.append(value)
+                score += points
+        record.present = present
+        record.values = tuple(values)
+        record.server = normalized.get('server') or None
+        record.cookie = cookie
+        record.security_score = score
+    
+    def present_headers(self, present: int, values: Tuple[str, ...]) -> List[Dict]:
+        """Expand a present-header mask and its values into header entries."""
+        entries = []
+        values = iter(values)
+        for i, (bit, _, points) in enumerate(self._lookup):
+            if present & bit:
+                name = self.names[i]
+                entries.append({'name': name, 'value': next(values),
+                                'severity': self.headers[name]['severity'], 'points': points})
+        return entries
+    
+    def missing_headers(self, present: int) -> List[Dict]:
+        """Shared entries of the rules missing from a mask; callers must not modify them."""
+        return [entry for (bit, _, _), entry in zip(self._lookup, self._missing) if not present & bit]
+    
+    def recommendations(self, present: int) -> List[str]:
+        """Recommendations for the rules missing from a mask."""
+        return [text for (bit, _, _), text in zip(self._lookup, self._recommendations) if not present & bit]
+
+DEFAULT_RULES = RuleSet(SECURITY_HEADERS)
+
+def print_rules_reference(rules: RuleSet):
+    """Print detailed security headers reference."""
+    print_banner()
+    print_section_header("SECURITY HEADERS REFERENCE")
+    
+    for header_name, info in rules.headers.items():
+        color = severity_color(info['severity'])
+        
+        print(f"\n{Colors.BOLD}{Colors.WHITE}[+] {header_name}{Colors.RESET}")
+        print(f"{Colors.WHITE}[*] Severity: {color}{info['severity']}{Colors.RESET} {Colors.DIM}({info['points']} points){Colors.RESET}")
+        print(f"{Colors.WHITE}[*] Purpose: {info['purpose']}{Colors.RESET}")
+        print(f"{Colors.WHITE}[*] Impact: {info['impact']}{Colors.RESET}")
+        print(f"{Colors.WHITE}[*] Example: {Colors.CYAN}{info['example']}{Colors.RESET}")
+
+# Phases the time of a scan is broken down into, each summed over retries and
+# redirects: waiting in the host scheduler, name resolution, TCP connect, TLS
+# handshake, time to first response byte, body download and retry backoff
+PHASES = ('queue', 'dns', 'connect', 'tls', 'ttfb', 'transfer', 'backoff')
+PHASE_INDEX = {phase: i for i, phase in enumerate(PHASES)}
+
+# Record of the scan running in the current thread or asyncio task
+_timed_scan = contextvars.ContextVar('timed_scan', default=None)
+
+def add_scan_time(phase: str, seconds: float):
+    """Add seconds to a phase of the scan being timed in this context, if any."""
+    record = _timed_scan.get()
+    if record is not None:
+        record.add_time(phase, seconds)
+
+class ScanRecord:
+    """Compact result of scanning one URL.
+    
+    Present headers are a bitmask into the shared rule set plus their
+    values, and policies are kept as the encoded server and cookie state.
+    Missing headers, recommendations and policy details are expanded from
+    the rule table only when a result is printed or exported. Raw response
+    headers are kept only when capture is requested. Scans that made a
+    request carry the number of request attempts and an array of seconds
+    per PHASES entry; results served from the cache have no timings.
+    Redirects followed on the way to the analyzed response are kept as
+    (url, status code, headers) hops. Results extrapolated by origin
+    sampling name the sampled URL they were copied from. With --baseline,
+    change says how the result compares to the previous run.
+    """
+    
+    __slots__ = ('url', 'scanned_at', 'elapsed', 'status_code', 'security_score', 'error',
+                 'present', 'values', 'server', 'cookie', 'headers', 'rules', 'attempts', 'timings',
+                 'redirects', 'extrapolated_from', 'change')
+    
+    def __init__(self, url: str, rules: RuleSet = DEFAULT_RULES, scanned_at: Optional[float] = None):
+        self.url = url
+        self.scanned_at = time.time() if scanned_at is None else scanned_at
+        self.elapsed = 0.0
+        self.status_code = None
+        self.security_score = 0
+        self.error = None
+        self.present = 0
+        self.values = ()
+        self.server = None
+        self.cookie = 0
+        self.headers = None
+        self.rules = rules
+        self.attempts = 0
+        self.timings = None
+        self.redirects = ()
+        self.extrapolated_from = None
+        self.change = None
+    
+    def duplicate(self, url: str) -> 'ScanRecord':
+        """Copy of this result for another input line naming the same URL; it made no requests."""
+        record = ScanRecord.__new__(ScanRecord)
+        for name in self.__slots__:
+            setattr(record, name, getattr(self, name))
+        record.url = url
+        record.attempts, record.timings = 0, None
+        return record
+    
+    def start_timing(self):
+        """Start an all-zero phase breakdown for a scan about to make requests."""
+        self.timings = array('d', bytes(8 * len(PHASES)))
+    
+    def add_time(self, phase: str, seconds: float):
+        """Add seconds to a phase, if this record is being timed."""
+        if self.timings is not None:
+            self.timings[PHASE_INDEX[phase]] += seconds
+    
+    @property
+    def phase_timings(self) -> Dict[str, float]:
+        return dict(zip(PHASES, self.timings)) if self.timings is not None else {}
+    
+    @property
+    def timestamp(self) -> str:
+        return datetime.fromtimestamp(self.scanned_at).isoformat()
+    
+    @property
+    def present_headers(self) -> List[Dict]:
+        return self.rules.present_headers(self.present, self.values)
+    
+    @property
+    def missing_headers(self) -> List[Dict]:
+        return self.rules.missing_headers(self.present) if self.status_code is not None else []
+    
+    @property
+    def recommendations(self) -> List[str]:
+        return self.rules.recommendations(self.present) if self.status_code is not None else []
+    
+    @property
+    def security_policies(self) -> Dict:
+        if self.status_code is None:
+            return {}
+        return self.rules.policies(self.url, self.server, self.cookie)
+    
+    def to_dict(self) -> Dict:
+        """Expand into the full result dict, rule metadata included."""
+        return {
+            'url': self.url,
+            'timestamp': self.timestamp,
+            'status_code': self.status_code,
+            'headers': dict(self.headers) if self.headers else {},
+            'missing_headers': [dict(entry) for entry in self.missing_headers],
+            'present_headers': self.present_headers,
+            'security_score': self.security_score,
+            'security_policies': self.security_policies,
+            'recommendations': self.recommendations,
+            'error': self.error,
+            'elapsed': self.elapsed,
+            'attempts': self.attempts,
+            'timings': self.phase_timings,
+            'redirects': [{'url': url, 'status_code': status, 'headers': headers}
+                          for url, status, headers in self.redirects],
+            'extrapolated_from': self.extrapolated_from,
+            'change': self.change
+        }
+    
+    def to_state(self) -> Dict:
+        """Compact JSON-serializable form, read back by from_state()."""
+        names = self.rules.names
+        state = {
+            'url': self.url,
+            'scanned_at': self.scanned_at,
+            'elapsed': self.elapsed,
+            'status_code': self.status_code,
+            'security_score': self.security_score,
+            'error': self.error,
+            'present': dict(zip((name for i, name in enumerate(names) if self.present >> i & 1), self.values)),
+            'server': self.server,
+            'cookie': self.cookie
+        }
+        if self.headers is not None:
+            state['headers'] = self.headers
+        if self.redirects:
+            state['redirects'] = [list(hop) for hop in self.redirects]
+        if self.extrapolated_from:
+            state['extrapolated_from'] = self.extrapolated_from
+        if self.timings is not None:
+            state['attempts'] = self.attempts
+            state['timings'] = self.timings.tolist()
+        return state
+    
+    @classmethod
+    def from_state(cls, state: Dict, rules: RuleSet = DEFAULT_RULES) -> 'ScanRecord':
+        """Rebuild a record saved with to_state(); headers the rules do not know are dropped."""
+        record = cls(state['url'], rules, state['scanned_at'])
+        record.elapsed = state.get('elapsed', 0.0)
+        record.status_code = state['status_code']
+        record.security_score = state['security_score']
+        record.error = state['error']
+        present = [(rules.bits[name], value) for name, value in state['present'].items() if name in rules.bits]
+        present.sort()
+        for bit, _ in present:
+            record.present |= bit
+        record.values = tuple(value for _, value in present)
+        record.server = state['server']
+        record.cookie = state['cookie']
+        record.headers = state.get('headers')
+        record.redirects = tuple(tuple(hop) for hop in state.get('redirects', ()))
+        record.extrapolated_from = state.get('extrapolated_from')
+        if state.get('timings') is not None:
+            record.attempts = state['attempts']
+            record.timings = array('d', state['timings'])
+        return record
+
+# Second-level labels under which country-code domains are registered
+SECOND_LEVEL_LABELS = {'co', 'com', 'net', 'org', 'gov', 'edu', 'ac'}
+
+def registered_domain(host: str) -> str:
+    """Approximate the registered domain of a hostname; IP addresses are returned as-is."""
+    if ':' in host or host.replace('.', '').isdigit():
+        return host
+    labels = host.split('.')
+    if len(labels) > 2 and len(labels[-1]) == 2 and labels[-2] in SECOND_LEVEL_LABELS:
+        return '.'.join(labels[-3:])
+    return '.'.join(labels[-2:])
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+def url_hostname(url: str) -> Optional[str]:
+    """Host name of a URL, or None if it has none or cannot be parsed."""
+    try:
+        return urlparse(url).hostname
+    except ValueError:
+        return None
+
+def canonical_url(url: str) -> str:
+    """Canonical form of a URL, used to deduplicate scans and key the result cache.
+    
+    Adds https:// when no scheme is given, lowercases the scheme and host,
+    IDNA-encodes internationalized host names, drops default ports and the
+    fragment, and gives an empty path the root '/'. Paths and queries are kept
+    as they are, since servers may treat them case- or slash-sensitively.
+    A URL that cannot be parsed is returned as it is, for its scan to report.
+    """
+    url = url.strip()
+    if not url.lower().startswith(('http://', 'https://')):
+        url = 'https://' + url
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+    path = parts.path or '/'
+    try:
+        host, port = parts.hostname, parts.port
+    except ValueError:
+        host = None
+    if not host:
+        return urlunsplit((parts.scheme, parts.netloc, path, parts.query, ''))
+    
+    if not host.isascii():
+        try:
+            host = host.encode('idna').decode('ascii')
+        except UnicodeError:
+            pass
+    if ':' in host:
+        host = f'[{host}]'
+    userinfo, at, _ = parts.netloc.rpartition('@')
+    netloc = userinfo + at + host
+    if port is not None and port != DEFAULT_PORTS[parts.scheme]:
+        netloc += f':{port}'
+    return urlunsplit((parts.scheme, netloc, path, parts.query, ''))
+
+class DedupIndex:
+    """Index of canonical URLs that lets a batch scan each distinct URL once.
+    
+    unique() passes on the first input line naming a canonical URL and holds
+    back later lines naming it. When that scan completes, fan_out() returns its result for the first line and
+    a copy for every held-back one. Lines naming a URL among the last
+    max_results completed are answered from it through ready(). Only scans
+    in flight and recent results are kept, so memory stays bounded for any
+    input size; a URL that reappears much later is scanned again.
+    Thread-safe, since the async engine reads input on its loop thread.
+    """
+    
+    def __init__(self, normalize, max_results: int = 10000):
+        self.normalize = normalize
+        self.max_results = max_results
+        self._lock = threading.Lock()
+        self._pending = {}    # index of a line being scanned -> canonical URL
+        self._lines = {}      # canonical URL -> [(index, url)] of the lines waiting on its scan
+        self._results = {}    # canonical URL -> recent result, least recently used first
+        self._ready = []      # (index, result) of lines answered from a recent result
+    
+    def unique(self, source: Iterator[Tuple[int, str]]) -> Iterator[Tuple[int, str]]:
+        """Pass on the (index, url) lines that need a scan."""
+        for index, url in source:
+            canonical = canonical_url(url)
+            with self._lock:
+                lines = self._lines.get(canonical)
+                if lines is not None:
+                    lines.append((index, url))
+                    continue
+                result = self._results.pop(canonical, None)
+                if result is not None:
+                    self._results[canonical] = result
+                    self._ready.append((index, result.duplicate(self.normalize(url))))
+                    continue
+                self._lines[canonical] = [(index, url)]
+                self._pending[index] = canonical
+            yield index, url
+    
+    def fan_out(self, index: int, result: ScanRecord) -> List[Tuple[int, ScanRecord]]:
+        """(index, result) for the scanned line and every line held back on it."""
+        with self._lock:
+            canonical = self._pending.pop(index)
+            lines = self._lines.pop(canonical)
+            self._results[canonical] = result
+            if len(self._results) > self.max_results:
+                del self._results[next(iter(self._results))]
+        return [(index, result)] + [(line, result.duplicate(self.normalize(url))) for line, url in lines[1:]]
+    
+    def ready(self) -> List[Tuple[int, ScanRecord]]:
+        """Take the lines answered from recent results since the last call."""
+        with self._lock:
+            ready, self._ready = self._ready, []
+        return ready
+    
+    def abandoned(self) -> int:
+        """Forget the lines held back on scans that never completed, returning how many there were."""
+        with self._lock:
+            held = sum(len(lines) - 1 for lines in self._lines.values())
+            self._lines.clear()
+            self._pending.clear()
+        return held
+
+class RedirectDestinations:
+    """Run-wide cache of analyzed responses keyed by the URLs that lead to them.
+    
+    Every URL of a completed redirect chain, and its final URL, maps to the
+    hops left from there and the analyzed result. A later chain whose
+    redirect reaches any of them reuses that analysis instead of fetching
+    the destination again. Least recently used entries beyond max_entries
+    are dropped. Thread-safe.
+    """
+    
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = {}    # canonical URL -> (hops from there, result), least recently used first
+    
+    def get(self, url: str) -> Optional[Tuple[Tuple, ScanRecord]]:
+        """(hops from url, result) of a destination already analyzed, if any."""
+        key = canonical_url(url)
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._entries[key] = entry
+        return entry
+    
+    def store(self, result: ScanRecord, final_url: str):
+        """Remember an analyzed result under its final URL and every hop that led there."""
+        hops = result.redirects
+        entries = [(canonical_url(url), (hops[position:], result)) for position, (url, _, _) in enumerate(hops)]
+        entries.append((canonical_url(final_url), ((), result)))
+        with self._lock:
+            for key, entry in entries:
+                self._entries.pop(key, None)
+                self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                del self._entries[next(iter(self._entries))]
+
+class HostScheduler:
+    """Per-host politeness scheduler for batch scans.
+    
+    URLs are buffered per host (or registered domain) and handed out
+    round-robin across hosts. Each host has a token bucket refilled at rate
+    requests per second, burst tokens deep, and at most max_concurrency scans
+    in flight. A host that appears thousands of times is throttled while
+    other hosts keep the workers busy. Not thread-safe: it is driven by the
+    single dispatcher of a scan engine.
+    """
+    
+    def __init__(self, rate: Optional[float] = None, max_concurrency: int = 4, burst: int = 1,
+                 key: str = 'host', lookahead: int = 10000):
+        if key not in ('host', 'domain'):
+            raise ValueError(f"Unknown rate limit key: {key}")
+        self.interval = 1 / rate if rate else 0
+        self.max_concurrency = max(1, max_concurrency)
+        self.burst = max(1, burst)
+        self.key = key
+        self.lookahead = lookahead
+        self.reset()
+    
+    def reset(self):
+        """Forget every buffered URL, scan in flight, pause and rate limit state."""
+        self.buffered = 0
+        self._queues = {}          # key -> deque of (index, url, time added) waiting to be scanned
+        self._state = {}           # key -> [theoretical arrival time, scans in flight]
+        self._ready = deque()      # keys that may be able to run now
+        self._waiting = []         # heap of (time, key) for keys out of tokens
+        self._saturated = set()    # keys at max_concurrency
+        self._idle = []            # heap of (time, key) whose state can be dropped after time
+        self._paused = {}          # key -> number of pause() calls not yet resumed
+    
+    def host_key(self, url: str) -> str:
+        """Key a URL is rate limited under."""
+        host = url_hostname(url if '://' in url else '//' + url) or url
+        return host if self.key == 'host' else registered_domain(host)
+    
+    def add(self, index: int, url: str):
+        """Buffer a URL for scheduling."""
+        key = self.host_key(url)
+        pending = self._queues.get(key)
+        if pending is None:
+            pending = self._queues[key] = deque()
+            self._ready.append(key)
+        pending.append((index, url, time.monotonic()))
+        self.buffered += 1
+    
+    def next_ready(self, now: float) -> Optional[Tuple[int, str, str, float]]:
+        """Take the next (index, url, key, time added) allowed to start now, if any."""
+        while self._waiting and self._waiting[0][0] <= now:
+            self._ready.append(heapq.heappop(self._waiting)[1])
+        while self._idle and self._idle[0][0] <= now:
+            _, key = heapq.heappop(self._idle)
+            state = self._state.get(key)
+            if state and state[1] == 0 and key not in self._queues and state[0] <= now:
+                del self._state[key]
+        
+        while self._ready:
+            key = self._ready.popleft()
+            pending = self._queues.get(key)
+            if pending is None or key in self._paused:
+                continue  # its URLs were dropped, or resume() makes it ready again
+            state = self._state.setdefault(key, [now, 0])
+            if state[1] >= self.max_concurrency:
+                self._saturated.add(key)
+                continue
+            allowed_at = state[0] - (self.burst - 1) * self.interval
+            if allowed_at > now:
+                heapq.heappush(self._waiting, (allowed_at, key))
+                continue
+            
+            index, url, queued_at = pending.popleft()
+            self.buffered -= 1
+            state[0] = max(state[0], now) + self.interval
+            state[1] += 1
+            if pending:
+                self._ready.append(key)
+            else:
+                del self._queues[key]
+            return index, url, key, queued_at
+        return None
+    
+    def release(self, key: str, refund: bool = False):
+        """Mark a scan for key as finished; refund returns the token of one that sent no request."""
+        state = self._state[key]
+        state[1] -= 1
+        if refund:
+            state[0] -= self.interval
+        if key in self._saturated:
+            self._saturated.discard(key)
+            self._ready.append(key)
+        elif state[1] == 0 and key not in self._queues:
+            heapq.heappush(self._idle, (state[0], key))
+    
+    def next_wakeup(self) -> Optional[float]:
+        """Earliest time a rate-limited host gets a token, if any is waiting."""
+        return self._waiting[0][0] if self._waiting else None
+    
+    def pause(self, key: str):
+        """Hold back the buffered URLs of key until a matching resume()."""
+        self._paused[key] = self._paused.get(key, 0) + 1
+    
+    def resume(self, key: str):
+        """Undo one pause() of key."""
+        if self._paused.get(key, 0) > 1:
+            self._paused[key] -= 1
+            return
+        self._paused.pop(key, None)
+        if key in self._queues:
+            self._ready.append(key)
+    
+    def drop(self, key: str) -> List[Tuple[int, str]]:
+        """Remove the URLs buffered for key, returning their (index, url)."""
+        pending = self._queues.pop(key, None)
+        if not pending:
+            return []
+        self.buffered -= len(pending)
+        state = self._state.get(key)
+        if state and state[1] == 0:
+            heapq.heappush(self._idle, (state[0], key))
+        return [(index, url) for index, url, _ in pending]
+    
+    def drain(self) -> int:
+        """Remove every buffered URL, returning how many there were."""
+        drained = self.buffered
+        self._queues.clear()
+        self._ready.clear()
+        self._waiting.clear()
+        self._saturated.clear()
+        self._paused.clear()
+        self.buffered = 0
+        return drained
+
+class HostCircuitBreaker:
+    """Per-host circuit breaker for batch scans.
+    
+    After threshold consecutive failed scans of a host (or registered
+    domain) its circuit opens and the host's remaining URLs are reported as
+    skipped instead of each paying the timeout and every retry again. Once
+    cooldown seconds have passed one probe scan is let through: success
+    closes the circuit, failure opens it again. Not thread-safe: it is
+    driven by the single dispatcher of a scan engine.
+    """
+    
+    def __init__(self, threshold: int = 5, cooldown: float = 60):
+        self.threshold = max(1, threshold)
+        self.cooldown = cooldown
+        self._failures = {}     # key -> consecutive failed scans
+        self._open = {}         # key -> time after which a probe is let through
+        self._probing = set()   # keys with a probe scan in flight
+    
+    @property
+    def tripped(self) -> bool:
+        """Whether any circuit is open or half-open."""
+        return bool(self._open)
+    
+    def is_open(self, key: str, now: float) -> bool:
+        """Whether scans of key are short-circuited, without starting a probe."""
+        if key in self._probing:
+            return True
+        retry_at = self._open.get(key)
+        return retry_at is not None and now < retry_at
+    
+    def allow(self, key: str, now: float) -> bool:
+        """Whether a scan of key may start now; after the cooldown the first one becomes the probe."""
+        if key not in self._open:
+            return True
+        if self.is_open(key, now):
+            return False
+        self._probing.add(key)
+        return True
+    
+    def record(self, key: str, failed: bool, now: float) -> bool:
+        """Record a finished scan of key, returning True if it opened the circuit."""
+        if not failed:
+            self._failures.pop(key, None)
+            self._open.pop(key, None)
+            self._probing.discard(key)
+            return False
+        failures = self._failures[key] = self._failures.get(key, 0) + 1
+        probe_failed = key in self._probing
+        if failures < self.threshold or (key in self._open and not probe_failed):
+            return False
+        self._probing.discard(key)
+        self._open[key] = now + self.cooldown
+        return True
+    
+    def drop_probes(self):
+        """Forget the probes in flight, whose results will never be recorded."""
+        self._probing.clear()
+
+class OriginSampler:
+    """Scans a few sample URLs per origin and extrapolates them to the rest.
+    
+    The first size URLs dispatched for an origin (scheme, host and port) are
+    scanned as samples. While they are in flight the origin's scheduler key
+    is paused, so its other URLs wait in the scheduler's bounded buffer. If
+    every sample succeeds with the same profile (status code, headers
+    present, cookie flags, policy statuses and score), the origin's
+    remaining URLs are answered with a copy of the first sample marked as
+    extrapolated; otherwise the origin is escalated to a full scan. At most
+    MAX_ORIGINS decisions are kept; an origin forgotten and seen again is
+    sampled again. Not thread-safe: it is driven by the single dispatcher of
+    a scan engine.
+    """
+    
+    SAMPLING, UNIFORM, FULL = 'sampling', 'uniform', 'full'
+    MAX_ORIGINS = 100000
+    
+    def __init__(self, size: int, scheduler: HostScheduler, stats: ScanStats, normalize):
+        self.size = max(1, size)
+        self.scheduler = scheduler
+        self.stats = stats
+        self.normalize = normalize
+        self.reset()
+    
+    def reset(self):
+        """Forget every origin's samples and decision."""
+        # origin -> [state, samples dispatched, completed sample results, scheduler key]
+        self._origins = {}
+        self._samples = {}    # input index of a sample in flight -> origin
+    
+    @staticmethod
+    def origin(url: str) -> str:
+        """scheme://host:port of a URL."""
+        try:
+            parts = urlsplit(url if '://' in url else 'https://' + url)
+        except ValueError:
+            return url  # its own origin; the scan reports the error
+        try:
+            port = parts.port
+        except ValueError:
+            port = None
+        scheme = parts.scheme if parts.scheme in DEFAULT_PORTS else 'https'
+        return f"{scheme}://{parts.hostname or ''}:{port or DEFAULT_PORTS[scheme]}"
+    
+    @staticmethod
+    def profile(result: ScanRecord) -> Tuple:
+        """What a scan concluded about a response, leaving out header values such as nonces."""
+        statuses = sorted((name, details['status']) for name, details in result.security_policies.items())
+        return (result.status_code, result.present, result.cookie, result.security_score, statuses)
+    
+    def extrapolate(self, url: str) -> Optional[ScanRecord]:
+        """Result copied from the samples of the URL's origin, if they agreed."""
+        entry = self._origins.get(self.origin(url))
+        if entry is None or entry[0] != self.UNIFORM:
+            return None
+        sample = entry[2][0]
+        result = sample.duplicate(self.normalize(url))
+        result.extrapolated_from = sample.url
+        self.stats.incr('extrapolated')
+        return result
+    
+    def route(self, index: int, url: str, key: str) -> Optional[ScanRecord]:
+        """Extrapolated result for a URL being dispatched, or None if it is to be scanned."""
+        origin = self.origin(url)
+        entry = self._origins.get(origin)
+        if entry is None:
+            entry = self._track(origin)
+        if entry[0] == self.UNIFORM:
+            return self.extrapolate(url)
+        if entry[0] == self.SAMPLING and entry[1] < self.size:
+            entry[1] += 1
+            self._samples[index] = origin
+            self.stats.incr('sample_scans')
+            if entry[1] == self.size:
+                entry[3] = key
+                self.scheduler.pause(key)
+        return None
+    
+    def record(self, index: int, result: ScanRecord):
+        """Take the result of a finished scan, deciding its origin once all samples are in."""
+        origin = self._samples.pop(index, None)
+        if origin is None:
+            return
+        entry = self._origins[origin]
+        samples = entry[2]
+        samples.append(result)
+        if len(samples) < self.size:
+            return
+        
+        first = samples[0]
+        profile = self.profile(first)
+        if all(sample.error is None and self.profile(sample) == profile for sample in samples):
+            entry[0], entry[2] = self.UNIFORM, [first]
+        else:
+            entry[0], entry[2] = self.FULL, None
+            self.stats.incr('origins_escalated')
+        self.scheduler.resume(entry[3])
+    
+    def _track(self, origin: str) -> List:
+        """Start sampling an origin, forgetting the oldest one without samples in flight if full."""
+        if len(self._origins) >= self.MAX_ORIGINS:
+            for old, entry in self._origins.items():
+                if entry[0] != self.SAMPLING or entry[1] == len(entry[2]):
+                    del self._origins[old]
+                    break
+        entry = self._origins[origin] = [self.SAMPLING, 0, [], None]
+        self.stats.incr('origins_sampled')
+        return entry
+
+class ConcurrencyController:
+    """AIMD controller for the number of scans kept in flight.
+    
+    Every completed scan reports its latency. Once a window of samples is
+    collected the limit grows by one, unless the window saw 429 responses,
+    too many timeouts, or a p95 latency well above the best seen so far,
+    in which case it is halved. Timeout and 429 counts are read from the
+    scanner's request attempt statistics, so retried attempts count too.
+    Not thread-safe: it is driven by the single dispatcher of a scan engine.
+    """
+    
+    MIN_SAMPLES = 10
+    TIMEOUT_TOLERANCE = 0.02
+    THROTTLE_TOLERANCE = 0.0
+    LATENCY_TOLERANCE = 2.0
+    # Lets the latency baseline follow a target that gets slower over time
+    BASELINE_DRIFT = 1.1
+    
+    def __init__(self, stats: ScanStats, initial: int = 4, minimum: int = 1, maximum: int = 64,
+                 log=None):
+        self.stats = stats
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = min(max(initial, self.minimum), self.maximum)
+        self.log = log
+        self.lowest = self.highest = self.limit
+        self.increases = self.decreases = 0
+        self._samples = []
+        self._baseline = None
+        self._counters = stats.snapshot()
+        self._settling = 0
+    
+    def record(self, latency: float):
+        """Record the latency of a completed scan, adjusting the limit after each window."""
+        if self._settling:
+            # Scans started under the old limit say nothing about the new one
+            self._settling -= 1
+            if not self._settling:
+                self._counters = self.stats.snapshot()
+            return
+        self._samples.append(latency)
+        if len(self._samples) >= max(self.MIN_SAMPLES, self.limit):
+            self._adjust()
+    
+    def _adjust(self):
+        """Apply one additive-increase / multiplicative-decrease step."""
+        samples = sorted(self._samples)
+        self._samples = []
+        p95 = samples[int(0.95 * (len(samples) - 1))]
+        
+        counters = self.stats.snapshot()
+        delta = {name: counters.get(name, 0) - self._counters.get(name, 0)
+                 for name in ('attempts', 'attempts_timed_out', 'attempts_throttled')}
+        self._counters = counters
+        attempts = max(delta['attempts'], 1)
+        timeout_rate = delta['attempts_timed_out'] / attempts
+        throttle_rate = delta['attempts_throttled'] / attempts
+        
+        if throttle_rate > self.THROTTLE_TOLERANCE:
+            reason = '429 responses'
+        elif timeout_rate > self.TIMEOUT_TOLERANCE:
+            reason = 'timeouts'
+        elif self._baseline is not None and p95 > self._baseline * self.LATENCY_TOLERANCE:
+            reason = 'latency'
+        else:
+            reason = None
+        
+        previous = self.limit
+        if reason:
+            self.limit = max(self.minimum, self.limit // 2)
+            self.decreases += 1
+            self._settling = previous
+        else:
+            self.limit = min(self.maximum, self.limit + 1)
+            self.increases += 1
+        self.lowest = min(self.lowest, self.limit)
+        self.highest = max(self.highest, self.limit)
+        self._baseline = p95 if self._baseline is None else min(p95, self._baseline * self.BASELINE_DRIFT)
+        
+        if self.log and self.limit != previous:
+            self.log(f"Auto threads {previous} -> {self.limit}"
+                     f"{f' ({reason})' if reason else ''}: p95 {p95:.2f}s, "
+                     f"timeouts {timeout_rate * 100:.1f}%, 429s {throttle_rate * 100:.1f}%")
+
+def log_controller_decision(message: str):
+    """Print an adaptive concurrency decision without clobbering the progress line."""
+    print(f"\r{Colors.DIM}[*] {message}{Colors.RESET}", flush=True)
+
+# Lowest score of each grade above F, ascending; GRADES[bisect_right(GRADE_THRESHOLDS, score)]
+GRADE_THRESHOLDS = (50, 60, 70, 80, 90)
+GRADES = ('F', 'D', 'C', 'B', 'A', 'A+')
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Linearly interpolated percentile of sorted values, as numpy.percentile computes it."""
+    position = q / 100 * (len(ordered) - 1)
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+class Histogram:
+    """Bucketed distribution of observed values, laid out like a Prometheus histogram."""
+    
+    def __init__(self, bounds: Iterable[float]):
+        self.bounds = tuple(bounds)
+        # counts[i] holds values above bounds[i - 1] up to bounds[i]; the last is +Inf
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+    
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+    
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+    
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(upper bound, observations at or below it) pairs ending with +Inf."""
+        labels = [f"{bound:g}" for bound in self.bounds] + ['+Inf']
+        return list(zip(labels, accumulate(self.counts)))
+    
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating within its bucket, capped at the largest value seen."""
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                if i == len(self.bounds):
+                    return self.max
+                lower = self.bounds[i - 1] if i else 0.0
+                return min(lower + (self.bounds[i] - lower) * (rank - seen) / count, self.max)
+            seen += count
+        return 0.0
+
+class ScanMetrics:
+    """Histograms of per-scan phase timings, scan durations and request attempts.
+    
+    Fed by the thread that collects results, so it needs no locking. Results
+    answered from the cache without a request are only counted. Exported as
+    Prometheus text or as a JSON document with estimated quantiles.
+    """
+    
+    TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+    ATTEMPT_BUCKETS = (1, 2, 3, 4, 6, 8, 16)
+    QUANTILES = (0.5, 0.95, 0.99)
+    PREFIX = 'sentinelheaders'
+    
+    def __init__(self):
+        self.phases = {phase: Histogram(self.TIME_BUCKETS) for phase in PHASES}
+        self.duration = Histogram(self.TIME_BUCKETS)
+        self.attempts = Histogram(self.ATTEMPT_BUCKETS)
+        self.outcomes = dict.fromkeys(('ok', 'error', 'cached'), 0)
+    
+    def observe(self, record: ScanRecord):
+        """Add one completed scan."""
+        if record.timings is None:
+            self.outcomes['cached'] += 1
+            return
+        self.outcomes['error' if record.error else 'ok'] += 1
+        for histogram, seconds in zip(self.phases.values(), record.timings):
+            histogram.observe(seconds)
+        self.duration.observe(record.elapsed)
+        self.attempts.observe(record.attempts)
+    
+    def _describe(self, histogram: Histogram) -> Dict:
+        description = {'count': histogram.count, 'sum': histogram.sum, 'mean': histogram.mean,
+                       'max': histogram.max}
+        for q in self.QUANTILES:
+            description[f"p{q * 100:g}"] = histogram.quantile(q)
+        description['buckets'] = dict(histogram.cumulative())
+        return description
+    
+    def to_dict(self, counters: Dict[str, int]) -> Dict:
+        """JSON-serializable histograms and quantiles, with the run counters given."""
+        return {
+            'scans': dict(self.outcomes),
+            'scan_seconds': self._describe(self.duration),
+            'phase_seconds': {phase: self._describe(histogram) for phase, histogram in self.phases.items()},
+            'attempts': self._describe(self.attempts),
+            'counters': dict(sorted(counters.items()))
+        }
+    
+    def to_prometheus(self, counters: Dict[str, int]) -> str:
+        """Prometheus text exposition of the histograms and the run counters given."""
+        prefix = self.PREFIX
+        lines = [f"# HELP {prefix}_scans_total Completed scans by outcome.",
+                 f"# TYPE {prefix}_scans_total counter"]
+        lines.extend(f'{prefix}_scans_total{{outcome="{outcome}"}} {count}'
+                     for outcome, count in self.outcomes.items())
+        self._histogram_lines(lines, f"{prefix}_scan_duration_seconds",
+                              "Time from the first request of a scan to its result.", [('', self.duration)])
+        self._histogram_lines(lines, f"{prefix}_scan_phase_seconds",
+                              "Time of a scan spent in each phase, summed over retries and redirects.",
+                              [(f'phase="{phase}"', histogram) for phase, histogram in self.phases.items()])
+        self._histogram_lines(lines, f"{prefix}_scan_attempts",
+                              "Requests made per scan, retries and redirects included.", [('', self.attempts)])
+        for name, value in sorted(counters.items()):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        return '\n'.join(lines) + '\n'
+    
+    @staticmethod
+    def _histogram_lines(lines: List[str], metric: str, description: str,
+                         series: List[Tuple[str, Histogram]]):
+        lines.append(f"# HELP {metric} {description}")
+        lines.append(f"# TYPE {metric} histogram")
+        for labels, histogram in series:
+            prefix = labels + ',' if labels else ''
+            for bound, count in histogram.cumulative():
+                lines.append(f'{metric}_bucket{{{prefix}le="{bound}"}} {count}')
+            selector = f"{{{labels}}}" if labels else ''
+            lines.append(f"{metric}_sum{selector} {histogram.sum}")
+            lines.append(f"{metric}_count{selector} {histogram.count}")
+
+def write_file_atomic(filename: str, text: str):
+    """Replace a file's contents in one step so readers never see a partial write."""
+    temporary = f"{filename}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(temporary, filename)
+
+class ResultColumns:
+    """Columnar store of scan results for summaries over millions of rows.
+    
+    Scores, status codes, latencies, present-header bitmasks, failure flags
+    and interned registered-domain ids are kept in typed arrays, about 21
+    bytes per result. summary() works on whole columns with NumPy when it is
+    installed and falls back to pure Python otherwise. save() and load()
+    write and read the columns as raw little-endian arrays after a JSON
+    preamble.
+    """
+    
+    MAGIC = b'SHRC\x01'
+    COLUMNS = (('score', 'h'), ('status', 'H'), ('latency', 'f'), ('mask', 'Q'),
+               ('failed', 'B'), ('domain', 'I'))
+    SCORE_PERCENTILES = (10, 25, 50, 75, 90, 99)
+    LATENCY_PERCENTILES = (50, 95, 99)
+    TOP_DOMAINS = 10
+    
+    def __init__(self, header_names: Iterable[str]):
+        self.header_names = tuple(header_names)
+        self.domains = []
+        self._domain_ids = {}
+        self._bits = {name: 1 << i for i, name in enumerate(self.header_names)}
+        for name, typecode in self.COLUMNS:
+            setattr(self, name, array(typecode))
+    
+    def __len__(self) -> int:
+        return len(self.score)
+    
+    @classmethod
+    def from_records(cls, records: Iterable[ScanRecord], header_names: Iterable[str]) -> 'ResultColumns':
+        columns = cls(header_names)
+        for record in records:
+            columns.append(record)
+        return columns
+    
+    def _domain_id(self, url: str) -> int:
+        domain = registered_domain(url_hostname(url) or url)
+        domain_id = self._domain_ids.get(domain)
+        if domain_id is None:
+            domain_id = self._domain_ids[domain] = len(self.domains)
+            self.domains.append(domain)
+        return domain_id
+    
+    def append(self, record: ScanRecord):
+        """Add one scan result."""
+        if record.rules.names == self.header_names:
+            mask = record.present
+        else:
+            mask = 0
+            for i, name in enumerate(record.rules.names):
+                if record.present >> i & 1:
+                    mask |= self._bits.get(name, 0)
+        self.score.append(record.security_score)
+        self.status.append(record.status_code or 0)
+        self.latency.append(record.elapsed)
+        self.mask.append(mask)
+        self.failed.append(1 if record.error else 0)
+        self.domain.append(self._domain_id(record.url))
+    
+    def save(self, filename: str):
+        """Write the store to filename."""
+        preamble = json.dumps({'headers': list(self.header_names), 'domains': self.domains,
+                               'rows': len(self)}).encode('utf-8')
+        with open(filename, 'wb') as f:
+            f.write(self.MAGIC + struct.pack('<I', len(preamble)) + preamble)
+            for name, _ in self.COLUMNS:
+                column = getattr(self, name)
+                if sys.byteorder == 'big':
+                    column = array(column.typecode, column)
+                    column.byteswap()
+                column.tofile(f)
+    
+    @classmethod
+    def load(cls, filename: str) -> 'ResultColumns':
+        """Read a store written by save()."""
+        with open(filename, 'rb') as f:
+            if f.read(len(cls.MAGIC)) != cls.MAGIC:
+                raise ValueError(f"'{filename}' is not a result columns file")
+            preamble_size, = struct.unpack('<I', f.read(4))
+            preamble = json.loads(f.read(preamble_size))
+            columns = cls(preamble['headers'])
+            columns.domains = preamble['domains']
+            columns._domain_ids = {domain: i for i, domain in enumerate(columns.domains)}
+            for name, _ in cls.COLUMNS:
+                column = getattr(columns, name)
+                try:
+                    column.fromfile(f, preamble['rows'])
+                except EOFError:
+                    raise ValueError(f"'{filename}' is truncated")
+                if sys.byteorder == 'big':
+                    column.byteswap()
+        return columns
+    
+    def summary(self) -> Dict:
+        """Compute score, grade, latency, status, header adoption and per-domain statistics."""
+        summary = {'rows': len(self), 'successful': len(self) - sum(self.failed)}
+        summary['failed'] = summary['rows'] - summary['successful']
+        if not summary['successful']:
+            return summary
+        if numpy is not None:
+            summary.update(self._summarize_numpy())
+        else:
+            summary.update(self._summarize_python())
+        return summary
+    
+    def _summarize_numpy(self) -> Dict:
+        ok = numpy.frombuffer(self.failed, dtype=numpy.uint8) == 0
+        scores = numpy.frombuffer(self.score, dtype=numpy.int16)[ok]
+        latencies = numpy.frombuffer(self.latency, dtype=numpy.float32)[ok].astype(numpy.float64)
+        masks = numpy.frombuffer(self.mask, dtype=numpy.uint64)[ok]
+        statuses = numpy.frombuffer(self.status, dtype=numpy.uint16)[ok]
+        domains = numpy.frombuffer(self.domain, dtype=self.domain.typecode)
+        
+        grade_counts = numpy.bincount(numpy.digitize(scores, GRADE_THRESHOLDS), minlength=len(GRADES))
+        codes, code_counts = numpy.unique(statuses, return_counts=True)
+        adoption = {name: int(numpy.count_nonzero(masks & numpy.uint64(1 << i)))
+                    for i, name in enumerate(self.header_names)}
+        
+        totals = numpy.bincount(domains, minlength=len(self.domains))
+        ok_totals = numpy.bincount(domains[ok], minlength=len(self.domains))
+        score_sums = numpy.bincount(domains[ok], weights=scores, minlength=len(self.domains))
+        top = numpy.argsort(-totals, kind='stable')[:self.TOP_DOMAINS]
+        
+        return {
+            'score_mean': float(scores.mean()),
+            'score_min': int(scores.min()),
+            'score_max': int(scores.max()),
+            'score_percentiles': dict(zip(self.SCORE_PERCENTILES,
+                                          numpy.percentile(scores, self.SCORE_PERCENTILES).tolist())),
+            'latency_percentiles': dict(zip(self.LATENCY_PERCENTILES,
+                                            numpy.percentile(latencies, self.LATENCY_PERCENTILES).tolist())),
+            'grades': dict(zip(GRADES, grade_counts.tolist())),
+            'status_codes': dict(zip(codes.tolist(), code_counts.tolist())),
+            'adoption': adoption,
+            'domains': [(self.domains[i], int(totals[i]), int(totals[i] - ok_totals[i]),
+                         float(score_sums[i] / ok_totals[i]) if ok_totals[i] else None)
+                        for i in top.tolist()]
+        }
+    
+    def _summarize_python(self) -> Dict:
+        failed = self.failed
+        scores = [score for score, bad in zip(self.score, failed) if not bad]
+        latencies = sorted(latency for latency, bad in zip(self.latency, failed) if not bad)
+        masks = [mask for mask, bad in zip(self.mask, failed) if not bad]
+        
+        grade_counts = [0] * len(GRADES)
+        for score in scores:
+            grade_counts[bisect.bisect_right(GRADE_THRESHOLDS, score)] += 1
+        status_codes = {}
+        for status, bad in zip(self.status, failed):
+            if not bad:
+                status_codes[status] = status_codes.get(status, 0) + 1
+        adoption = {name: sum(1 for mask in masks if mask >> i & 1)
+                    for i, name in enumerate(self.header_names)}
+        
+        totals = [0] * len(self.domains)
+        ok_totals = [0] * len(self.domains)
+        score_sums = [0] * len(self.domains)
+        for domain, score, bad in zip(self.domain, self.score, failed):
+            totals[domain] += 1
+            if not bad:
+                ok_totals[domain] += 1
+                score_sums[domain] += score
+        top = sorted(range(len(totals)), key=lambda i: -totals[i])[:self.TOP_DOMAINS]
+        
+        ordered = sorted(scores)
+        return {
+            'score_mean': sum(scores) / len(scores),
+            'score_min': ordered[0],
+            'score_max': ordered[-1],
+            'score_percentiles': {q: percentile(ordered, q) for q in self.SCORE_PERCENTILES},
+            'latency_percentiles': {q: percentile(latencies, q) for q in self.LATENCY_PERCENTILES},
+            'grades': dict(zip(GRADES, grade_counts)),
+            'status_codes': dict(sorted(status_codes.items())),
+            'adoption': adoption,
+            'domains': [(self.domains[i], totals[i], totals[i] - ok_totals[i],
+                         score_sums[i] / ok_totals[i] if ok_totals[i] else None) for i in top]
+        }
+
+def enumerate_urls(urls: Iterable[str], skip: Optional[Container[int]] = None) -> Iterator[Tuple[int, str]]:
+    """Number URLs by input position, leaving out the indices in skip."""
+    for index, url in enumerate(urls):
+        if not skip or index not in skip:
+            yield index, url
+
+CSV_FIELDNAMES = ['url', 'missing_header', 'impact', 'severity', 'security_score', 'status_code', 'timestamp', 'error']
+
+def result_to_csv_rows(result: ScanRecord) -> List[Dict]:
+    """Expand a scan result into CSV rows, one per missing header."""
+    url = result.url
+    timestamp = result.timestamp
+    error = result.error or ''
+    missing_headers = result.missing_headers
+    
+    # If no missing headers, add one row with all present headers
+    if not missing_headers:
+        return [{
+            'url': url,
+            'timestamp': timestamp,
+            'status_code': result.status_code,
+            'security_score': result.security_score,
+            'missing_header': 'None',
+            'severity': 'N/A',
+            'impact': 'All headers present',
+            'error': error
+        }]
+    
+    # Add one row for each missing header
+    return [{
+        'url': url,
+        'timestamp': timestamp,
+        'status_code': result.status_code,
+        'security_score': result.security_score,
+        'missing_header': header['name'],
+        'severity': header['severity'],
+        'impact': header['impact'],
+        'error': error
+    } for header in missing_headers]
+
+class SecurityHeadersScanner:
+    """Main scanner class for HTTP security headers."""
+    
+    # Retry policy shared by every scan engine
+    RETRY_TOTAL = 3
+    RETRY_BACKOFF_FACTOR = 1
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    
+    # Fetch modes: full GET, HEAD with GET fallback, or GET closed after the headers
+    FETCH_MODES = ('get', 'head', 'stream-get')
+    HEAD_FALLBACK_STATUSES = (405, 501)
+    
+    # Upper bound on per-host connection pools kept by one session
+    MAX_HOST_POOLS = 1000
+    
+    # URLs buffered by the host scheduler; bounds memory for any input size
+    SCHEDULER_LOOKAHEAD = 10000
+    
+    # Shortest timeout a request gets when the run deadline is close
+    MIN_TIMEOUT = 0.1
+    
+    # Completed results kept to answer duplicate input lines without a scan
+    DEDUP_RESULTS = 10000
+    
+    # Analyzed redirect destinations kept for reuse by later redirect chains
+    REDIRECT_DESTINATIONS = 10000
+    
+    def __init__(self, timeout: int = 10, user_agent: str = None, proxy: str = None, 
+                 delay: float = 0.5, threads: int = 1, fetch_mode: str = 'get',
+                 session_per_thread: bool = False, cache: Optional[ResultCache] = None,
+                 host_rate: Optional[float] = None, host_concurrency: int = 4,
+                 rate_key: str = 'host', autotune: bool = False,
+                 rules: Optional[RuleSet] = None, capture_headers: bool = False,
+                 dns_ttl: float = 300, dns_negative_ttl: float = 60, dns_workers: int = 16,
+                 connect_timeout: Optional[float] = None, read_timeout: Optional[float] = None,
+                 breaker_threshold: int = 5, breaker_cooldown: float = 60,
+                 deadline: Optional[float] = None, origin_sample: int = 0,
+                 events: Optional[EventStream] = None):
+        if fetch_mode not in self.FETCH_MODES:
+            raise ValueError(f"Unknown fetch mode: {fetch_mode}")
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout or timeout
+        self.read_timeout = read_timeout or timeout
+        # Wall clock time.time() at which the run stops, shared with worker processes
+        self.deadline = deadline
+        self.user_agent = user_agent or self._get_random_user_agent()
+        self.proxy = proxy
+        self.delay = delay
+        self.threads = threads
+        # With autotune, threads is the ceiling the controller may grow to
+        self.autotune = autotune
+        self.fetch_mode = fetch_mode
+        self.session_per_thread = session_per_thread
+        self.cache = cache
+        self.events = events
+        # --delay is the minimum spacing between requests to the same host
+        self.host_rate = host_rate if host_rate is not None else (1 / delay if delay > 0 else None)
+        self.scheduler = HostScheduler(self.host_rate, max_concurrency=host_concurrency,
+                                       key=rate_key, lookahead=self.SCHEDULER_LOOKAHEAD)
+        self.breaker = HostCircuitBreaker(breaker_threshold, breaker_cooldown) if breaker_threshold > 0 else None
+        self.rules = rules or DEFAULT_RULES
+        self.capture_headers = capture_headers
+        self.security_headers = self.rules.headers
+        self.security_policies = SECURITY_POLICIES
+        self.lock = threading.Lock()
+        self.stats = ScanStats()
+        self.metrics = ScanMetrics()
+        self.sampler = (OriginSampler(origin_sample, self.scheduler, self.stats, self.normalize_url)
+                        if origin_sample > 0 else None)
+        self.destinations = RedirectDestinations(self.REDIRECT_DESTINATIONS)
+        # Behind a proxy the proxy resolves target names, so they are not looked up here
+        self.resolve_targets = not proxy
+        DNS_CACHE.configure(dns_ttl, dns_negative_ttl, dns_workers if self.resolve_targets else 0, self.stats)
+        self.controller = (ConcurrencyController(self.stats, maximum=threads, log=log_controller_decision)
+                           if autotune else None)
+        self._session = None
+        self._sessions = []
+        self._sessions_lock = threading.Lock()
+        self._local = threading.local()
+        self.size_pools()
+        
+    def _get_random_user_agent(self) -> str:
+        """Get a random user agent for WAF bypass."""
+        user_agents = [
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+            "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:89.0) Gecko/20100101 Firefox/89.0",
+            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:89.0) Gecko/20100101 Firefox/89.0"
+        ]
+        return random.choice(user_agents)
+    
+    @property
+    def session(self) -> requests.Session:
+        """Session used by the calling thread, created on first use."""
+        if self.session_per_thread:
+            session = getattr(self._local, 'session', None)
+            if session is None:
+                session = self._local.session = self._create_session()
+            return session
+        
+        if self._session is None:
+            with self.lock:
+                if self._session is None:
+                    self._session = self._create_session()
+        return self._session
+    
+    def size_pools(self, host_count: Optional[int] = None):
+        """Size connection pools from the thread count and number of distinct hosts."""
+        hosts = host_count or self.threads
+        self.pool_connections = max(10, min(hosts, self.MAX_HOST_POOLS))
+        # A private session only ever has one request in flight
+        self.pool_maxsize = 1 if self.session_per_thread else max(10, self.threads)
+        
+        with self._sessions_lock:
+            sessions = list(self._sessions)
+        for session in sessions:
+            self._mount_adapter(session)
+    
+    def _mount_adapter(self, session: requests.Session):
+        """Mount a freshly sized pooled adapter on a session."""
+        # Configure retry strategy
+        retry_strategy = TimedRetry(
+            total=self.RETRY_TOTAL,
+            backoff_factor=self.RETRY_BACKOFF_FACTOR,
+            status_forcelist=list(self.RETRY_STATUSES),
+        )
+        retry_strategy.owner = self
+        
+        adapter = PooledHTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=retry_strategy
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+    
+    def connection_stats(self) -> Tuple[int, int]:
+        """Return (connections opened, requests sent) across all sessions."""
+        with self._sessions_lock:
+            sessions = list(self._sessions)
+        adapters = {id(a): a for s in sessions for a in s.adapters.values()
+                    if isinstance(a, PooledHTTPAdapter)}
+        connections = requests_sent = 0
+        for adapter in adapters.values():
+            opened, sent = adapter.connection_stats()
+            connections += opened
+            requests_sent += sent
+        return connections, requests_sent
+    
+    def _create_session(self) -> requests.Session:
+        """Create a configured requests session with WAF bypass capabilities."""
+        load_http_stack()
+        session = requests.Session()
+        self._mount_adapter(session)
+        session.headers.update(self._build_request_headers())
+        
+        # Configure proxy if provided
+        if self.proxy:
+            session.proxies = {
+                'http': self.proxy,
+                'https': self.proxy
+            }
+        
+        with self._sessions_lock:
+            self._sessions.append(session)
+        return session
+    
+    def _build_request_headers(self) -> Dict[str, str]:
+        """Build the WAF bypass request headers sent with every scan."""
+        return {
+            'User-Agent': self.user_agent,
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.5',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive',
+            'Upgrade-Insecure-Requests': '1',
+            'X-Forwarded-For': f"{random.randint(1,254)}.{random.randint(1,254)}.{random.randint(1,254)}.{random.randint(1,254)}",
+            'X-Real-IP': f"{random.randint(1,254)}.{random.randint(1,254)}.{random.randint(1,254)}.{random.randint(1,254)}",
+            'X-Originating-IP': f"{random.randint(1,254)}.{random.randint(1,254)}.{random.randint(1,254)}.{random.randint(1,254)}"
+        }
+    
+    def normalize_url(self, url: str) -> str:
+        """Normalize URL by adding protocol if missing."""
+        if not url.lower().startswith(('http://', 'https://')):
+            url = 'https://' + url
+        return url
+    
+    def get_security_grade(self, score: int) -> Tuple[str, str]:
+        """Get security grade and color based on score."""
+        grade = GRADES[bisect.bisect_right(GRADE_THRESHOLDS, score)]
+        if grade in ('A+', 'A'):
+            return grade, Colors.GREEN
+        elif grade in ('B', 'C'):
+            return grade, Colors.YELLOW
+        else:
+            return grade, Colors.RED
+    
+    def check_security_policies(self, url: str, response: requests.Response) -> Dict:
+        """Check additional security policies."""
+        return self.rules.check_policies(url, self.rules.normalize(response.headers))
+    
+    def _new_result(self, normalized_url: str) -> ScanRecord:
+        """Create an empty scan result for a URL."""
+        return ScanRecord(normalized_url, self.rules)
+    
+    def _analyze_response(self, result: ScanRecord, response) -> None:
+        """Evaluate security headers and policies of a response into result."""
+        result.status_code = response.status_code
+        if self.capture_headers:
+            result.headers = dict(response.headers)
+        
+        self.rules.evaluate(result, response.headers)
+    
+    def _record_body(self, headers, downloaded: Optional[int]):
+        """Account for a response body that was downloaded or skipped."""
+        if downloaded is not None:
+            self.stats.incr('bytes_downloaded', downloaded)
+            return
+        length = headers.get('Content-Length', '')
+        if length.isdigit():
+            self.stats.incr('bytes_saved', int(length))
+        else:
+            self.stats.incr('bodies_unknown_size')
+    
+    def _timeouts(self) -> Tuple[float, float]:
+        """(connect, read) timeouts for the next request, cut short by the run deadline."""
+        remaining = self._deadline_remaining()
+        if remaining is None:
+            return self.connect_timeout, self.read_timeout
+        remaining = max(remaining, self.MIN_TIMEOUT)
+        return min(self.connect_timeout, remaining), min(self.read_timeout, remaining)
+    
+    def _deadline_remaining(self) -> Optional[float]:
+        """Seconds left before the run deadline, if one is set."""
+        return max(self.deadline - time.time(), 0) if self.deadline is not None else None
+    
+    def past_deadline(self) -> bool:
+        """Whether the run deadline has passed."""
+        return self.deadline is not None and time.time() >= self.deadline
+    
+    def reset_pass(self):
+        """Drop the per-pass state left by a batch scan that ended early.
+        
+        The URLs it had buffered and the slots of its scans in flight would
+        otherwise stay in the scheduler and be handed to the next batch scan.
+        """
+        self.scheduler.reset()
+        if self.sampler:
+            self.sampler.reset()
+        if self.breaker:
+            self.breaker.drop_probes()
+    
+    def _follow(self, method: str, url: str, headers: Optional[Dict[str, str]] = None
+                ) -> Tuple[requests.Response, Optional[Tuple[Tuple, ScanRecord]]]:
+        """Request a URL following redirects hop by hop, stopping at a destination already analyzed.
+        
+        Returns the final response, with the redirects taken in its history,
+        or, when a redirect reaches a destination analyzed earlier in the
+        run, the last redirect response and that destination's (hops, result).
+        """
+        history = []
+        for _ in range(self.session.max_redirects + 1):
+            response = self.session.request(
+                method,
+                url,
+                headers=headers,
+                timeout=self._timeouts(),
+                allow_redirects=False,
+                verify=False,  # For testing purposes
+                stream=method != 'HEAD'
+            )
+            if not response.is_redirect:
+                response.history = history
+                return response, None
+            # Reading the redirect body lets its connection go back to the pool
+            response.content
+            response.close()
+            url = requests.utils.requote_uri(urljoin(response.url, self.session.get_redirect_target(response)))
+            reused = self.destinations.get(url)
+            if reused:
+                response.history = history
+                return response, reused
+            history.append(response)
+        raise requests.exceptions.TooManyRedirects(f"Exceeded {self.session.max_redirects} redirects.",
+                                                   response=response)
+    
+    def _stream_get(self, url: str, headers: Optional[Dict[str, str]] = None
+                    ) -> Tuple[requests.Response, Optional[Tuple[Tuple, ScanRecord]]]:
+        """GET a URL and close the connection as soon as the headers arrive."""
+        response, reused = self._follow('GET', url, headers)
+        if not reused:
+            response.close()
+            self._record_body(response.headers, None)
+        return response, reused
+    
+    def _fetch(self, url: str, headers: Optional[Dict[str, str]] = None
+               ) -> Tuple[requests.Response, Optional[Tuple[Tuple, ScanRecord]]]:
+        """Fetch a URL according to the configured fetch mode, as _follow() returns it."""
+        if self.fetch_mode == 'head':
+            response, reused = self._follow('HEAD', url, headers)
+            if reused or response.status_code not in self.HEAD_FALLBACK_STATUSES:
+                if not reused:
+                    self._record_body(response.headers, None)
+                return response, reused
+            self.stats.incr('head_fallbacks')
+            return self._stream_get(url, headers)
+        
+        if self.fetch_mode == 'stream-get':
+            return self._stream_get(url, headers)
+        
+        response, reused = self._follow('GET', url, headers)
+        if reused:
+            return response, reused
+        # The body is read here rather than inside requests so its download can be timed
+        started = time.perf_counter()
+        body = response.content
+        add_scan_time('transfer', time.perf_counter() - started)
+        # raw.tell() counts bytes read off the wire, before content decoding
+        self._record_body(response.headers, response.raw.tell() or len(body))
+        return response, None
+    
+    def _cache_key(self, normalized_url: str) -> str:
+        """Cache key of a URL: its canonical form; results scored by custom rules are kept apart."""
+        if self.rules is DEFAULT_RULES:
+            return canonical_url(normalized_url)
+        return f"{canonical_url(normalized_url)}#rules={self.rules.fingerprint}"
+    
+    def _cache_lookup(self, normalized_url: str) -> Optional[CacheEntry]:
+        """Get the cache entry for a URL, counting fresh hits."""
+        if not self.cache:
+            return None
+        entry = self.cache.get(self._cache_key(normalized_url))
+        if entry:
+            entry.result = ScanRecord.from_state(entry.result, self.rules)
+            # The entry may have been stored under another spelling of the same URL
+            entry.result.url = normalized_url
+            # Timings belong to the scan that filled the cache, not to this one
+            entry.result.attempts, entry.result.timings = 0, None
+        if entry and entry.fresh:
+            self.stats.incr('cache_hits')
+        return entry
+    
+    def _cache_update(self, normalized_url: str, entry: Optional[CacheEntry],
+                      response, result: ScanRecord) -> ScanRecord:
+        """Reuse a revalidated entry on 304, otherwise store the new result."""
+        if entry and response.status_code == 304:
+            self.stats.incr('cache_revalidated')
+            self.cache.refresh(self._cache_key(normalized_url), response.headers)
+            return entry.result
+        
+        self._analyze_response(result, response)
+        if self.cache:
+            self.stats.incr('cache_misses')
+            self.cache.store(self._cache_key(normalized_url), result.to_state(), response.headers)
+        return result
+    
+    def _complete_scan(self, normalized_url: str, entry: Optional[CacheEntry], response,
+                       reused: Optional[Tuple[Tuple, ScanRecord]], result: ScanRecord) -> ScanRecord:
+        """Record the redirect hops of a fetch and analyze its response, or reuse the destination it reached."""
+        hops = list(response.history) + [response] if reused else response.history
+        redirects = tuple((hop.url, hop.status_code, dict(hop.headers)) for hop in hops)
+        self.stats.incr('redirects_followed', len(redirects))
+        if not reused:
+            scanned = self._cache_update(normalized_url, entry, response, result)
+            scanned.redirects = redirects
+            self.destinations.store(scanned, response.url)
+            return scanned
+        
+        later_hops, destination = reused
+        self.stats.incr('redirects_reused')
+        scanned = destination.duplicate(result.url)
+        scanned.redirects = redirects + later_hops
+        if self.cache:
+            self.stats.incr('cache_misses')
+            self.cache.store(self._cache_key(normalized_url), scanned.to_state(), response.headers)
+        return scanned
+    
+    def scan_url(self, url: str) -> ScanRecord:
+        """Scan a single URL for security headers and policies."""
+        normalized_url = self.normalize_url(url)
+        result = self._new_result(normalized_url)
+        
+        entry = self._cache_lookup(normalized_url)
+        if entry and entry.fresh:
+            return entry.result
+        
+        started = time.monotonic()
+        result.start_timing()
+        scanned = result
+        token = _timed_scan.set(result)
+        try:
+            self._preresolve(normalized_url)
+            response, reused = self._fetch(normalized_url, entry.conditional_headers() if entry else None)
+            result.attempts = self._record_attempts(response)
+            scanned = self._complete_scan(normalized_url, entry, response, reused, result)
+            
+        except HostResolutionError as e:
+            result.error = str(e)
+        except requests.exceptions.RequestException as e:
+            result.attempts = self._record_failed_attempts(e)
+            result.error = str(e)
+        finally:
+            _timed_scan.reset(token)
+        
+        scanned.attempts, scanned.timings = result.attempts, result.timings
+        scanned.elapsed = time.monotonic() - started
+        return scanned
+    
+    def _preresolve(self, normalized_url: str):
+        """Resolve the host before requesting, so a name that does not exist fails without retries."""
+        host = url_hostname(normalized_url)
+        if not self.resolve_targets or not host:
+            return
+        started = time.perf_counter()
+        try:
+            DNS_CACHE.resolve(host)
+        except socket.gaierror as e:
+            if e.errno in DnsCache.NEGATIVE_ERRORS:
+                self.stats.incr('dns_failed_fast')
+                raise HostResolutionError(host, e) from e
+        except (OSError, UnicodeError):
+            pass  # transient or malformed: the request reports it as usual
+        finally:
+            add_scan_time('dns', time.perf_counter() - started)
+    
+    def _prefetch(self, url: str):
+        """Start resolving the host of a URL waiting in the scheduler."""
+        if self.resolve_targets:
+            DNS_CACHE.prefetch(url_hostname(self.normalize_url(url)))
+    
+    def _unresolvable_result(self, url: str) -> Optional[ScanRecord]:
+        """Error result for a URL whose host is known not to exist, made without a worker."""
+        # A fresh cache entry still wins over a dead name; scan_url fails fast otherwise
+        if not self.resolve_targets or self.cache:
+            return None
+        normalized_url = self.normalize_url(url)
+        host = url_hostname(normalized_url)
+        error = DNS_CACHE.negative(host) if host else None
+        if error is None:
+            return None
+        result = self._new_result(normalized_url)
+        result.error = str(HostResolutionError(host, error))
+        self.stats.incr('dns_failed_fast')
+        return result
+    
+    def _circuit_open_result(self, url: str, key: Optional[str] = None) -> Optional[ScanRecord]:
+        """Error result for a URL whose host's circuit is open, made without a worker.
+        
+        Without key the URL is only being buffered and nothing changes; with
+        its scheduler key it is being dispatched and may become the probe of
+        a circuit whose cooldown is over.
+        """
+        breaker = self.breaker
+        if not breaker or not breaker.tripped:
+            return None
+        now = time.monotonic()
+        if key is None:
+            key = self.scheduler.host_key(url)
+            if not breaker.is_open(key, now):
+                return None
+        elif breaker.allow(key, now):
+            return None
+        return self._skipped_result(url, key)
+    
+    def _skipped_result(self, url: str, key: str) -> ScanRecord:
+        """Error result for a URL short-circuited by the open circuit of key."""
+        result = self._new_result(self.normalize_url(url))
+        result.error = (f"Skipped: circuit open for '{key}' after {self.breaker.threshold} "
+                        f"consecutive failed scans")
+        self.stats.incr('breaker_skipped')
+        return result
+    
+    def _answer_on_refill(self, url: str) -> Optional[ScanRecord]:
+        """Result for a URL read from the input that needs neither the scheduler nor a worker."""
+        return (self._unresolvable_result(url) or self._circuit_open_result(url)
+                or (self.sampler.extrapolate(url) if self.sampler else None))
+    
+    def _answer_on_dispatch(self, index: int, url: str, key: str) -> Optional[ScanRecord]:
+        """Result for a URL leaving the scheduler that needs no worker, or None to scan it."""
+        return (self._unresolvable_result(url) or self._circuit_open_result(url, key)
+                or (self.sampler.route(index, url, key) if self.sampler else None))
+    
+    def _record_outcome(self, index: int, key: str, result: ScanRecord) -> List[Tuple[int, ScanRecord]]:
+        """Feed a finished scan to the origin sampler and the circuit breaker.
+        
+        If the scan opens its host's circuit, the host's buffered URLs are
+        returned as skipped results.
+        """
+        if self.sampler:
+            self.sampler.record(index, result)
+        if not self.breaker or not self.breaker.record(key, result.error is not None, time.monotonic()):
+            return []
+        self.stats.incr('breaker_opened')
+        return [(index, self._skipped_result(url, key)) for index, url in self.scheduler.drop(key)]
+    
+    def _skip_remaining(self, source: Iterator[Tuple[int, str]]):
+        """Stop at the run deadline: drop buffered and unread URLs, counting them as skipped."""
+        skipped = self.scheduler.drain() + sum(1 for _ in source)
+        self.stats.incr('deadline_skipped', skipped)
+    
+    def _wait_time(self, wakeup: Optional[float], now: float, stopped: bool) -> Optional[float]:
+        """Seconds a dispatcher may block: until a host gets a token or the run deadline passes."""
+        timeout = max(wakeup - now, 0) if wakeup is not None else None
+        remaining = None if stopped else self._deadline_remaining()
+        if remaining is not None and (timeout is None or remaining < timeout):
+            timeout = remaining
+        return timeout
+    
+    def _record_attempts(self, response: requests.Response) -> int:
+        """Count request attempts, 429s and timeouts from urllib3's retry history."""
+        attempts = throttled = timed_out = 0
+        for hop in chain(response.history, [response]):
+            retries = getattr(hop.raw, 'retries', None)
+            history = retries.history if retries else ()
+            attempts += len(history) + 1
+            for attempt in history:
+                if attempt.status == 429:
+                    throttled += 1
+                elif isinstance(attempt.error, urllib3.exceptions.TimeoutError):
+                    timed_out += 1
+        self.stats.incr('attempts', attempts)
+        self.stats.incr('attempts_throttled', throttled)
+        self.stats.incr('attempts_timed_out', timed_out)
+        return attempts
+    
+    def _record_failed_attempts(self, error: requests.exceptions.RequestException) -> int:
+        """Count the attempts behind a failed scan; exhausted retries made RETRY_TOTAL + 1."""
+        cause = error.args[0] if error.args else None
+        reason = cause.reason if isinstance(cause, urllib3.exceptions.MaxRetryError) else None
+        attempts = self.RETRY_TOTAL + 1 if reason is not None else 1
+        self.stats.incr('attempts', attempts)
+        # urllib3 2.x derives NewConnectionError (refused, unreachable) from ConnectTimeoutError
+        timed_out = (isinstance(reason, urllib3.exceptions.TimeoutError)
+                     and not isinstance(reason, urllib3.exceptions.NewConnectionError))
+        if isinstance(error, requests.exceptions.Timeout) or timed_out:
+            self.stats.incr('attempts_timed_out', attempts)
+        elif isinstance(reason, urllib3.exceptions.ResponseError) and '429' in str(reason):
+            self.stats.incr('attempts_throttled', attempts)
+        return attempts
+    
+    def print_scan_result(self, result: ScanRecord, verbose: bool = False):
+        """Print scan result with professional security tool formatting."""
+        print(self.format_scan_result(result, verbose))
+    
+    def format_scan_result(self, result: ScanRecord, verbose: bool = False) -> str:
+        """Render a scan result as the text printed by print_scan_result."""
+        url = result.url
+        lines = []
+        
+        # Print URL header
+        lines.append(f"\n{Colors.BOLD}{Colors.BLUE}[+] TARGET: {url}{Colors.RESET}")
+        lines.append(f"{Colors.BLUE}{'─' * 81}{Colors.RESET}")
+        
+        if result.error:
+            lines.append(f"{Colors.RED}[-] ERROR: {result.error}{Colors.RESET}")
+            return '\n'.join(lines)
+        
+        # Status and basic info
+        status_color = Colors.GREEN if result.status_code == 200 else Colors.YELLOW
+        lines.append(f"{Colors.WHITE}[*] Status Code: {status_color}{result.status_code}{Colors.RESET}")
+        if result.extrapolated_from:
+            lines.append(f"{Colors.DIM}[*] Extrapolated from: {result.extrapolated_from}{Colors.RESET}")
+        if result.redirects:
+            lines.append(f"{Colors.WHITE}[*] Redirects: {len(result.redirects)}{Colors.RESET}")
+            if verbose:
+                for url, status, headers in result.redirects:
+                    lines.append(f"{Colors.DIM}    {status} {url} -> {headers.get('Location', '')}{Colors.RESET}")
+        
+        # Security score and grade
+        score = result.security_score
+        grade, grade_color = self.get_security_grade(score)
+        lines.append(f"{Colors.WHITE}[*] Security Score: {grade_color}{score}/100 (Grade: {grade}){Colors.RESET}")
+        
+        # Security policies
+        lines.append(f"\n{Colors.BOLD}{Colors.CYAN}[+] SECURITY POLICIES{Colors.RESET}")
+        for policy, details in result.security_policies.items():
+            status = details['status']
+            if status == 'PASS':
+                status_color = Colors.GREEN
+                symbol = "[+]"
+            elif status == 'FAIL':
+                status_color = Colors.RED
+                symbol = "[-]"
+            elif status == 'WARN':
+                status_color = Colors.YELLOW
+                symbol = "[!]"
+            else:
+                status_color = Colors.BLUE
+                symbol = "[*]"
+            
+            lines.append(f"{status_color}{symbol} {policy}: {details['details']}{Colors.RESET}")
+        
+        # Present headers
+        if result.present_headers:
+            lines.append(f"\n{Colors.BOLD}{Colors.GREEN}[+] PRESENT SECURITY HEADERS{Colors.RESET}")
+            for header in sorted(result.present_headers, key=lambda x: x['severity']):
+                severity_color = self._get_severity_color(header['severity'])
+                lines.append(f"{severity_color}[+] {header['name']:<35} ({header['severity']}){Colors.RESET}")
+                if verbose:
+                    lines.append(f"{Colors.DIM}    Value: {header['value'][:60]}{'...' if len(header['value']) > 60 else ''}{Colors.RESET}")
+        
+        # Missing headers
+        if result.missing_headers:
+            lines.append(f"\n{Colors.BOLD}{Colors.RED}[-] MISSING SECURITY HEADERS{Colors.RESET}")
+            for header in sorted(result.missing_headers, key=lambda x: x['severity']):
+                severity_color = self._get_severity_color(header['severity'])
+                lines.append(f"{severity_color}[-] {header['name']:<35} ({header['severity']}) [-{header['points']} pts]{Colors.RESET}")
+                if verbose:
+                    lines.append(f"{Colors.DIM}    Impact: {header['impact']}{Colors.RESET}")
+                    lines.append(f"{Colors.DIM}    Example: {header['example']}{Colors.RESET}")
+        
+        # Recommendations
+        if result.recommendations and verbose:
+            lines.append(f"\n{Colors.BOLD}{Colors.YELLOW}[!] RECOMMENDATIONS{Colors.RESET}")
+            for rec in result.recommendations[:5]:
+                lines.append(f"{Colors.YELLOW}{rec}{Colors.RESET}")
+        
+        return '\n'.join(lines)
+    
+    def print_results(self, results: List[ScanRecord], verbose: bool = False):
+        """Print every scan result."""
+        for result in results:
+            self.print_scan_result(result, verbose=verbose)
+    
+    def _get_severity_color(self, severity: str) -> str:
+        """Get color for severity level."""
+        return severity_color(severity)
+    
+    def print_run_stats(self):
+        """Print transfer statistics collected during the run."""
+        print_section_header("RUN STATISTICS")
+        connections, requests_sent = self.connection_stats()
+        if requests_sent:
+            reused = max(requests_sent - connections, 0)
+            print(f"{Colors.WHITE}[*] Requests Sent: {requests_sent}{Colors.RESET}")
+            print(f"{Colors.WHITE}[*] Connections Opened: {connections} "
+                  f"({connections / requests_sent * 100:.1f}% of requests){Colors.RESET}")
+            print(f"{Colors.GREEN}[+] Connections Reused: {reused} "
+                  f"({reused / requests_sent * 100:.1f}% of requests){Colors.RESET}")
+        saved = self.stats.get('dedup_saved')
+        if saved:
+            print(f"{Colors.GREEN}[+] Scans Saved by Deduplication: {saved} "
+                  f"(duplicate URLs answered from one scan){Colors.RESET}")
+        followed = self.stats.get('redirects_followed')
+        if followed:
+            print(f"{Colors.WHITE}[*] Redirects Followed: {followed}{Colors.RESET}")
+            reused = self.stats.get('redirects_reused')
+            if reused:
+                print(f"{Colors.GREEN}[+] Redirect Destinations Reused: {reused} "
+                      f"(fetches avoided){Colors.RESET}")
+        self.print_attempt_stats()
+        self.print_dns_stats()
+        self.print_budget_stats()
+        self.print_phase_stats()
+        print(f"{Colors.WHITE}[*] Fetch Mode: {self.fetch_mode}{Colors.RESET}")
+        if self.fetch_mode == 'get':
+            print(f"{Colors.WHITE}[*] Body Bytes Downloaded: {format_bytes(self.stats.get('bytes_downloaded'))}{Colors.RESET}")
+            return
+        print(f"{Colors.GREEN}[+] Body Bytes Saved: {format_bytes(self.stats.get('bytes_saved'))}{Colors.RESET}")
+        unknown = self.stats.get('bodies_unknown_size')
+        if unknown:
+            print(f"{Colors.DIM}    ({unknown} skipped bodies had no Content-Length){Colors.RESET}")
+        fallbacks = self.stats.get('head_fallbacks')
+        if fallbacks:
+            print(f"{Colors.YELLOW}[!] HEAD Fallbacks to GET: {fallbacks}{Colors.RESET}")
+    
+    def print_attempt_stats(self):
+        """Print retry pressure and, for --threads auto, where the controller settled."""
+        throttled = self.stats.get('attempts_throttled')
+        timed_out = self.stats.get('attempts_timed_out')
+        if throttled:
+            print(f"{Colors.YELLOW}[!] 429 Responses: {throttled}{Colors.RESET}")
+        if timed_out:
+            print(f"{Colors.YELLOW}[!] Timed Out Attempts: {timed_out}{Colors.RESET}")
+        controller = self.controller
+        if controller:
+            print(f"{Colors.WHITE}[*] Auto Threads: settled at {controller.limit} "
+                  f"(range {controller.lowest}-{controller.highest}, "
+                  f"{controller.increases} increases, {controller.decreases} decreases){Colors.RESET}")
+    
+    def print_dns_stats(self):
+        """Print how often the DNS cache answered and how many scans failed fast on dead names."""
+        lookups = self.stats.get('dns_lookups')
+        if not lookups:
+            return
+        hits = self.stats.get('dns_cache_hits')
+        print(f"{Colors.WHITE}[*] DNS Lookups: {lookups} ({hits} answers from cache, "
+              f"{self.stats.get('dns_prefetched')} prefetched){Colors.RESET}")
+        failed_fast = self.stats.get('dns_failed_fast')
+        if failed_fast:
+            print(f"{Colors.YELLOW}[!] Unresolvable Hosts: {self.stats.get('dns_failures')} "
+                  f"({failed_fast} scans failed without a request){Colors.RESET}")
+    
+    def print_budget_stats(self):
+        """Print scans cut short by open circuits and work skipped at the run deadline."""
+        opened = self.stats.get('breaker_opened')
+        if opened:
+            print(f"{Colors.YELLOW}[!] Circuits Opened: {opened} "
+                  f"({self.stats.get('breaker_skipped')} scans skipped on failing hosts){Colors.RESET}")
+        skipped = self.stats.get('deadline_skipped')
+        if skipped:
+            print(f"{Colors.YELLOW}[!] Deadline Reached: {skipped} URLs not scanned{Colors.RESET}")
+    
+    def print_phase_stats(self):
+        """Print where the time of the scans went, phase by phase."""
+        metrics = self.metrics
+        if not metrics.duration.count:
+            return
+        print(f"{Colors.WHITE}[*] Time per Scan: mean {metrics.duration.mean * 1000:.1f} ms, "
+              f"p95 {metrics.duration.quantile(0.95) * 1000:.1f} ms{Colors.RESET}")
+        for phase, histogram in metrics.phases.items():
+            print(f"{Colors.DIM}    {phase:<9} mean {histogram.mean * 1000:8.1f} ms   "
+                  f"p95 {histogram.quantile(0.95) * 1000:8.1f} ms{Colors.RESET}")
+        repeated = metrics.attempts.count - metrics.attempts.counts[0]
+        if repeated:
+            print(f"{Colors.YELLOW}[!] Scans Needing Retries or Redirects: {repeated}{Colors.RESET}")
+    
+    def run_counters(self) -> Dict[str, int]:
+        """Run statistics counters and connection totals, for metrics export."""
+        counters = self.stats.snapshot()
+        counters['connections_opened'], counters['requests_sent'] = self.connection_stats()
+        return counters
+    
+    def describe_workers(self) -> Optional[str]:
+        """Describe the workers a batch scan starts, if worth announcing."""
+        if self.autotune:
+            return f"Starting auto-tuned thread pool (up to {self.threads} threads)"
+        if self.threads > 1:
+            return f"Starting {self.threads} threads for scanning"
+        return None
+    
+    def iter_scan(self, urls: Iterable[str],
+                  skip: Optional[Container[int]] = None) -> Iterator[Tuple[int, ScanRecord]]:
+        """Scan URLs lazily, yielding (input index, result) as scans complete.
+        
+        Input lines naming the same canonical URL are scanned once and the
+        result is yielded for each of them. Input indices listed in skip are
+        not scanned. A pass that ends early, by an exception or by the caller
+        closing it, leaves no state behind for the next one.
+        """
+        dedup = DedupIndex(self.normalize_url, self.DEDUP_RESULTS)
+        scan = self._scan_source(dedup.unique(enumerate_urls(urls, skip)))
+        try:
+            for index, result in scan:
+                fanned = dedup.fan_out(index, result) + dedup.ready()
+                self.stats.incr('dedup_saved', len(fanned) - 1)
+                yield from fanned
+        except BaseException:
+            # Stop the engine's workers before dropping the state they use
+            scan.close()
+            self.reset_pass()
+            raise
+        ready = dedup.ready()
+        self.stats.incr('dedup_saved', len(ready))
+        yield from ready
+        # Lines held back on scans dropped at the deadline were skipped too
+        self.stats.incr('deadline_skipped', dedup.abandoned())
+    
+    def _scan_source(self, source: Iterator[Tuple[int, str]]) -> Iterator[Tuple[int, ScanRecord]]:
+        """Scan (index, URL) pairs on the thread pool, yielding (index, result) as scans complete.
+        
+        URLs are pulled from the source into the host scheduler, which holds
+        at most SCHEDULER_LOOKAHEAD of them, so memory stays flat for any
+        input size. A scan is only submitted when a worker is free and its
+        host has budget, so workers never sleep on a rate limit while other
+        hosts are ready. With autotune the number of scans in flight follows
+        the concurrency controller.
+        
+        Hosts whose circuit breaker is open are short-circuited with an error
+        result. Once the run deadline passes no more scans start: scans in
+        flight finish and the URLs not started are counted as skipped.
+        """
+        scheduler = self.scheduler
+        controller = self.controller
+        exhausted = stopped = False
+        pending = {}
+        
+        with futures.ThreadPoolExecutor(max_workers=self.threads) as executor:
+            while True:
+                if not stopped and self.past_deadline():
+                    stopped = exhausted = True
+                    self._skip_remaining(source)
+                if not exhausted:
+                    wanted = scheduler.lookahead - scheduler.buffered
+                    pulled = 0
+                    for index, url in islice(source, wanted):
+                        pulled += 1
+                        answered = self._answer_on_refill(url)
+                        if answered:
+                            yield index, answered
+                            continue
+                        self._prefetch(url)
+                        scheduler.add(index, url)
+                        if self.events:
+                            self.events.queued(index, url)
+                    exhausted = pulled < wanted
+                
+                now = time.monotonic()
+                limit = controller.limit if controller else self.threads
+                while len(pending) < limit:
+                    item = scheduler.next_ready(now)
+                    if item is None:
+                        break
+                    index, url, key, queued_at = item
+                    answered = self._answer_on_dispatch(index, url, key)
+                    if answered:
+                        scheduler.release(key, refund=True)
+                        yield index, answered
+                        continue
+                    if self.events:
+                        self.events.scan_started(index, url)
+                    pending[executor.submit(self.scan_url, url)] = (index, key, now, queued_at)
+                
+                wakeup = scheduler.next_wakeup()
+                if not pending:
+                    if wakeup is None:
+                        return
+                    # Every buffered URL is waiting on its host's rate limit
+                    time.sleep(self._wait_time(wakeup, now, stopped))
+                    continue
+                
+                timeout = self._wait_time(wakeup, now, stopped)
+                done, _ = futures.wait(pending, timeout=timeout, return_when=futures.FIRST_COMPLETED)
+                finished = time.monotonic()
+                for future in done:
+                    index, key, submitted, queued_at = pending.pop(future)
+                    scheduler.release(key)
+                    if controller:
+                        controller.record(finished - submitted)
+                    result = future.result()
+                    result.add_time('queue', submitted - queued_at)
+                    yield index, result
+                    yield from self._record_outcome(index, key, result)
+    
+    def scan_multiple_urls(self, urls: Iterable[str], on_result=None,
+                           skip: Optional[Container[int]] = None) -> List[ScanRecord]:
+        """Scan multiple URLs with threading support, returning the results in completion order.
+        
+        on_result(index, result) is called as each scan completes; input
+        indices listed in skip are not scanned. Every result is kept, so
+        large inputs are better served by stream_multiple_urls.
+        """
+        results = []
+        
+        def collect(index: int, result: ScanRecord):
+            results.append(result)
+            if on_result:
+                on_result(index, result)
+        
+        self.stream_multiple_urls(urls, collect, skip)
+        return results
+    
+    def stream_multiple_urls(self, urls: Iterable[str], on_result=None,
+                             skip: Optional[Container[int]] = None) -> int:
+        """Scan multiple URLs like scan_multiple_urls without keeping the results.
+        
+        on_result(index, result) is called as each scan completes, with the
+        progress line cleared so it can print; the number of results is
+        returned.
+        """
+        completed = 0
+        total = len(urls) if hasattr(urls, '__len__') else None
+        
+        workers = self.describe_workers()
+        if workers:
+            print(f"{Colors.CYAN}[*] {workers}{Colors.RESET}")
+        
+        progress = ''
+        for completed, (index, result) in enumerate(self.iter_scan(urls, skip), 1):
+            self.metrics.observe(result)
+            if on_result:
+                if progress:
+                    print(f"\r{' ' * len(progress)}\r", end="")
+                on_result(index, result)
+            if self.events:
+                self.events.result(index, result)
+            if total:
+                progress = f"[*] Progress: {completed}/{total} ({(completed/total)*100:.1f}%)"
+            else:
+                progress = f"[*] Progress: {completed} scanned"
+            print(f"\r{Colors.CYAN}{progress}{Colors.RESET}", end="", flush=True)
+        
+        print()  # New line after progress
+        return completed
+    
+    def print_summary(self, results: Union['ResultColumns', List[ScanRecord]]):
+        """Print a comprehensive summary of all scans from a ResultColumns store or a list of results."""
+        print_section_header("SCAN SUMMARY")
+        
+        columns = results
+        if not isinstance(columns, ResultColumns):
+            columns = ResultColumns.from_records(results, self.rules.names)
+        print_columns_summary(columns.summary())
+        
+        samples = self.stats.get('sample_scans')
+        if samples:
+            print(f"\n{Colors.BOLD}[+] ORIGIN SAMPLING{Colors.RESET}")
+            print(f"{Colors.WHITE}[*] Origins Sampled: {self.stats.get('origins_sampled')} "
+                  f"({samples} sample scans){Colors.RESET}")
+            print(f"{Colors.GREEN}[+] Extrapolated Results: {self.stats.get('extrapolated')} "
+                  f"(scans avoided){Colors.RESET}")
+            print(f"{Colors.YELLOW}[!] Escalated to Full Scan: {self.stats.get('origins_escalated')} "
+                  f"origins whose samples differed or failed{Colors.RESET}")
+        
+        if self.cache:
+            hits = self.stats.get('cache_hits')
+            revalidated = self.stats.get('cache_revalidated')
+            misses = self.stats.get('cache_misses')
+            lookups = hits + revalidated + misses
+            print(f"\n{Colors.BOLD}[+] RESULT CACHE{Colors.RESET}")
+            print(f"{Colors.GREEN}[+] Fresh Hits: {hits}{Colors.RESET}")
+            print(f"{Colors.GREEN}[+] Revalidated (304): {revalidated}{Colors.RESET}")
+            print(f"{Colors.YELLOW}[*] Misses: {misses}{Colors.RESET}")
+            if lookups:
+                print(f"{Colors.BLUE}[*] Hit Rate: {(hits + revalidated) / lookups * 100:.1f}%{Colors.RESET}")
+    
+    def save_to_csv(self, results: List[ScanRecord], filename: str):
+        """Save detailed results to CSV file with one row per missing header."""
+        if not filename.endswith('.csv'):
+            filename += '.csv'
+        
+        csv_data = []
+        for result in results:
+            csv_data.extend(result_to_csv_rows(result))
+        
+        with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=CSV_FIELDNAMES)
+            writer.writeheader()
+            writer.writerows(csv_data)
+        
+        print(f"\n{Colors.GREEN}[+] Results saved to: {filename}{Colors.RESET}")
+        print(f"{Colors.BLUE}[*] Total records: {len(csv_data)}{Colors.RESET}")
+    
+    def print_headers_reference(self):
+        """Print detailed security headers reference."""
+        print_rules_reference(self.rules)
+
+class AsyncScanError(Exception):
+    """Raised when the asyncio engine cannot complete a request."""
+
+class AsyncResponse:
+    """Minimal response object produced by the asyncio engine."""
+
+    def __init__(self, url: str, status_code: int, headers: requests.structures.CaseInsensitiveDict):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.history = []
+
+class AsyncSecurityHeadersScanner(SecurityHeadersScanner):
+    """Scanner that keeps thousands of requests in flight on a single asyncio loop."""
+
+    REDIRECT_CODES = (301, 302, 303, 307, 308)
+    MAX_REDIRECTS = 30
+    MAX_HEADER_BYTES = 1024 * 1024
+
+    def __init__(self, max_connections: int = 500, max_per_host: int = 10, **options):
+        super().__init__(**options)
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.request_headers = self._build_request_headers()
+        self.request_headers['Connection'] = 'close'
+        self._host_limits = {}
+
+        # Certificates are not verified, matching verify=False in the requests engine
+        self._ssl_context = ssl.create_default_context()
+        self._ssl_context.check_hostname = False
+        self._ssl_context.verify_mode = ssl.CERT_NONE
+
+    def _host_limit(self, host: str) -> asyncio.Semaphore:
+        """Get the semaphore bounding concurrent connections to a host."""
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = self._host_limits[host] = asyncio.Semaphore(self.max_per_host)
+        return limit
+
+    def _backoff_time(self, attempt: int) -> float:
+        """Backoff before retry number attempt, following urllib3's Retry schedule."""
+        if attempt <= 1:
+            return 0
+        return min(self.RETRY_BACKOFF_FACTOR * (2 ** (attempt - 1)), 120)
+
+    def _retry_after(self, headers: requests.structures.CaseInsensitiveDict) -> Optional[float]:
+        """Parse a Retry-After header into seconds, if present."""
+        value = headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return max(float(value), 0)
+        except ValueError:
+            pass
+        try:
+            return max(email_utils.parsedate_to_datetime(value).timestamp() - time.time(), 0)
+        except (TypeError, ValueError):
+            return None
+
+    def _build_request(self, method: str, parsed, extra_headers: Optional[Dict[str, str]] = None) -> bytes:
+        """Serialize an HTTP/1.1 request for the given parsed URL."""
+        target = parsed.path or '/'
+        if parsed.query:
+            target += '?' + parsed.query
+        host = parsed.netloc.rsplit('@', 1)[-1]
+        if not host.isascii():
+            try:
+                host = parsed.hostname.encode('idna').decode('ascii')
+                if parsed.port:
+                    host += f":{parsed.port}"
+            except (ValueError, UnicodeError) as e:
+                raise AsyncScanError(f"Invalid host '{host}': {e}") from e
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {host}"]
+        lines.extend(f"{name}: {value}" for name, value in self.request_headers.items())
+        if extra_headers:
+            lines.extend(f"{name}: {value}" for name, value in extra_headers.items())
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1', 'replace')
+
+    def _parse_response_head(self, raw: bytes) -> Tuple[int, requests.structures.CaseInsensitiveDict]:
+        """Parse a raw status line and header block."""
+        lines = raw.decode('iso-8859-1').split('\r\n')
+        parts = lines[0].split(' ', 2)
+        if len(parts) < 2 or not parts[0].startswith('HTTP/') or not parts[1].isdigit():
+            raise AsyncScanError(f"Invalid status line: {lines[0][:80]!r}")
+
+        headers = requests.structures.CaseInsensitiveDict()
+        for line in lines[1:]:
+            name, sep, value = line.partition(':')
+            if not sep:
+                continue
+            name, value = name.strip(), value.strip()
+            # Repeated headers are folded the same way http.client does
+            if name in headers:
+                headers[name] = f"{headers[name]}, {value}"
+            else:
+                headers[name] = value
+        return int(parts[1]), headers
+
+    async def _connect_socket(self, addresses: List[Tuple]) -> socket.socket:
+        """Connect a non-blocking socket to the first reachable resolved address."""
+        loop = asyncio.get_running_loop()
+        error = OSError("No addresses to connect to")
+        for family, kind, proto, _, address in addresses:
+            sock = socket.socket(family, kind, proto)
+            sock.setblocking(False)
+            try:
+                await loop.sock_connect(sock, address)
+                return sock
+            except OSError as e:
+                sock.close()
+                error = e
+            except BaseException:
+                sock.close()
+                raise
+        raise error
+
+    async def _open_connection(self, host: str, port: int, use_tls: bool
+                               ) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """Resolve, connect and handshake as separate steps so each can be timed."""
+        started = time.perf_counter()
+        addresses = with_port(await self._resolve(host), port)
+        resolved = time.perf_counter()
+        add_scan_time('dns', resolved - started)
+        sock = await self._connect_socket(addresses)
+        connected = time.perf_counter()
+        add_scan_time('connect', connected - resolved)
+        try:
+            streams = await asyncio.open_connection(
+                sock=sock,
+                ssl=self._ssl_context if use_tls else None,
+                server_hostname=host if use_tls else None,
+                limit=self.MAX_HEADER_BYTES
+            )
+        except BaseException:
+            sock.close()
+            raise
+        if use_tls:
+            add_scan_time('tls', time.perf_counter() - connected)
+        return streams
+
+    async def _resolve(self, host: str) -> List[Tuple]:
+        """Cached getaddrinfo() entries for host, resolving on the default executor on a miss."""
+        entries = DNS_CACHE.resolve(host, wait=False)
+        if entries is None:
+            entries = await asyncio.get_running_loop().run_in_executor(None, DNS_CACHE.resolve, host)
+        return entries
+
+    async def _preresolve_async(self, normalized_url: str):
+        """Resolve the host before requesting, so a name that does not exist fails without retries."""
+        host = url_hostname(normalized_url)
+        if not host:
+            return
+        started = time.perf_counter()
+        try:
+            await self._resolve(host)
+        except socket.gaierror as e:
+            if e.errno in DnsCache.NEGATIVE_ERRORS:
+                self.stats.incr('dns_failed_fast')
+                raise HostResolutionError(host, e) from e
+        except (OSError, UnicodeError):
+            pass  # transient or malformed: the request reports it as usual
+        finally:
+            add_scan_time('dns', time.perf_counter() - started)
+
+    async def _read_body(self, reader: asyncio.StreamReader, headers: requests.structures.CaseInsensitiveDict,
+                         timeout: float) -> int:
+        """Read and discard a response body, returning its size in bytes."""
+        length = headers.get('Content-Length', '')
+        if length.isdigit():
+            await asyncio.wait_for(reader.readexactly(int(length)), timeout)
+            return int(length)
+        # Connection: close was requested, so the body ends at EOF
+        size = 0
+        while True:
+            chunk = await asyncio.wait_for(reader.read(65536), timeout)
+            if not chunk:
+                return size
+            size += len(chunk)
+
+    async def _request_once(self, method: str, url: str, read_body: bool = False,
+                            extra_headers: Optional[Dict[str, str]] = None
+                            ) -> Tuple[int, requests.structures.CaseInsensitiveDict, Optional[int]]:
+        """Send one request and read the response headers, and the body if asked to."""
+        # A malformed URL, port or host name is this URL's error, as the requests engine reports it
+        try:
+            parsed = urlparse(url)
+            if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+                raise AsyncScanError(f"Invalid URL '{url}'")
+            use_tls = parsed.scheme == 'https'
+            port = parsed.port or (443 if use_tls else 80)
+            parsed.hostname.encode('idna')
+        except (ValueError, UnicodeError) as e:
+            raise AsyncScanError(f"Invalid URL '{url}': {e}") from e
+        async with self._host_limit(parsed.hostname):
+            connect_timeout, read_timeout = self._timeouts()
+            reader, writer = await asyncio.wait_for(
+                self._open_connection(parsed.hostname, port, use_tls),
+                connect_timeout
+            )
+            try:
+                self.stats.incr('connections_opened')
+                writer.write(self._build_request(method, parsed, extra_headers))
+                await asyncio.wait_for(writer.drain(), read_timeout)
+                sent = time.perf_counter()
+                try:
+                    raw = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), read_timeout)
+                finally:
+                    add_scan_time('ttfb', time.perf_counter() - sent)
+                status, headers = self._parse_response_head(raw)
+                downloaded = None
+                if read_body and method != 'HEAD' and status not in (204, 304):
+                    started = time.perf_counter()
+                    try:
+                        downloaded = await self._read_body(reader, headers, read_timeout)
+                    finally:
+                        add_scan_time('transfer', time.perf_counter() - started)
+            finally:
+                # Unread bodies are not needed, so drop the connection without a TLS shutdown
+                writer.transport.abort()
+        return status, headers, downloaded
+
+    async def _backoff(self, seconds: float):
+        """Sleep before a retry, adding the wait to the scan being timed."""
+        remaining = self._deadline_remaining()
+        if remaining is not None:
+            seconds = min(seconds, remaining)
+        started = time.perf_counter()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            add_scan_time('backoff', time.perf_counter() - started)
+
+    async def _request(self, method: str, url: str, read_body: bool = False,
+                       extra_headers: Optional[Dict[str, str]] = None
+                       ) -> Tuple[int, requests.structures.CaseInsensitiveDict, Optional[int]]:
+        """Send a request applying the shared retry policy."""
+        attempt = 0
+        record = _timed_scan.get()
+        while True:
+            self.stats.incr('attempts')
+            if record is not None:
+                record.attempts += 1
+            try:
+                status, headers, downloaded = await self._request_once(method, url, read_body, extra_headers)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError,
+                    asyncio.LimitOverrunError) as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    self.stats.incr('attempts_timed_out')
+                attempt += 1
+                if attempt > self.RETRY_TOTAL or self.past_deadline():
+                    reason = str(e) or e.__class__.__name__
+                    raise AsyncScanError(f"Max retries exceeded with url: {url} ({reason})") from e
+                await self._backoff(self._backoff_time(attempt))
+                continue
+
+            if status in self.RETRY_STATUSES:
+                if status == 429:
+                    self.stats.incr('attempts_throttled')
+                attempt += 1
+                if attempt > self.RETRY_TOTAL or self.past_deadline():
+                    raise AsyncScanError(
+                        f"Max retries exceeded with url: {url} (too many {status} error responses)"
+                    )
+                retry_after = self._retry_after(headers) if status in (429, 503) else None
+                await self._backoff(retry_after if retry_after is not None else self._backoff_time(attempt))
+                continue
+
+            return status, headers, downloaded
+
+    async def _follow(self, method: str, url: str, extra_headers: Optional[Dict[str, str]] = None
+                      ) -> Tuple[AsyncResponse, Optional[int], Optional[Tuple[Tuple, ScanRecord]]]:
+        """Request a URL following redirects like requests does, stopping at a destination already analyzed.
+        
+        Returns the response and its body size like the requests engine's
+        _follow(), plus the reused destination's (hops, result), if any.
+        """
+        read_body = self.fetch_mode == 'get'
+        history = []
+        for _ in range(self.MAX_REDIRECTS + 1):
+            status, headers, downloaded = await self._request(method, url, read_body, extra_headers)
+            response = AsyncResponse(url, status, headers)
+            location = headers.get('Location')
+            if status not in self.REDIRECT_CODES or not location:
+                response.history = history
+                return response, downloaded, None
+            url = urljoin(url, location)
+            reused = self.destinations.get(url)
+            if reused:
+                response.history = history
+                return response, None, reused
+            history.append(response)
+        raise AsyncScanError(f"Exceeded {self.MAX_REDIRECTS} redirects.")
+
+    async def _fetch(self, url: str, headers: Optional[Dict[str, str]] = None
+                     ) -> Tuple[AsyncResponse, Optional[Tuple[Tuple, ScanRecord]]]:
+        """Fetch a URL according to the configured fetch mode, as _follow() returns it."""
+        if self.fetch_mode == 'head':
+            response, _, reused = await self._follow('HEAD', url, headers)
+            if reused or response.status_code not in self.HEAD_FALLBACK_STATUSES:
+                if not reused:
+                    self._record_body(response.headers, None)
+                return response, reused
+            self.stats.incr('head_fallbacks')
+        response, downloaded, reused = await self._follow('GET', url, headers)
+        if not reused:
+            self._record_body(response.headers, downloaded)
+        return response, reused
+
+    async def scan_url_async(self, url: str) -> ScanRecord:
+        """Scan a single URL on the running event loop."""
+        normalized_url = self.normalize_url(url)
+        result = self._new_result(normalized_url)
+
+        entry = self._cache_lookup(normalized_url)
+        if entry and entry.fresh:
+            return entry.result
+
+        started = time.monotonic()
+        result.start_timing()
+        scanned = result
+        token = _timed_scan.set(result)
+        try:
+            await self._preresolve_async(normalized_url)
+            response, reused = await self._fetch(normalized_url, entry.conditional_headers() if entry else None)
+            scanned = self._complete_scan(normalized_url, entry, response, reused, result)
+        except (AsyncScanError, HostResolutionError) as e:
+            result.error = str(e)
+        finally:
+            _timed_scan.reset(token)
+
+        scanned.attempts, scanned.timings = result.attempts, result.timings
+        scanned.elapsed = time.monotonic() - started
+        return scanned
+
+    def connection_stats(self) -> Tuple[int, int]:
+        """Return (connections opened, requests sent); every request uses its own connection."""
+        opened = self.stats.get('connections_opened')
+        return opened, opened
+
+    def scan_url(self, url: str) -> ScanRecord:
+        """Scan a single URL for security headers and policies."""
+        self._host_limits = {}
+        return asyncio.run(self.scan_url_async(url))
+
+    def _scan_source(self, source: Iterator[Tuple[int, str]]) -> Iterator[Tuple[int, ScanRecord]]:
+        """Scan (index, URL) pairs on a background event loop, yielding (index, result) as they complete.
+        
+        Results are handed over through a bounded asyncio.Queue. When the
+        consumer falls behind only the coroutines with a result to hand over
+        wait; the loop keeps serving the requests in flight, so a slow
+        consumer cannot stall their timeouts and rate limits. Memory stays
+        flat for any input size.
+        """
+        finished = object()
+        started = threading.Event()
+        failure = []
+        loop = task = results = None
+
+        async def scan():
+            nonlocal loop, task, results
+            loop, task = asyncio.get_running_loop(), asyncio.current_task()
+            results = asyncio.Queue(maxsize=self.max_connections)
+            started.set()
+            try:
+                await self._scan_all(source, results.put)
+            except Exception as e:
+                failure.append(e)
+            await results.put(finished)
+            # Keep the loop up until the consumer has taken everything
+            await results.join()
+
+        async def take() -> List:
+            """Every result ready, waiting for one if there is none."""
+            items = [await results.get()]
+            while not results.empty():
+                items.append(results.get_nowait())
+            for _ in items:
+                results.task_done()
+            return items
+
+        def run():
+            try:
+                self._host_limits = {}
+                asyncio.run(scan())
+            except BaseException as e:
+                failure.append(e)
+            finally:
+                started.set()
+
+        loop_thread = threading.Thread(target=run, name='async-scan-loop', daemon=True)
+        loop_thread.start()
+        started.wait()
+        done = results is None
+        try:
+            while not done:
+                try:
+                    items = asyncio.run_coroutine_threadsafe(take(), loop).result()
+                except (RuntimeError, futures.CancelledError):
+                    break  # the loop stopped without handing over its end
+                for item in items:
+                    if item is finished:
+                        done = True
+                        break
+                    yield item
+        finally:
+            # The consumer stopped early: nothing will take the remaining results. A
+            # cancellation that lands as an asyncio.wait_for completes is lost, so repeat it
+            while not done and loop_thread.is_alive():
+                try:
+                    loop.call_soon_threadsafe(task.cancel)
+                except RuntimeError:
+                    pass
+                loop_thread.join(0.1)
+            loop_thread.join()
+        if failure:
+            raise failure[0]
+
+    def describe_workers(self) -> Optional[str]:
+        """Describe the workers a batch scan starts, if worth announcing."""
+        return f"Starting asyncio engine with up to {self.max_connections} concurrent connections"
+
+    async def _scan_all(self, source: Iterator[Tuple[int, str]], emit) -> None:
+        """Run a fixed pool of worker coroutines fed by the host scheduler."""
+        scheduler = self.scheduler
+        released = asyncio.Event()
+        exhausted = stopped = False
+
+        def refill() -> List[Tuple[int, ScanRecord]]:
+            """Pull URLs into the scheduler, returning the results answered without a scan."""
+            nonlocal exhausted, stopped
+            answers = []
+            if not stopped and self.past_deadline():
+                stopped = exhausted = True
+                self._skip_remaining(source)
+                released.set()
+            if not exhausted:
+                wanted = scheduler.lookahead - scheduler.buffered
+                pulled = 0
+                for index, url in islice(source, wanted):
+                    pulled += 1
+                    answered = self._answer_on_refill(url)
+                    if answered:
+                        answers.append((index, answered))
+                        continue
+                    self._prefetch(url)
+                    scheduler.add(index, url)
+                    if self.events:
+                        self.events.queued(index, url)
+                exhausted = pulled < wanted
+            return answers
+
+        async def worker():
+            # Scheduler calls never yield to the loop, so the coroutines need no locking;
+            # handing a result over may wait for the consumer, so it comes after them
+            while True:
+                for answer in refill():
+                    await emit(answer)
+                now = time.monotonic()
+                item = scheduler.next_ready(now)
+                if item is None:
+                    if exhausted and not scheduler.buffered:
+                        return
+                    # Sleep until a host gets a token or a running scan frees a slot
+                    released.clear()
+                    wakeup = scheduler.next_wakeup()
+                    try:
+                        await asyncio.wait_for(released.wait(), self._wait_time(wakeup, now, stopped))
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                index, url, key, queued_at = item
+                answered = self._answer_on_dispatch(index, url, key)
+                if answered:
+                    scheduler.release(key, refund=True)
+                    released.set()
+                    await emit((index, answered))
+                    continue
+                if self.events:
+                    self.events.scan_started(index, url)
+                try:
+                    result = await self.scan_url_async(url)
+                finally:
+                    scheduler.release(key)
+                    released.set()
+                result.add_time('queue', now - queued_at)
+                skipped = self._record_outcome(index, key, result)
+                await emit((index, result))
+                for item in skipped:
+                    await emit(item)
+
+        await asyncio.gather(*(worker() for _ in range(max(1, self.max_connections))))
+
+# Scanner of the current worker process in --processes mode
+_shard_scanner = None
+
+def _init_shard_worker(scanner_cls, scanner_options: Dict, pool_hosts: Optional[int],
+                       colors_enabled: bool):
+    """Build the scanner a worker process reuses for every shard it receives."""
+    global _shard_scanner
+    # Ctrl+C is handled by the parent, which cancels outstanding shards
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if not colors_enabled:
+        disable_colors()
+    _shard_scanner = scanner_cls(**scanner_options)
+    _shard_scanner.size_pools(pool_hosts)
+
+def _scan_shard(shard: List[Tuple[int, str]], verbose: bool):
+    """Scan one shard in a worker process, rendering the results there too."""
+    scanner = _shard_scanner
+    before = scanner.stats.snapshot()
+    scanned = [
+        (shard[position][0], result, scanner.format_scan_result(result, verbose))
+        for position, result in scanner.iter_scan(url for _, url in shard)
+    ]
+    after = scanner.stats.snapshot()
+    stats = {name: value - before.get(name, 0) for name, value in after.items()}
+    return scanned, stats, (os.getpid(), scanner.connection_stats())
+
+class ProcessPoolScanner(SecurityHeadersScanner):
+    """Shards the URL stream across worker processes that each run their own scanner.
+    
+    Every worker process builds one scanner_cls instance, so a thread pool
+    (or asyncio loop) runs per process and rule evaluation and result
+    rendering are spread over all cores. The parent only reads input, merges
+    statistics and writes output.
+    
+    Duplicate input lines are removed by the parent before sharding, and
+    every URL of a registered domain is sent to the same worker process.
+    Its scheduler applies that domain's rate limits, circuit breakers and
+    origin sampling, and its redirect destinations are reused, exactly as
+    in a single process. The run deadline is an absolute time shared by all of them.
+    
+    Ordering: results arrive in shard completion order, and within a shard
+    in scan completion order, so output is not in input order. iter_scan
+    yields each result with its input index for callers that need to
+    restore it. Summaries and output files contain every result exactly
+    once whatever the order.
+    """
+    
+    # Scanner options understood by the base class, used for the parent instance
+    BASE_OPTIONS = ('timeout', 'user_agent', 'proxy', 'delay', 'threads', 'fetch_mode',
+                    'session_per_thread', 'cache', 'host_rate', 'host_concurrency', 'rate_key',
+                    'autotune', 'rules', 'capture_headers', 'connect_timeout', 'read_timeout',
+                    'breaker_threshold', 'breaker_cooldown', 'deadline', 'origin_sample', 'events')
+    
+    def __init__(self, processes: int, scanner_cls=SecurityHeadersScanner,
+                 verbose: bool = False, shard_size: Optional[int] = None, **scanner_options):
+        super().__init__(**{name: value for name, value in scanner_options.items()
+                            if name in self.BASE_OPTIONS})
+        self.processes = processes
+        # Each worker process tunes its own thread pool
+        self.controller = None
+        self.scanner_cls = scanner_cls
+        self.verbose = verbose
+        # Share one User-Agent across workers instead of one random pick per process;
+        # events are emitted by this process only
+        self.scanner_options = dict(scanner_options, user_agent=self.user_agent, events=None)
+        self.shard_size = shard_size or max(64, self.threads * 16)
+        self.pool_hosts = None
+        # (result, text rendered by the worker process) of the result being yielded
+        self._rendered = None
+        self._worker_connections = {}
+    
+    def size_pools(self, host_count: Optional[int] = None):
+        """Record the host count so worker processes size their own pools."""
+        self.pool_hosts = host_count
+        super().size_pools(host_count)
+    
+    def describe_workers(self) -> Optional[str]:
+        """Describe the workers a batch scan starts, if worth announcing."""
+        if issubclass(self.scanner_cls, AsyncSecurityHeadersScanner):
+            per_process = "an asyncio engine each"
+        elif self.autotune:
+            per_process = f"auto-tuned threads each, up to {self.threads}"
+        else:
+            per_process = f"{self.threads} threads each"
+        return f"Starting {self.processes} processes ({self.shard_size} URLs per shard, {per_process})"
+    
+    def connection_stats(self) -> Tuple[int, int]:
+        """Return (connections opened, requests sent) summed over worker processes."""
+        connections = sum(opened for opened, _ in self._worker_connections.values())
+        requests_sent = sum(sent for _, sent in self._worker_connections.values())
+        return connections, requests_sent
+    
+    def _lane(self, url: str) -> int:
+        """Worker process a URL is scanned by, the same for every URL of a registered domain."""
+        host = url_hostname(url if '://' in url else '//' + url) or url
+        return hash(registered_domain(host)) % self.processes
+    
+    def _scan_source(self, source: Iterator[Tuple[int, str]]) -> Iterator[Tuple[int, ScanRecord]]:
+        """Scan (index, URL) shards in worker processes, yielding (index, result) as shards complete.
+        
+        Each worker process has its own lane of URLs. A lane's shard is sent
+        once it is full, or earlier if the process would otherwise sit idle.
+        """
+        colors_enabled = bool(Colors.RESET)
+        lanes = [
+            futures.ProcessPoolExecutor(
+                max_workers=1,
+                initializer=_init_shard_worker,
+                initargs=(self.scanner_cls, self.scanner_options, self.pool_hosts, colors_enabled)
+            )
+            for _ in range(self.processes)
+        ]
+        buckets = [[] for _ in lanes]
+        in_flight = [0] * len(lanes)
+        pending = {}    # future of a shard -> its lane
+        buffered = 0
+        exhausted = stopped = False
+        
+        try:
+            while True:
+                # Shards already submitted count their own skipped URLs in the workers
+                if not stopped and self.past_deadline():
+                    stopped = exhausted = True
+                    self.stats.incr('deadline_skipped', sum(1 for _ in source))
+                # Read ahead at most a shard per process beyond the shards submitted
+                while not exhausted and buffered < self.processes * self.shard_size:
+                    item = next(source, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    buckets[self._lane(item[1])].append(item)
+                    buffered += 1
+                # Two shards per process keep workers busy without reading far ahead
+                for lane, bucket in enumerate(buckets):
+                    while bucket and in_flight[lane] < 2 and (
+                            len(bucket) >= self.shard_size or exhausted or not in_flight[lane]):
+                        shard = bucket[:self.shard_size]
+                        del bucket[:self.shard_size]
+                        buffered -= len(shard)
+                        pending[lanes[lane].submit(_scan_shard, shard, self.verbose)] = lane
+                        in_flight[lane] += 1
+                        if self.events:
+                            for index, url in shard:
+                                self.events.queued(index, url)
+                if not pending:
+                    return
+                
+                done, _ = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+                for future in done:
+                    in_flight[pending.pop(future)] -= 1
+                    scanned, stats, (pid, connections) = future.result()
+                    self.stats.merge(stats)
+                    self._worker_connections[pid] = connections
+                    # The text is only kept while its result is being consumed
+                    for index, result, rendered in scanned:
+                        self._rendered = (result, rendered)
+                        yield index, result
+                    self._rendered = None
+        finally:
+            self._rendered = None
+            for future in pending:
+                future.cancel()
+            for executor in lanes:
+                executor.shutdown(wait=not pending)
+    
+    def print_scan_result(self, result: ScanRecord, verbose: bool = False):
+        """Print a result with the text rendered by its worker process, if it is the one being yielded."""
+        # Duplicates and replayed checkpoint results were not rendered by a worker
+        if self._rendered and self._rendered[0] is result and verbose == self.verbose:
+            print(self._rendered[1])
+        else:
+            super().print_scan_result(result, verbose)
+
+class ResultSink:
+    """Output file written incrementally by a dedicated writer thread.
+    
+    write() blocks once buffer_size results are queued, bounding memory when
+    the disk is slower than the scan. The file is flushed every
+    flush_interval seconds, and fsynced too when fsync is set.
+    """
+    
+    extension = ''
+    _CLOSE = object()
+    
+    def __init__(self, filename: str, flush_interval: float = 1.0, fsync: bool = False,
+                 buffer_size: int = 1000):
+        if not filename.endswith(self.extension):
+            filename += self.extension
+        self.filename = filename
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.records = 0
+        self.error = None
+        self._queue = queue.Queue(maxsize=buffer_size)
+        self._file = self._open()
+        self._thread = threading.Thread(target=self._run, name='result-sink', daemon=True)
+        self._thread.start()
+    
+    def _open(self):
+        """Open the output file and write any preamble."""
+        raise NotImplementedError
+    
+    def _write(self, result: ScanRecord) -> int:
+        """Write one result, returning the number of records written."""
+        raise NotImplementedError
+    
+    def _flush(self):
+        """Push buffered data to the OS, and to disk when fsync is enabled."""
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+    
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = None
+            if item is self._CLOSE:
+                break
+            try:
+                if item is not None and self.error is None:
+                    self.records += self._write(item)
+                if time.monotonic() - last_flush >= self.flush_interval:
+                    self._flush()
+                    last_flush = time.monotonic()
+            except (OSError, ValueError) as e:
+                self.error = e
+        try:
+            self._flush()
+        except (OSError, ValueError) as e:
+            self.error = self.error or e
+        self._file.close()
+    
+    def write(self, result: ScanRecord):
+        """Queue a result for writing."""
+        if self.error:
+            raise OSError(f"Writing {self.filename} failed: {self.error}")
+        self._queue.put(result)
+    
+    def close(self):
+        """Write out queued results and close the file."""
+        if self._thread.is_alive():
+            self._queue.put(self._CLOSE)
+            self._thread.join()
+        if self.error:
+            raise OSError(f"Writing {self.filename} failed: {self.error}")
+
+class CsvResultSink(ResultSink):
+    """CSV sink with the same one-row-per-missing-header layout as save_to_csv."""
+    
+    extension = '.csv'
+    
+    def _open(self):
+        f = open(self.filename, 'w', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(f, fieldnames=CSV_FIELDNAMES)
+        self._writer.writeheader()
+        return f
+    
+    def _write(self, result: ScanRecord) -> int:
+        rows = result_to_csv_rows(result)
+        self._writer.writerows(rows)
+        return len(rows)
+
+class JsonlResultSink(ResultSink):
+    """JSON Lines sink with one complete scan result per line."""
+    
+    extension = '.jsonl'
+    
+    def _open(self):
+        return open(self.filename, 'w', encoding='utf-8')
+    
+    def _write(self, result: ScanRecord) -> int:
+        self._file.write(json.dumps(result.to_dict(), separators=(',', ':')) + '\n')
+        return 1
+
+class BinaryResultSink(ResultSink):
+    """Compact columnar sink, read back with iter_binary_results().
+    
+    After a JSON preamble naming the header bits, results are written in
+    blocks. Each block holds a row count, then the score, status code and
+    present-header bitmask columns, then length-prefixed URL and error strings.
+    """
+    
+    extension = '.shrb'
+    MAGIC = b'SHRB\x01'
+    BLOCK_ROWS = 4096
+    
+    def __init__(self, filename: str, header_names: List[str], **kwargs):
+        self.header_names = tuple(header_names)
+        self._bits = {name: 1 << i for i, name in enumerate(self.header_names)}
+        self._block = []
+        super().__init__(filename, **kwargs)
+    
+    def _open(self):
+        f = open(self.filename, 'wb')
+        preamble = json.dumps({'headers': list(self.header_names)}).encode('utf-8')
+        f.write(self.MAGIC + struct.pack('<I', len(preamble)) + preamble)
+        return f
+    
+    def _write(self, result: ScanRecord) -> int:
+        names = result.rules.names
+        if names == self.header_names:
+            mask = result.present
+        else:
+            mask = 0
+            for i, name in enumerate(names):
+                if result.present >> i & 1:
+                    mask |= self._bits.get(name, 0)
+        self._block.append((result.security_score, result.status_code or 0, mask,
+                            result.url, result.error or ''))
+        if len(self._block) >= self.BLOCK_ROWS:
+            self._write_block()
+        return 1
+    
+    def _write_block(self):
+        if not self._block:
+            return
+        scores, statuses, masks, urls, errors = zip(*self._block)
+        count = len(self._block)
+        parts = [struct.pack('<I', count),
+                 struct.pack(f'<{count}h', *scores),
+                 struct.pack(f'<{count}H', *statuses),
+                 struct.pack(f'<{count}Q', *masks)]
+        for text in urls + errors:
+            data = text.encode('utf-8')
+            parts.append(struct.pack('<I', len(data)) + data)
+        self._file.write(b''.join(parts))
+        self._block = []
+    
+    def _flush(self):
+        self._write_block()
+        super()._flush()
+
+def iter_binary_results(filename: str) -> Iterator[Dict]:
+    """Read results written by BinaryResultSink."""
+    with open(filename, 'rb') as f:
+        if f.read(len(BinaryResultSink.MAGIC)) != BinaryResultSink.MAGIC:
+            raise ValueError(f"'{filename}' is not a binary results file")
+        preamble_size, = struct.unpack('<I', f.read(4))
+        header_names = json.loads(f.read(preamble_size))['headers']
+        
+        def read_strings(count):
+            strings = []
+            for _ in range(count):
+                size, = struct.unpack('<I', f.read(4))
+                strings.append(f.read(size).decode('utf-8'))
+            return strings
+        
+        while True:
+            raw_count = f.read(4)
+            if len(raw_count) < 4:
+                return
+            count, = struct.unpack('<I', raw_count)
+            scores = struct.unpack(f'<{count}h', f.read(2 * count))
+            statuses = struct.unpack(f'<{count}H', f.read(2 * count))
+            masks = struct.unpack(f'<{count}Q', f.read(8 * count))
+            urls = read_strings(count)
+            errors = read_strings(count)
+            for i in range(count):
+                yield {
+                    'url': urls[i],
+                    'status_code': statuses[i] or None,
+                    'security_score': scores[i],
+                    'present_headers': [name for bit, name in enumerate(header_names) if masks[i] >> bit & 1],
+                    'missing_headers': [name for bit, name in enumerate(header_names) if not masks[i] >> bit & 1],
+                    'error': errors[i] or None
+                }
+
+class CheckpointJournal(ResultSink):
+    """Append-only journal of completed scans backing --checkpoint and --resume.
+    
+    Each line records an input index and its result state. With resume set,
+    an existing journal is loaded into completed (in the order the scans
+    originally finished), a torn final line from a crash is cut off, and new
+    entries are appended after it.
+    """
+    
+    def __init__(self, filename: str, resume: bool = False, rules: RuleSet = DEFAULT_RULES, **kwargs):
+        self.resume = resume
+        self.rules = rules
+        self.completed = {}
+        super().__init__(filename, **kwargs)
+    
+    def _open(self):
+        if not (self.resume and os.path.exists(self.filename)):
+            return open(self.filename, 'wb')
+        
+        valid_size = 0
+        with open(self.filename, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                self.completed[entry['i']] = ScanRecord.from_state(entry['result'], self.rules)
+                valid_size += len(line)
+        
+        f = open(self.filename, 'r+b')
+        f.truncate(valid_size)
+        f.seek(valid_size)
+        return f
+    
+    def _write(self, item: Tuple[int, ScanRecord]) -> int:
+        index, result = item
+        line = json.dumps({'i': index, 'result': result.to_state()}, separators=(',', ':')) + '\n'
+        self._file.write(line.encode('utf-8'))
+        return 1
+
+RESULT_SINKS = {
+    'csv': CsvResultSink,
+    'jsonl': JsonlResultSink,
+    'binary': BinaryResultSink
+}
+
+class EventStream:
+    """Lifecycle events of a scan run written as newline-delimited JSON, for --events.
+    
+    Each event is one JSON object with its "event" name and "time"
+    (time.time()), flushed as soon as it happens:
+    
+      queued     a URL entered the scheduler (index, url)
+      started    its scan was handed to a worker (index, url)
+      completed  a scan succeeded (index, result)
+      error      a scan failed (index, url, error, result)
+      stats      every interval seconds: counts so far, overall and recent URLs/sec
+      finished   the run ended, or was interrupted
+    
+    Duplicate input lines and URLs answered without a request (circuit
+    breaker, unresolvable host, origin sampling) complete without being
+    queued or started. With --processes URLs are queued as their shard is
+    handed to a worker process, and no started events are emitted.
+    
+    Thread-safe: engines emit from their dispatcher thread or event loop and
+    stats come from a timer thread. Once writing fails (the reader went
+    away) further events are dropped and the error is kept in error.
+    """
+    
+    FORMATS = ('ndjson',)
+    
+    def __init__(self, stream, interval: float = 1.0):
+        self.interval = interval
+        self.counts = dict.fromkeys(('queued', 'started', 'completed', 'error'), 0)
+        self.error = None
+        self._stream = stream
+        self._lock = threading.Lock()
+        self._began = time.monotonic()
+        # (monotonic time, scans finished) at the previous stats event
+        self._previous = (self._began, 0)
+        self._stop = threading.Event()
+        self._ticker = threading.Thread(target=self._tick, name='event-stats', daemon=True)
+    
+    def start(self):
+        """Start the clock of the run and the periodic stats events."""
+        self._began = time.monotonic()
+        self._previous = (self._began, 0)
+        self._ticker.start()
+    
+    def emit(self, event: str, **fields):
+        line = json.dumps({'event': event, 'time': time.time(), **fields}, separators=(',', ':')) + '\n'
+        with self._lock:
+            if event in self.counts:
+                self.counts[event] += 1
+            if self.error:
+                return
+            try:
+                self._stream.write(line)
+                self._stream.flush()
+            except (OSError, ValueError) as e:
+                self.error = e
+    
+    def queued(self, index: int, url: str):
+        self.emit('queued', index=index, url=url)
+    
+    def scan_started(self, index: int, url: str):
+        self.emit('started', index=index, url=url)
+    
+    def result(self, index: int, result: ScanRecord):
+        """Emit a completed or error event carrying the full result."""
+        if result.error:
+            self.emit('error', index=index, url=result.url, error=result.error, result=result.to_dict())
+        else:
+            self.emit('completed', index=index, result=result.to_dict())
+    
+    def _throughput(self) -> Dict:
+        now = time.monotonic()
+        with self._lock:
+            counts = dict(self.counts)
+        finished = counts['completed'] + counts['error']
+        elapsed = now - self._began
+        last_time, last_finished = self._previous
+        self._previous = (now, finished)
+        return dict(counts, elapsed=round(elapsed, 3),
+                    urls_per_sec=round(finished / elapsed, 2) if elapsed > 0 else 0.0,
+                    recent_urls_per_sec=round((finished - last_finished) / (now - last_time), 2)
+                    if now > last_time else 0.0)
+    
+    def _tick(self):
+        while not self._stop.wait(self.interval):
+            self.emit('stats', **self._throughput())
+    
+    def close(self, interrupted: bool = False):
+        """Stop the stats events and emit the finished event."""
+        self._stop.set()
+        if self._ticker.is_alive():
+            self._ticker.join()
+        totals = self._throughput()
+        del totals['recent_urls_per_sec']
+        self.emit('finished', interrupted=interrupted, **totals)
+
+def open_url_source(filename: str) -> io.TextIOWrapper:
+    """Open a URL list as text; '-' reads stdin and gzip input is detected by its magic bytes."""
+    stream = sys.stdin.buffer if filename == '-' else open(filename, 'rb')
+    if stream.peek(2)[:2] == b'\x1f\x8b':
+        stream = gzip.GzipFile(fileobj=stream)
+    return io.TextIOWrapper(stream, encoding='utf-8')
+
+def iter_urls_from_file(filename: str) -> Iterator[str]:
+    """Stream URLs from a file, stdin or a gzip-compressed list without loading it into memory."""
+    if filename != '-' and not os.path.exists(filename):
+        print(f"{Colors.RED}[-] Error: File '{filename}' not found{Colors.RESET}")
+        sys.exit(1)
+    
+    try:
+        source = open_url_source(filename)
+        for line in source:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line
+        if filename != '-':
+            source.close()
+    except (OSError, EOFError, UnicodeDecodeError) as e:
+        print(f"\n{Colors.RED}[-] Error reading file '{filename}': {e}{Colors.RESET}")
+        sys.exit(1)
+
+def load_urls_from_file(filename: str) -> List[str]:
+    """Load URLs from a file with better error handling."""
+    urls = list(iter_urls_from_file(filename))
+    
+    if not urls:
+        print(f"{Colors.RED}[-] Error: No valid URLs found in '{filename}'{Colors.RESET}")
+        sys.exit(1)
+    
+    return urls
+
+def verify_checkpoint(urls: Iterable[str], completed: Dict[int, ScanRecord],
+                      scanner: SecurityHeadersScanner) -> Iterator[str]:
+    """Pass URLs through, exiting if the input no longer matches the checkpoint journal."""
+    for index, url in enumerate(urls):
+        result = completed.get(index)
+        if result is not None and result.url != scanner.normalize_url(url):
+            print(f"\n{Colors.RED}[-] Error: Checkpoint does not match input at line {index + 1} "
+                  f"({url} vs {result.url}){Colors.RESET}")
+            sys.exit(1)
+        yield url
+
+def print_baseline_diff(baseline: BaselineStore):
+    """Print the results that differ from the --baseline run, then the counts per kind of change."""
+    print_section_header("BASELINE DIFF")
+    styles = {'regressed': (Colors.RED, '[-]'), 'improved': (Colors.GREEN, '[+]'), 'changed': (Colors.YELLOW, '[!]')}
+    for kind, (color, symbol) in styles.items():
+        for change, url, details in baseline.changes:
+            if change == kind:
+                print(f"{color}{symbol} {kind.upper()}: {url}{Colors.RESET}")
+                print(f"{Colors.DIM}    {details}{Colors.RESET}")
+    counts = baseline.counts
+    print(f"\n{Colors.WHITE}[*] Regressed: {counts['regressed']}, Improved: {counts['improved']}, "
+          f"Changed: {counts['changed']}, New: {counts['new']}, Unchanged: {counts['unchanged']}{Colors.RESET}")
+
+def print_columns_summary(summary: Dict):
+    """Print the statistics computed by ResultColumns.summary()."""
+    if not summary['successful']:
+        return
+    print(f"{Colors.WHITE}[*] Total URLs Scanned: {summary['rows']}{Colors.RESET}")
+    print(f"{Colors.GREEN}[+] Successful Scans: {summary['successful']}{Colors.RESET}")
+    if summary['failed'] > 0:
+        print(f"{Colors.RED}[-] Failed Scans: {summary['failed']}{Colors.RESET}")
+    print(f"{Colors.BLUE}[*] Average Score: {summary['score_mean']:.1f}/100{Colors.RESET}")
+    print(f"{Colors.CYAN}[*] Highest Score: {summary['score_max']}/100{Colors.RESET}")
+    print(f"{Colors.YELLOW}[*] Lowest Score: {summary['score_min']}/100{Colors.RESET}")
+    percentiles = ', '.join(f"p{q} {value:.0f}" for q, value in summary['score_percentiles'].items())
+    print(f"{Colors.WHITE}[*] Score Percentiles: {percentiles}{Colors.RESET}")
+    latencies = ', '.join(f"p{q} {value:.2f}s" for q, value in summary['latency_percentiles'].items())
+    print(f"{Colors.WHITE}[*] Scan Latency: {latencies}{Colors.RESET}")
+    
+    print(f"\n{Colors.BOLD}[+] GRADE DISTRIBUTION{Colors.RESET}")
+    for grade in reversed(GRADES):
+        count = summary['grades'][grade]
+        if count:
+            print(f"{Colors.WHITE}[*] {grade}: {count} sites ({count / summary['successful'] * 100:.1f}%){Colors.RESET}")
+    
+    print(f"\n{Colors.BOLD}[+] STATUS CODES{Colors.RESET}")
+    for status, count in summary['status_codes'].items():
+        print(f"{Colors.WHITE}[*] {status}: {count}{Colors.RESET}")
+    
+    print(f"\n{Colors.BOLD}[+] HEADER ADOPTION{Colors.RESET}")
+    for name, count in sorted(summary['adoption'].items(), key=lambda item: -item[1]):
+        print(f"{Colors.WHITE}[*] {name:<35} {count / summary['successful'] * 100:5.1f}%{Colors.RESET}")
+    
+    if len(summary['domains']) > 1:
+        print(f"\n{Colors.BOLD}[+] TOP DOMAINS{Colors.RESET}")
+        for domain, count, failed, mean_score in summary['domains']:
+            average = f"avg score {mean_score:.1f}" if mean_score is not None else "no successful scans"
+            failures = f", {failed} failed" if failed else ""
+            print(f"{Colors.WHITE}[*] {domain:<35} {count} URLs, {average}{failures}{Colors.RESET}")
+
+class ScanProfiler:
+    """Runs cProfile or tracemalloc around a scan and attributes the results to scanner stages.
+    
+    Before Python 3.12 cProfile only sees the thread that enabled it, so every
+    thread started during the run gets its own profiler and the statistics
+    are merged; stage times are therefore summed over threads. tracemalloc
+    traces every thread, and each allocation still alive at the end of the
+    run is attributed to the innermost stage function on its traceback.
+    """
+    
+    MODES = ('cpu', 'alloc')
+    TRACEBACK_FRAMES = 32
+    TOP_ENTRIES = 40
+    
+    def __init__(self, mode: str, prefix: str):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown profile mode: {mode}")
+        self.mode = mode
+        self.raw_filename = prefix + ('.prof' if mode == 'cpu' else '.tracemalloc')
+        self.report_filename = prefix + '.txt'
+        self.stages = {}
+        self._profile = None
+        self._thread_profiles = []
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._peak = 0
+    
+    @staticmethod
+    def stage_functions() -> Dict[str, List]:
+        """Functions whose time and allocations make up each scanner stage."""
+        sinks = (ResultSink, CsvResultSink, JsonlResultSink, BinaryResultSink, CheckpointJournal)
+        return {
+            'URL loading': [iter_urls_from_file],
+            'normalize_url': [SecurityHeadersScanner.normalize_url],
+            'request': [SecurityHeadersScanner._fetch, AsyncSecurityHeadersScanner._fetch],
+            'rule evaluation': [SecurityHeadersScanner._analyze_response],
+            'rendering': [SecurityHeadersScanner.format_scan_result],
+            'output': [cls.__dict__[name] for cls in sinks for name in ('_write', '_write_block', '_flush')
+                       if name in cls.__dict__] + [SecurityHeadersScanner.save_to_csv]
+        }
+    
+    def start(self):
+        if self.mode == 'alloc':
+            tracemalloc.start(self.TRACEBACK_FRAMES)
+            return
+        # From 3.12 cProfile hooks sys.monitoring, which already sees every thread
+        if sys.version_info < (3, 12):
+            threading.setprofile(self._profile_thread)
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+    
+    def _profile_thread(self, frame, event, arg):
+        """First profile event of a new thread: hand the thread over to its own cProfile."""
+        profile = cProfile.Profile()
+        with self._lock:
+            self._thread_profiles.append(profile)
+        profile.enable()
+    
+    def stop(self):
+        if self.mode == 'alloc':
+            self._snapshot = tracemalloc.take_snapshot()
+            self._peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            return
+        self._profile.disable()
+        threading.setprofile(None)
+    
+    def save(self):
+        """Write the raw profile and the sorted text report, filling in stages."""
+        report = io.StringIO()
+        if self.mode == 'cpu':
+            self._cpu_report(report)
+        else:
+            self._alloc_report(report)
+        with open(self.report_filename, 'w', encoding='utf-8') as f:
+            f.write(report.getvalue())
+    
+    def _cpu_report(self, report: io.StringIO):
+        stats = pstats.Stats(self._profile, stream=report)
+        for profile in self._thread_profiles:
+            stats.add(profile)
+        stats.dump_stats(self.raw_filename)
+        
+        for stage, functions in self.stage_functions().items():
+            keys = {(f.__code__.co_filename, f.__code__.co_firstlineno, f.__code__.co_name) for f in functions}
+            seconds = calls = 0
+            for key in keys:
+                if key not in stats.stats:
+                    continue
+                _, total_calls, _, cumulative, callers = stats.stats[key]
+                # Calls from another function of the same stage are already inside its time
+                nested = [timing for caller, timing in callers.items() if caller in keys]
+                seconds += cumulative - sum(timing[3] for timing in nested)
+                calls += total_calls - sum(timing[1] for timing in nested)
+            self.stages[stage] = (seconds, calls)
+        
+        report.write(f"CPU profile, seconds summed over threads; {stats.total_tt:.3f}s profiled\n\n")
+        report.write(f"{'stage':<20} {'seconds':>10} {'calls':>10}\n")
+        for stage, (seconds, calls) in self.stages.items():
+            report.write(f"{stage:<20} {seconds:>10.3f} {calls:>10}\n")
+        report.write("\n")
+        stats.sort_stats('cumulative').print_stats(self.TOP_ENTRIES)
+        stats.sort_stats('tottime').print_stats(self.TOP_ENTRIES)
+    
+    def _alloc_report(self, report: io.StringIO):
+        snapshot = self._snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+        ))
+        snapshot.dump(self.raw_filename)
+        
+        stage_lines = {}
+        for stage, functions in self.stage_functions().items():
+            for function in functions:
+                lines, first = inspect.getsourcelines(function)
+                filename = function.__code__.co_filename
+                for lineno in range(first, first + len(lines)):
+                    stage_lines[(filename, lineno)] = stage
+        totals = {stage: [0, 0] for stage in self.stage_functions()}
+        for trace in snapshot.traces:
+            # Frames run from the oldest to the most recent call
+            for frame in reversed(trace.traceback):
+                stage = stage_lines.get((frame.filename, frame.lineno))
+                if stage:
+                    totals[stage][0] += trace.size
+                    totals[stage][1] += 1
+                    break
+        self.stages = {stage: tuple(total) for stage, total in totals.items()}
+        
+        statistics = snapshot.statistics('lineno')
+        live = sum(stat.size for stat in statistics)
+        report.write(f"Allocation profile: {format_bytes(live)} alive at the end of the run, "
+                     f"{format_bytes(self._peak)} peak\n\n")
+        report.write(f"{'stage':<20} {'bytes':>14} {'blocks':>10}\n")
+        for stage, (size, blocks) in self.stages.items():
+            report.write(f"{stage:<20} {size:>14} {blocks:>10}\n")
+        report.write(f"\nTop {self.TOP_ENTRIES} lines by live size\n")
+        for stat in statistics[:self.TOP_ENTRIES]:
+            report.write(f"{stat}\n")
+        report.write(f"\nTop {self.TOP_ENTRIES // 4} call stacks by live size\n")
+        for stat in snapshot.statistics('traceback')[:self.TOP_ENTRIES // 4]:
+            report.write(f"\n{stat.count} blocks, {format_bytes(stat.size)}\n")
+            report.write('\n'.join(stat.traceback.format(limit=12, most_recent_first=True)) + '\n')
+    
+    def print_report(self):
+        """Print the per-stage breakdown and where the files went."""
+        print_section_header(f"PROFILE ({self.mode})")
+        if self.mode == 'cpu':
+            print(f"{Colors.WHITE}[*] {'Stage':<20} {'Seconds':>10} {'Calls':>10}  (summed over threads){Colors.RESET}")
+            for stage, (seconds, calls) in self.stages.items():
+                print(f"{Colors.DIM}    {stage:<20} {seconds:>10.3f} {calls:>10}{Colors.RESET}")
+        else:
+            print(f"{Colors.WHITE}[*] {'Stage':<20} {'Live':>10} {'Blocks':>10}  (peak {format_bytes(self._peak)}){Colors.RESET}")
+            for stage, (size, blocks) in self.stages.items():
+                print(f"{Colors.DIM}    {stage:<20} {format_bytes(size):>10} {blocks:>10}{Colors.RESET}")
+        print(f"{Colors.GREEN}[+] Profile report saved to: {self.report_filename}{Colors.RESET}")
+        print(f"{Colors.GREEN}[+] Raw profile saved to: {self.raw_filename}{Colors.RESET}")
+    
+    def finish(self):
+        """Stop profiling, write the files and print the breakdown."""
+        self.stop()
+        try:
+            self.save()
+        except OSError as e:
+            print(f"\n{Colors.RED}[-] Error writing profile: {e}{Colors.RESET}")
+            return
+        self.print_report()
+
+class ScanJob:
+    """URLs submitted together to the scan service, with their results as they complete."""
+    
+    __slots__ = ('id', 'urls', 'results', 'completed', 'error', 'submitted', 'started', 'finished', 'done')
+    
+    def __init__(self, urls: List[str]):
+        self.id = os.urandom(8).hex()
+        self.urls = urls
+        # Results in submission order, None until scanned
+        self.results = [None] * len(urls)
+        self.completed = 0
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.done = threading.Event()
+    
+    @property
+    def status(self) -> str:
+        if self.done.is_set():
+            return 'failed' if self.error else 'done'
+        return 'running' if self.started else 'queued'
+    
+    def to_dict(self, results: bool = True) -> Dict:
+        """JSON-serializable job state, with the results completed so far unless results is False."""
+        job = {
+            'id': self.id,
+            'status': self.status,
+            'urls': len(self.urls),
+            'completed': self.completed,
+            'error': self.error,
+            'submitted': self.submitted,
+            'started': self.started,
+            'finished': self.finished
+        }
+        if results:
+            job['results'] = [result.to_dict() for result in self.results if result is not None]
+        return job
+
+class ScanService:
+    """Job queue of the serve mode, feeding every submitted URL to one long-lived scanner.
+    
+    Jobs wait in a queue of at most queue_size jobs; submit() raises
+    queue.Full beyond that, which the API answers with 429. A dispatcher
+    thread runs the scanner over the jobs it takes off the queue, so
+    sessions, connection pools, the DNS cache and the result cache stay
+    warm from one job to the next and host rate limits hold across jobs.
+    Jobs submitted while a pass is still pulling URLs join that pass; the
+    others start the next one. A finished job is kept until KEEP_JOBS
+    newer jobs have finished.
+    """
+    
+    KEEP_JOBS = 1000
+    # Largest number of URLs accepted in one job
+    MAX_JOB_URLS = 10000
+    
+    def __init__(self, scanner: SecurityHeadersScanner, queue_size: int = 100):
+        self.scanner = scanner
+        self.queue_size = queue_size
+        self.jobs = {}
+        self._finished = deque()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='scan-service', daemon=True)
+        self._thread.start()
+    
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize()
+    
+    def submit(self, urls: List[str]) -> ScanJob:
+        """Queue a job for the URLs; raises queue.Full when the queue is at capacity."""
+        job = ScanJob(urls)
+        with self._lock:
+            self.jobs[job.id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                del self.jobs[job.id]
+            raise
+        return job
+    
+    def get(self, job_id: str) -> Optional[ScanJob]:
+        with self._lock:
+            return self.jobs.get(job_id)
+    
+    def close(self):
+        """Stop starting scans, give the ones in flight up to the scan timeout to finish and stop."""
+        self._closed = True
+        # Reaching the run deadline ends the current pass and the retries of the scans in flight
+        self.scanner.deadline = time.time()
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self._thread.join(self.scanner.timeout)
+    
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None or self._closed:
+                return
+            jobs = []
+            slots = {}
+            try:
+                for index, result in self.scanner.iter_scan(self._pass_urls(job, jobs, slots)):
+                    owner, position = slots.pop(index)
+                    self.scanner.metrics.observe(result)
+                    owner.results[position] = result
+                    owner.completed += 1
+                    if owner.completed == len(owner.urls):
+                        self._finish(owner)
+            except Exception as e:
+                print(f"{Colors.RED}[-] Scan pass failed: {e}{Colors.RESET}")
+                for job in jobs:
+                    if not job.done.is_set():
+                        job.error = str(e)
+                        self._finish(job)
+    
+    def _pass_urls(self, job: ScanJob, jobs: List[ScanJob], slots: Dict) -> Iterator[str]:
+        """URLs of job and of the jobs queued while the pass pulls them, noting each one's (job, position)."""
+        index = 0
+        while True:
+            jobs.append(job)
+            job.started = time.time()
+            if not job.urls:
+                self._finish(job)
+            for position, url in enumerate(job.urls):
+                slots[index] = (job, position)
+                index += 1
+                yield url
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if job is None or self._closed:
+                return
+    
+    def _finish(self, job: ScanJob):
+        job.finished = time.time()
+        job.done.set()
+        with self._lock:
+            self._finished.append(job.id)
+            while len(self._finished) > self.KEEP_JOBS:
+                self.jobs.pop(self._finished.popleft(), None)
+
+def create_api_server(service: ScanService, address: Tuple[str, int]):
+    """HTTP server exposing the scan service as a JSON API.
+    
+    POST /scan takes {"url": URL} or {"urls": [URL, ...]} and answers 202
+    with the queued job, or 429 when the job queue is full. With "wait":
+    SECONDS it holds the response until the job is done or the time is up.
+    GET /jobs/ID returns a job and its results, GET /status the queue
+    depth and run counters.
+    """
+    
+    class ScanApiHandler(http_server.BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        server_version = 'SentinelHeaders'
+        # Headers and body go out as separate writes; without TCP_NODELAY kept-alive clients stall on delayed ACKs
+        disable_nagle_algorithm = True
+        # Request bodies larger than this are refused
+        MAX_BODY = 8 * 1024 * 1024
+        # Longest "wait" honoured for one request
+        MAX_WAIT = 300
+        
+        def do_GET(self):
+            path = urlsplit(self.path).path
+            if path == '/status':
+                self._send(200, {
+                    'queued': service.queued,
+                    'queue_size': service.queue_size,
+                    'jobs': len(service.jobs),
+                    'counters': service.scanner.run_counters()
+                })
+            elif path.startswith('/jobs/'):
+                job = service.get(path[len('/jobs/'):])
+                if job:
+                    self._send(200, job.to_dict())
+                else:
+                    self._send(404, {'error': 'Unknown job'})
+            else:
+                self._send(404, {'error': 'Not found'})
+        
+        def do_POST(self):
+            if urlsplit(self.path).path != '/scan':
+                self._send(404, {'error': 'Not found'})
+                return
+            # The body is left unread on every refusal, so the connection cannot be reused
+            length = (self.headers.get('Content-Length') or '0').strip()
+            if not (length.isascii() and length.isdigit()):
+                self.close_connection = True
+                self._send(400, {'error': 'Content-Length must be a non-negative integer'})
+                return
+            length = int(length)
+            if length > self.MAX_BODY:
+                self.close_connection = True
+                self._send(413, {'error': f'Request body larger than {self.MAX_BODY} bytes'})
+                return
+            try:
+                request = json.loads(self.rfile.read(length) or b'null')
+                urls = [request['url']] if 'url' in request else request['urls']
+                wait = min(float(request.get('wait', 0)), self.MAX_WAIT)
+            except (ValueError, TypeError, KeyError):
+                self._send(400, {'error': 'Expected a JSON object with "url" or "urls"'})
+                return
+            if not isinstance(urls, list) or not urls or not all(isinstance(url, str) and url.strip() for url in urls):
+                self._send(400, {'error': '"urls" must be a non-empty list of URLs'})
+                return
+            invalid = next((url for url in urls if not self._valid_url(url)), None)
+            if invalid is not None:
+                self._send(400, {'error': f'Invalid URL: {invalid}'})
+                return
+            if len(urls) > service.MAX_JOB_URLS:
+                self._send(413, {'error': f'At most {service.MAX_JOB_URLS} URLs per job'})
+                return
+            try:
+                job = service.submit([url.strip() for url in urls])
+            except queue.Full:
+                self._send(429, {'error': 'Job queue is full'}, {'Retry-After': '1'})
+                return
+            if wait > 0 and job.done.wait(wait):
+                self._send(200, job.to_dict())
+            else:
+                self._send(202, job.to_dict(results=False), {'Location': f'/jobs/{job.id}'})
+        
+        @staticmethod
+        def _valid_url(url: str) -> bool:
+            """Whether a URL parses to a host name and port an engine can request."""
+            try:
+                parts = urlsplit(canonical_url(url))
+                parts.port  # raises on a port that is not a number in range
+            except ValueError:
+                return False
+            return parts.scheme in DEFAULT_PORTS and bool(parts.hostname)
+        
+        def _send(self, status: int, document: Dict, headers: Optional[Dict[str, str]] = None):
+            body = json.dumps(document, separators=(',', ':')).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, format, *args):
+            pass
+    
+    class ScanApiServer(http_server.ThreadingHTTPServer):
+        daemon_threads = True
+        # Pending connections held by the kernel; the default of 5 resets bursts of clients
+        request_queue_size = 128
+    
+    return ScanApiServer(address, ScanApiHandler)
+
+def serve(scanner: SecurityHeadersScanner, address: Tuple[str, int], queue_size: int):
+    """Run the scan API until interrupted."""
+    service = ScanService(scanner, queue_size)
+    try:
+        server = create_api_server(service, address)
+    except OSError as e:
+        print(f"{Colors.RED}[-] Error listening on {address[0]}:{address[1]}: {e}{Colors.RESET}")
+        sys.exit(1)
+    host, port = server.server_address[:2]
+    print(f"{Colors.GREEN}[+] Scan API listening on http://{host}:{port} (queue of {queue_size} jobs){Colors.RESET}")
+    print(f"{Colors.BLUE}[*] POST /scan, GET /jobs/<id>, GET /status; Ctrl+C stops{Colors.RESET}")
+    # Container runtimes stop services with SIGTERM; shut down as on Ctrl+C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n{Colors.YELLOW}[!] Shutting down: finishing scans in flight{Colors.RESET}")
+    finally:
+        server.server_close()
+        service.close()
+
+# Number of leading URLs inspected to estimate the distinct host count
+HOST_SAMPLE_SIZE = 10000
+
+# Seconds between rewrites of the --metrics-file during a scan
+METRICS_INTERVAL = 15
+
+# Port the --serve API listens on when none is given
+SERVE_PORT = 8765
+
+def export_metrics(scanner: SecurityHeadersScanner, metrics_file: Optional[str],
+                   stats_json: Optional[str] = None, elapsed: Optional[float] = None):
+    """Write the scanner's metrics to the --metrics-file and --stats-json paths given."""
+    counters = scanner.run_counters()
+    exports = []
+    if metrics_file:
+        exports.append((metrics_file, lambda: scanner.metrics.to_prometheus(counters)))
+    if stats_json:
+        def document():
+            stats = scanner.metrics.to_dict(counters)
+            if elapsed is not None:
+                stats['elapsed_seconds'] = elapsed
+            return json.dumps(stats, indent=2) + '\n'
+        exports.append((stats_json, document))
+    for filename, render in exports:
+        try:
+            write_file_atomic(filename, render())
+        except OSError as e:
+            print(f"\n{Colors.RED}[-] Error writing metrics to '{filename}': {e}{Colors.RESET}")
+
+def parse_listen_address(value: str) -> Tuple[str, int]:
+    """Parse --serve: [HOST:]PORT, listening on localhost when no host is given."""
+    host, _, port = value.rpartition(':')
+    try:
+        port = int(port)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid port: {port!r}")
+    if not 0 <= port <= 65535:
+        raise argparse.ArgumentTypeError("port must be between 0 and 65535")
+    return host or '127.0.0.1', port
+
+def parse_threads(value: str):
+    """Parse --threads: a positive count or 'auto'."""
+    if value == 'auto':
+        return value
+    try:
+        threads = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid thread count: {value!r}")
+    if threads < 1:
+        raise argparse.ArgumentTypeError("thread count must be at least 1")
+    return threads
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(
+        description='HTTP Security Headers Scanner v3.0 - Professional security assessment tool',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=f"""
+{Colors.BOLD}USAGE EXAMPLES:{Colors.RESET}
+  %(prog)s -u https://example.com
+  %(prog)s -u example.com -v --delay 2
+  %(prog)s -f urls.txt -o security_report --threads 5
+  %(prog)s -f urls.txt --threads auto --max-threads 100
+  zcat targets.txt.gz | %(prog)s -f - --threads 20
+  %(prog)s -f websites.txt -v --proxy http://127.0.0.1:8080
+  %(prog)s -f inventory.txt --engine async --connections 2000 --fetch-mode head
+  %(prog)s --help-headers
+  %(prog)s serve 127.0.0.1:8765 --threads 20 --cache results.db
+
+{Colors.BOLD}SECURITY HEADERS CHECKED:{Colors.RESET}
+  [!] CRITICAL: Strict-Transport-Security, Content-Security-Policy
+  [!] HIGH:     X-Frame-Options, X-Content-Type-Options  
+  [!] MEDIUM:   Referrer-Policy, Permissions-Policy, Cache-Control
+  [!] LOW:      X-XSS-Protection
+        """
+    )
+    
+    # Main options
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('-u', '--url', help='Single URL to scan')
+    group.add_argument('-f', '--file', help="File containing URLs (one per line); '-' reads stdin, .gz lists are decompressed")
+    group.add_argument('--help-headers', action='store_true', 
+                      help='Show detailed security headers reference')
+    group.add_argument('--summarize', metavar='PATH',
+                      help='Print the summary of a result columns file saved with --columns')
+    group.add_argument('--serve', metavar='[HOST:]PORT', nargs='?', const=f'127.0.0.1:{SERVE_PORT}',
+                      type=parse_listen_address,
+                      help='Keep a warm scanner running behind a local HTTP/JSON API '
+                           f'(also written "serve"; default: 127.0.0.1:{SERVE_PORT})')
+    parser.add_argument('--queue-size', type=int, default=100,
+                       help='Jobs --serve queues before answering 429 (default: 100)')
+    
+    # Checkpoint options
+    parser.add_argument('--checkpoint', metavar='PATH',
+                       help='Journal completed -f scans to PATH as they finish')
+    parser.add_argument('--resume', action='store_true',
+                       help='Skip URLs already recorded in the --checkpoint journal and scan the rest')
+    
+    # Output options
+    parser.add_argument('-o', '--output', help='Save results as they complete (auto-adds the format extension)')
+    parser.add_argument('--format', choices=list(RESULT_SINKS), default='csv',
+                       help='Output format: csv, jsonl or compact columnar binary (default: csv)')
+    parser.add_argument('--flush-interval', type=float, default=1.0,
+                       help='Seconds between output file flushes (default: 1.0)')
+    parser.add_argument('--fsync', action='store_true',
+                       help='fsync the output file on every flush')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                       help='Show detailed output with recommendations')
+    parser.add_argument('--columns', metavar='PATH',
+                       help='Save scores, status codes, latencies and header bitmaps of -f scans '
+                            'as a compact columnar file for --summarize')
+    parser.add_argument('--events', choices=EventStream.FORMATS,
+                       help='Stream lifecycle events (queued, started, completed, error, periodic stats) '
+                            'to stdout as newline-delimited JSON; all other output moves to stderr')
+    parser.add_argument('--events-interval', type=float, default=1.0,
+                       help='Seconds between --events stats events (default: 1.0)')
+    parser.add_argument('--capture-headers', action='store_true',
+                       help='Keep every raw response header in results (included in jsonl output)')
+    parser.add_argument('--metrics-file', metavar='PATH',
+                       help='Write phase timing histograms and run counters to PATH in Prometheus text '
+                            f'format, refreshed every {METRICS_INTERVAL:g}s during the scan')
+    parser.add_argument('--stats-json', metavar='PATH',
+                       help='Write phase timing histograms, quantiles and run counters to PATH as JSON')
+    parser.add_argument('--profile', choices=ScanProfiler.MODES,
+                       help='Profile the run with cProfile (cpu) or tracemalloc (alloc) and report '
+                            'time or memory per scanner stage')
+    parser.add_argument('--profile-output', metavar='PREFIX', default='sentinelheaders-profile',
+                       help='Prefix of the --profile report (.txt) and raw profile (.prof or .tracemalloc) '
+                            '(default: sentinelheaders-profile)')
+    
+    # Request options
+    parser.add_argument('--timeout', type=int, default=10,
+                       help='Request timeout in seconds (default: 10)')
+    parser.add_argument('--connect-timeout', type=float,
+                       help='Seconds to wait for a connection to open (default: --timeout)')
+    parser.add_argument('--read-timeout', type=float,
+                       help='Seconds to wait for response data once connected (default: --timeout)')
+    parser.add_argument('--breaker-threshold', type=int, default=5,
+                       help='Consecutive failed scans after which the remaining URLs of a host are '
+                            'skipped; 0 disables the circuit breaker (default: 5)')
+    parser.add_argument('--breaker-cooldown', type=float, default=60,
+                       help='Seconds before a host with an open circuit is probed again (default: 60)')
+    parser.add_argument('--per-origin-sample', type=int, metavar='K',
+                       help='Scan K URLs per origin; if their security headers agree, extrapolate them '
+                            'to the origin\'s other URLs, otherwise scan the origin in full')
+    parser.add_argument('--deadline', type=float, metavar='SECONDS',
+                       help='Stop starting scans after SECONDS, let running ones finish and report '
+                            'the URLs skipped')
+    parser.add_argument('--delay', type=float, default=0.5,
+                       help='Minimum delay between requests to the same host in seconds (default: 0.5)')
+    parser.add_argument('--host-rate', type=float,
+                       help='Requests per second allowed per host; overrides --delay')
+    parser.add_argument('--host-concurrency', type=int, default=4,
+                       help='Maximum concurrent requests per host (default: 4)')
+    parser.add_argument('--rate-key', choices=['host', 'domain'], default='host',
+                       help='Apply per-host limits to each hostname or to its registered domain (default: host)')
+    parser.add_argument('--threads', type=parse_threads, default=1,
+                       help="Number of threads for concurrent scanning, or 'auto' to adapt it to "
+                            "observed latency, timeouts and 429s (default: 1)")
+    parser.add_argument('--max-threads', type=int, default=64,
+                       help='Upper bound for --threads auto (default: 64)')
+    parser.add_argument('--processes', type=int, default=1,
+                       help='Worker processes for -f scans, each running its own --threads pool. '
+                            'Results are merged in completion order, not input order (default: 1)')
+    parser.add_argument('--session-per-thread', action='store_true',
+                       help='Give every worker thread its own session and connection pool')
+    parser.add_argument('--engine', choices=['threads', 'async'], default='threads',
+                       help='Scan engine: thread pool or a single asyncio loop (default: threads)')
+    parser.add_argument('--connections', type=int, default=500,
+                       help='Maximum concurrent connections for the async engine (default: 500)')
+    parser.add_argument('--connections-per-host', type=int, default=10,
+                       help='Maximum concurrent connections per host for the async engine (default: 10)')
+    parser.add_argument('--dns-ttl', type=float, default=300,
+                       help='Seconds a resolved host address is reused (default: 300)')
+    parser.add_argument('--dns-negative-ttl', type=float, default=60,
+                       help='Seconds a host name that does not exist is remembered (default: 60)')
+    parser.add_argument('--dns-workers', type=int, default=16,
+                       help='Threads resolving buffered hosts ahead of their scans; 0 disables '
+                            'pre-resolution (default: 16)')
+    parser.add_argument('--fetch-mode', choices=list(SecurityHeadersScanner.FETCH_MODES), default='get',
+                       help='How responses are fetched: full GET, HEAD falling back to GET on 405/501, '
+                            'or GET closed once headers arrive (default: get)')
+    parser.add_argument('--cache', metavar='PATH',
+                       help='SQLite result cache reused across runs, keyed by normalized URL')
+    parser.add_argument('--cache-ttl', type=float, default=86400,
+                       help='Seconds a cached result is served without revalidation (default: 86400)')
+    parser.add_argument('--cache-max-entries', type=int, default=1000000,
+                       help='Cache size cap; least recently used entries are evicted (default: 1000000)')
+    parser.add_argument('--baseline', metavar='PATH',
+                       help='SQLite fingerprint index of the previous run: print and export only results '
+                            'that regressed, improved, changed or are new, then update PATH with this run')
+    parser.add_argument('--rules', metavar='FILE',
+                       help='JSON file of header rules to use instead of the built-in set')
+    parser.add_argument('--proxy', help='HTTP proxy (e.g., http://127.0.0.1:8080)')
+    parser.add_argument('--user-agent', help='Custom User-Agent string')
+    parser.add_argument('--no-color', action='store_true', help='Disable colored output')
+    
+    # "serve" reads as a subcommand but shares every scan option, so it is spelled --serve underneath
+    argv = sys.argv[1:]
+    if argv[:1] == ['serve']:
+        argv[0] = '--serve'
+    args = parser.parse_args(argv)
+    
+    # Disable colors if requested
+    if args.no_color:
+        disable_colors()
+    
+    if (args.checkpoint or args.resume) and not args.file:
+        print(f"{Colors.RED}[-] Error: --checkpoint and --resume require -f{Colors.RESET}")
+        sys.exit(1)
+    if args.resume and not args.checkpoint:
+        print(f"{Colors.RED}[-] Error: --resume requires --checkpoint{Colors.RESET}")
+        sys.exit(1)
+    
+    if args.threads == 'auto' and args.engine == 'async':
+        print(f"{Colors.RED}[-] Error: --threads auto is not supported by the async engine; use --connections{Colors.RESET}")
+        sys.exit(1)
+    autotune = args.threads == 'auto'
+    threads = args.max_threads if autotune else args.threads
+    
+    if args.profile and args.processes > 1:
+        print(f"{Colors.RED}[-] Error: --profile only covers this process; run it without --processes{Colors.RESET}")
+        sys.exit(1)
+    
+    if args.serve:
+        unsupported = [flag for flag, value in (('--output', args.output), ('--checkpoint', args.checkpoint),
+                                                ('--columns', args.columns), ('--baseline', args.baseline),
+                                                ('--deadline', args.deadline), ('--profile', args.profile),
+                                                ('--events', args.events), ('--processes', args.processes > 1))
+                       if value]
+        if unsupported:
+            print(f"{Colors.RED}[-] Error: --serve returns results over HTTP and does not support "
+                  f"{', '.join(unsupported)}{Colors.RESET}")
+            sys.exit(1)
+    
+    if args.engine == 'async' and args.proxy:
+        print(f"{Colors.RED}[-] Error: --proxy is not supported by the async engine{Colors.RESET}")
+        sys.exit(1)
+    
+    rules = None
+    if args.rules:
+        try:
+            rules = RuleSet.from_file(args.rules)
+        except (OSError, ValueError) as e:
+            print(f"{Colors.RED}[-] Error loading rules '{args.rules}': {e}{Colors.RESET}")
+            sys.exit(1)
+    
+    # Show headers reference
+    if args.help_headers:
+        print_rules_reference(rules or DEFAULT_RULES)
+        return
+    
+    if args.summarize:
+        try:
+            columns = ResultColumns.load(args.summarize)
+        except (OSError, ValueError) as e:
+            print(f"{Colors.RED}[-] Error reading columns file '{args.summarize}': {e}{Colors.RESET}")
+            sys.exit(1)
+        print_banner()
+        print_section_header("SCAN SUMMARY")
+        print_columns_summary(columns.summary())
+        return
+    
+    events = None
+    if args.events:
+        # Events own stdout, so everything else is printed to stderr
+        events = EventStream(sys.stdout, interval=args.events_interval)
+        sys.stdout = sys.stderr
+    
+    cache = None
+    if args.cache:
+        try:
+            cache = ResultCache(args.cache, ttl=args.cache_ttl, max_entries=args.cache_max_entries)
+        except sqlite3.Error as e:
+            print(f"{Colors.RED}[-] Error opening cache '{args.cache}': {e}{Colors.RESET}")
+            sys.exit(1)
+    
+    # The deadline covers the whole run, so it is fixed before any work starts
+    deadline = time.time() + args.deadline if args.deadline else None
+    
+    baseline = None
+    if args.baseline:
+        try:
+            baseline = BaselineStore(args.baseline)
+        except (sqlite3.Error, ValueError) as e:
+            print(f"{Colors.RED}[-] Error opening baseline '{args.baseline}': {e}{Colors.RESET}")
+            sys.exit(1)
+    
+    # Initialize scanner
+    if args.engine == 'async':
+        scanner_cls = AsyncSecurityHeadersScanner
+        scanner_options = {
+            'timeout': args.timeout,
+            'user_agent': args.user_agent,
+            'delay': args.delay,
+            'fetch_mode': args.fetch_mode,
+            'host_rate': args.host_rate,
+            'host_concurrency': args.host_concurrency,
+            'rate_key': args.rate_key,
+            'max_connections': args.connections,
+            'max_per_host': args.connections_per_host,
+            'rules': rules,
+            'capture_headers': args.capture_headers,
+            'dns_ttl': args.dns_ttl,
+            'dns_negative_ttl': args.dns_negative_ttl,
+            'dns_workers': args.dns_workers,
+            'connect_timeout': args.connect_timeout,
+            'read_timeout': args.read_timeout,
+            'breaker_threshold': args.breaker_threshold,
+            'breaker_cooldown': args.breaker_cooldown,
+            'deadline': deadline,
+            'origin_sample': args.per_origin_sample or 0,
+            'cache': cache,
+            'events': events
+        }
+    else:
+        scanner_cls = SecurityHeadersScanner
+        scanner_options = {
+            'timeout': args.timeout,
+            'user_agent': args.user_agent,
+            'proxy': args.proxy,
+            'delay': args.delay,
+            'threads': threads,
+            'autotune': autotune,
+            'fetch_mode': args.fetch_mode,
+            'session_per_thread': args.session_per_thread,
+            'host_rate': args.host_rate,
+            'host_concurrency': args.host_concurrency,
+            'rate_key': args.rate_key,
+            'rules': rules,
+            'capture_headers': args.capture_headers,
+            'dns_ttl': args.dns_ttl,
+            'dns_negative_ttl': args.dns_negative_ttl,
+            'dns_workers': args.dns_workers,
+            'connect_timeout': args.connect_timeout,
+            'read_timeout': args.read_timeout,
+            'breaker_threshold': args.breaker_threshold,
+            'breaker_cooldown': args.breaker_cooldown,
+            'deadline': deadline,
+            'origin_sample': args.per_origin_sample or 0,
+            'cache': cache,
+            'events': events
+        }
+    
+    if args.processes > 1 and args.file:
+        scanner = ProcessPoolScanner(args.processes, scanner_cls, verbose=args.verbose,
+                                     **scanner_options)
+    else:
+        scanner = scanner_cls(**scanner_options)
+    
+    # Print banner
+    print_banner()
+    
+    # Print configuration
+    print(f"{Colors.BLUE}[*] Configuration:{Colors.RESET}")
+    if args.connect_timeout or args.read_timeout:
+        print(f"{Colors.WHITE}    Timeout: connect {scanner.connect_timeout:g}s, "
+              f"read {scanner.read_timeout:g}s{Colors.RESET}")
+    else:
+        print(f"{Colors.WHITE}    Timeout: {args.timeout}s{Colors.RESET}")
+    if args.deadline:
+        print(f"{Colors.WHITE}    Deadline: {args.deadline:g}s{Colors.RESET}")
+    if args.per_origin_sample:
+        print(f"{Colors.WHITE}    Per-Origin Sample: {args.per_origin_sample} URLs{Colors.RESET}")
+    if args.host_rate:
+        print(f"{Colors.WHITE}    Host Rate: {args.host_rate}/s per {args.rate_key}{Colors.RESET}")
+    else:
+        print(f"{Colors.WHITE}    Delay: {args.delay}s per {args.rate_key}{Colors.RESET}")
+    print(f"{Colors.WHITE}    Host Concurrency: {args.host_concurrency}{Colors.RESET}")
+    if args.processes > 1:
+        print(f"{Colors.WHITE}    Processes: {args.processes}{Colors.RESET}")
+    if args.engine == 'async':
+        print(f"{Colors.WHITE}    Engine: async ({args.connections} connections, {args.connections_per_host} per host){Colors.RESET}")
+    elif autotune:
+        print(f"{Colors.WHITE}    Threads: auto (max {threads}){Colors.RESET}")
+    else:
+        print(f"{Colors.WHITE}    Threads: {args.threads}{Colors.RESET}")
+    print(f"{Colors.WHITE}    Fetch Mode: {args.fetch_mode}{Colors.RESET}")
+    if args.proxy:
+        print(f"{Colors.WHITE}    Proxy: {args.proxy}{Colors.RESET}")
+    
+    profiler = None
+    if args.profile:
+        profiler = ScanProfiler(args.profile, args.profile_output)
+        profiler.start()
+    
+    if args.serve:
+        serve(scanner, args.serve, args.queue_size)
+        if cache:
+            cache.close()
+        return
+    
+    # Determine URLs to scan
+    if args.url:
+        urls = [args.url]
+        print_section_header("SINGLE URL SCAN")
+    else:
+        urls = iter_urls_from_file(args.file)
+        # Peek at the head of the stream to size connection pools by distinct hosts
+        head = list(islice(urls, HOST_SAMPLE_SIZE))
+        if not head:
+            print(f"{Colors.RED}[-] Error: No valid URLs found in '{args.file}'{Colors.RESET}")
+            sys.exit(1)
+        urls = chain(head, urls)
+        print(f"{Colors.GREEN}[+] Streaming URLs from {'stdin' if args.file == '-' else args.file}{Colors.RESET}")
+        # Malformed lines count as one host; scanning reports them as per-URL errors
+        scanner.size_pools(len({url_hostname(scanner.normalize_url(url)) for url in head}))
+    
+    # Results are written as they complete, so an interrupted run keeps its output
+    sink = None
+    if args.output:
+        sink_options = {'flush_interval': args.flush_interval, 'fsync': args.fsync}
+        if args.format == 'binary':
+            sink_options['header_names'] = list(scanner.security_headers)
+        sink = RESULT_SINKS[args.format](args.output, **sink_options)
+    
+    journal = None
+    if args.checkpoint:
+        try:
+            journal = CheckpointJournal(args.checkpoint, resume=args.resume, rules=scanner.rules,
+                                        flush_interval=args.flush_interval, fsync=args.fsync)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"{Colors.RED}[-] Error reading checkpoint '{args.checkpoint}': {e}{Colors.RESET}")
+            sys.exit(1)
+        if journal.completed:
+            print(f"{Colors.GREEN}[+] Resuming: {len(journal.completed)} URLs already completed{Colors.RESET}")
+            urls = verify_checkpoint(urls, journal.completed, scanner)
+    
+    # Summaries are computed over a columnar copy of the results
+    columns = ResultColumns(scanner.rules.names)
+    metrics_due = time.monotonic() + METRICS_INTERVAL
+    
+    def report(result: ScanRecord):
+        """Print and export a result as it completes, unless the baseline has it unchanged."""
+        if baseline and baseline.compare(result) == 'unchanged':
+            return
+        scanner.print_scan_result(result, verbose=args.verbose)
+        if sink:
+            sink.write(result)
+    
+    # Only the columns are kept for the summary; each result is dropped once reported
+    def on_result(index: int, result: ScanRecord):
+        nonlocal metrics_due
+        columns.append(result)
+        report(result)
+        if journal:
+            journal.write((index, result))
+        if args.metrics_file and time.monotonic() >= metrics_due:
+            export_metrics(scanner, args.metrics_file)
+            metrics_due = time.monotonic() + METRICS_INTERVAL
+    
+    # Perform scanning
+    try:
+        start_time = time.time()
+        if events:
+            events.start()
+        
+        if args.url:
+            if events:
+                events.queued(0, args.url)
+                events.scan_started(0, args.url)
+            result = scanner.scan_url(args.url)
+            scanner.metrics.observe(result)
+            scanned = 1
+            report(result)
+            if events:
+                events.result(0, result)
+        else:
+            scanned = 0
+            if journal:
+                # Replay finished scans in their original order so the output matches an uninterrupted run
+                for index, result in journal.completed.items():
+                    scanned += 1
+                    columns.append(result)
+                    report(result)
+                    if events:
+                        events.result(index, result)
+            scanned += scanner.stream_multiple_urls(urls, on_result=on_result,
+                                                    skip=journal.completed if journal else None)
+            print(f"{Colors.GREEN}[+] Scanned {scanned} URLs from {'stdin' if args.file == '-' else args.file}{Colors.RESET}")
+        if events:
+            events.close()
+        
+        if baseline:
+            print_baseline_diff(baseline)
+        
+        # Show summary for multiple URLs
+        if scanned > 1:
+            scanner.print_summary(columns)
+        
+        if args.columns and args.file:
+            try:
+                columns.save(args.columns)
+                print(f"\n{Colors.GREEN}[+] Result columns saved to: {args.columns}{Colors.RESET}")
+            except OSError as e:
+                print(f"\n{Colors.RED}[-] Error saving columns to '{args.columns}': {e}{Colors.RESET}")
+        
+        if sink:
+            sink.close()
+            print(f"\n{Colors.GREEN}[+] Results saved to: {sink.filename}{Colors.RESET}")
+            print(f"{Colors.BLUE}[*] Total records: {sink.records}{Colors.RESET}")
+        
+        scanner.print_run_stats()
+        if cache:
+            cache.close()
+        if baseline:
+            baseline.close()
+            print(f"{Colors.GREEN}[+] Baseline updated: {args.baseline}{Colors.RESET}")
+        if journal:
+            journal.close()
+            if scanner.stats.get('deadline_skipped'):
+                print(f"{Colors.BLUE}[*] Skipped URLs were not journaled; rerun with --resume to scan them{Colors.RESET}")
+        if profiler:
+            profiler.finish()
+        
+        # Final timing
+        elapsed = time.time() - start_time
+        if args.metrics_file or args.stats_json:
+            export_metrics(scanner, args.metrics_file, args.stats_json, elapsed)
+            for filename in filter(None, (args.metrics_file, args.stats_json)):
+                print(f"\n{Colors.GREEN}[+] Metrics saved to: {filename}{Colors.RESET}")
+        print(f"\n{Colors.GREEN}[+] Scan completed in {elapsed:.2f} seconds{Colors.RESET}")
+        
+    except KeyboardInterrupt:
+        print(f"\n{Colors.YELLOW}[!] Scan interrupted by user{Colors.RESET}")
+        if events:
+            events.close(interrupted=True)
+        if sink:
+            sink.close()
+            print(f"{Colors.YELLOW}[!] Partial results saved to: {sink.filename}{Colors.RESET}")
+        if journal:
+            journal.close()
+            print(f"{Colors.YELLOW}[!] Continue with: --checkpoint {journal.filename} --resume{Colors.RESET}")
+        if args.metrics_file or args.stats_json:
+            export_metrics(scanner, args.metrics_file, args.stats_json, time.time() - start_time)
+        if profiler:
+            profiler.finish()
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n{Colors.RED}[-] Unexpected error: {e}{Colors.RESET}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
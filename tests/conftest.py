@@ -0,0 +1,47 @@
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class TargetHandler(BaseHTTPRequestHandler):
+    """Answers every GET and HEAD with a small page and a couple of security headers.
+
+    A delay=SECONDS query parameter holds the response back that long.
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_HEAD(self):
+        self.do_GET(send_body=False)
+
+    def do_GET(self, send_body=True):
+        query = parse_qs(urlsplit(self.path).query)
+        time.sleep(float(query.get('delay', [0])[0]))
+        body = b'ok'
+        self.send_response(200)
+        self.send_header('X-Frame-Options', 'DENY')
+        self.send_header('X-Content-Type-Options', 'nosniff')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='session')
+def target():
+    """Base URL of a local stand-in target server."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), TargetHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
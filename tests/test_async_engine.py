@@ -0,0 +1,44 @@
+import time
+
+import sentinelheaders_core as core
+
+
+def test_slow_consumer_does_not_stall_scans_in_flight(target):
+    """Results wait for the consumer; requests in flight keep their own timing."""
+    scanner = core.AsyncSecurityHeadersScanner(timeout=1, delay=0, max_connections=2)
+    urls = [f"{target}/r{i}?delay=0.2" for i in range(12)]
+    results = []
+    for completed, (index, result) in enumerate(scanner.iter_scan(urls)):
+        results.append(result)
+        if completed < 3:
+            # A consumer stuck for longer than the scan timeout
+            time.sleep(1.5)
+
+    assert len(results) == len(urls)
+    assert all(result.error is None for result in results), [result.error for result in results]
+    assert max(result.elapsed for result in results) < 1
+
+
+def test_results_still_queued_when_the_pass_ends_are_delivered(target):
+    scanner = core.AsyncSecurityHeadersScanner(timeout=2, delay=0, max_connections=4)
+    urls = [f"{target}/q{i}" for i in range(60)]
+    indices = []
+    for index, _ in scanner.iter_scan(urls):
+        # A consumer a little slower than the scans, so results queue up until the end
+        time.sleep(0.01)
+        indices.append(index)
+
+    assert sorted(indices) == list(range(len(urls)))
+
+
+def test_consumer_stopping_early_ends_the_loop(target):
+    scanner = core.AsyncSecurityHeadersScanner(timeout=2, delay=0, max_connections=2)
+    scan = scanner.iter_scan(f"{target}/s{i}" for i in range(50))
+    next(scan)
+    started = time.monotonic()
+    scan.close()
+    assert time.monotonic() - started < 5
+
+    # The scanner is usable again afterwards
+    results = dict(scanner.iter_scan([f"{target}/after"]))
+    assert results[0].error is None
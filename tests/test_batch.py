@@ -0,0 +1,44 @@
+import sentinelheaders_core as core
+
+
+def make_scanner():
+    return core.SecurityHeadersScanner(threads=4, timeout=2, delay=0)
+
+
+def test_scan_multiple_urls_returns_the_results(target):
+    urls = [f"{target}/a", f"{target}/b", f"{target}/c"]
+    seen = []
+    results = make_scanner().scan_multiple_urls(urls, on_result=lambda index, result: seen.append(index))
+
+    assert all(isinstance(result, core.ScanRecord) for result in results)
+    assert sorted(result.url for result in results) == urls
+    assert sorted(seen) == [0, 1, 2]
+
+
+def test_stream_multiple_urls_counts_the_results(target):
+    urls = [f"{target}/a", f"{target}/b", f"{target}/a"]
+    seen = {}
+    scanned = make_scanner().stream_multiple_urls(urls, on_result=seen.__setitem__, skip={1})
+
+    assert scanned == 2
+    assert sorted(seen) == [0, 2]
+
+
+def test_processes_scan_duplicates_in_other_shards_once(target):
+    urls = [f"{target}/p{i}" for i in range(20)]
+    # Duplicates far apart, in other shards, and spelled differently
+    lines = urls + urls[::-1] + [url.replace('http://', 'HTTP://') + '#top' for url in urls[:5]]
+    scanner = core.ProcessPoolScanner(2, threads=4, timeout=2, delay=0, shard_size=4)
+    results = dict(scanner.iter_scan(lines))
+
+    assert sorted(results) == list(range(len(lines)))
+    assert all(result.error is None for result in results.values())
+    assert scanner.stats.get('dedup_saved') == len(lines) - len(urls)
+    assert scanner.connection_stats()[1] == len(urls)
+
+
+def test_processes_send_a_domain_to_one_worker():
+    scanner = core.ProcessPoolScanner(4, delay=0)
+    lane = scanner._lane('https://www.example.com/a')
+    assert scanner._lane('http://example.com/b') == lane
+    assert scanner._lane('shop.example.com/c') == lane
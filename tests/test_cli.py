@@ -0,0 +1,26 @@
+import json
+import sys
+
+import pytest
+
+import sentinelheaders_core as core
+
+
+@pytest.mark.parametrize('engine', ['threads', 'async'])
+def test_batch_run_reports_a_malformed_line_and_scans_the_rest(target, tmp_path, monkeypatch, capsys, engine):
+    urls = [f"{target}/a", 'http://[::1/', f"{target}/b", 'http://localhost:99999/']
+    url_file = tmp_path / 'urls.txt'
+    url_file.write_text('\n'.join(urls) + '\n')
+    output = tmp_path / 'results.jsonl'
+    monkeypatch.setattr(sys, 'argv', ['sentinelheaders', '-f', str(url_file), '--engine', engine,
+                                      '--delay', '0', '--timeout', '2',
+                                      '--format', 'jsonl', '-o', str(output)])
+    core.main()
+
+    assert 'Total URLs Scanned: 4' in capsys.readouterr().out
+    records = {record['url']: record for record in map(json.loads, output.read_text().splitlines())}
+    assert len(records) == 4
+    assert records[f"{target}/a"]['error'] is None
+    assert records[f"{target}/b"]['error'] is None
+    assert records['http://[::1/']['error']
+    assert records['http://localhost:99999/']['error']
@@ -0,0 +1,47 @@
+import pytest
+
+import sentinelheaders_core as core
+
+MALFORMED = ['http://[::1/', 'https://[zz]/', 'http://[::1]:x/', 'http://localhost:99999/']
+
+
+def make_scanner(engine, **options):
+    options = dict({'timeout': 2, 'delay': 0}, **options)
+    if engine == 'threads':
+        return core.SecurityHeadersScanner(threads=4, **options)
+    if engine == 'async':
+        return core.AsyncSecurityHeadersScanner(**options)
+    return core.ProcessPoolScanner(2, threads=4, **options)
+
+
+def test_url_hostname_of_unparseable_url():
+    assert core.url_hostname('http://[::1/') is None
+    assert core.url_hostname('http://Example.com:8080/x') == 'example.com'
+    assert core.canonical_url('http://[::1/') == 'http://[::1/'
+
+
+@pytest.mark.parametrize('url', MALFORMED)
+def test_keys_of_malformed_urls(url):
+    assert core.HostScheduler().host_key(url)
+    assert core.OriginSampler.origin(url)
+    columns = core.ResultColumns(core.DEFAULT_RULES.names)
+    record = core.ScanRecord(url)
+    record.error = 'bad URL'
+    columns.append(record)
+    assert len(columns) == 1
+
+
+@pytest.mark.parametrize('engine', ['threads', 'async', 'processes'])
+@pytest.mark.parametrize('options', [{}, {'origin_sample': 2, 'rate_key': 'domain'}])
+def test_malformed_url_is_a_per_url_error(target, engine, options):
+    urls = [f"{target}/a"] + MALFORMED + [f"{target}/b", f"{target}/a"]
+    scanner = make_scanner(engine, **options)
+    results = dict(scanner.iter_scan(urls))
+
+    assert sorted(results) == list(range(len(urls)))
+    for index, url in enumerate(urls):
+        if url in MALFORMED:
+            assert results[index].error, url
+        else:
+            assert results[index].error is None, results[index].error
+            assert results[index].status_code == 200
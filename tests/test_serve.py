@@ -0,0 +1,111 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+import sentinelheaders_core as core
+
+# Path of the target whose scans raise
+FAILING_PATH = '/explode'
+
+
+def make_scanner(engine):
+    options = {'timeout': 2, 'delay': 0}
+    if engine == 'threads':
+        return core.SecurityHeadersScanner(threads=4, **options)
+    return core.AsyncSecurityHeadersScanner(**options)
+
+
+def break_scans_of(scanner, url):
+    """Make scans of url raise, so the pass scanning it fails."""
+    if isinstance(scanner, core.AsyncSecurityHeadersScanner):
+        scan = scanner.scan_url_async
+
+        async def failing(target):
+            if target == url:
+                raise RuntimeError('scan exploded')
+            return await scan(target)
+        scanner.scan_url_async = failing
+    else:
+        scan = scanner.scan_url
+
+        def failing(target):
+            if target == url:
+                raise RuntimeError('scan exploded')
+            return scan(target)
+        scanner.scan_url = failing
+
+
+@pytest.fixture
+def api():
+    """(service, port) of a scan API on an ephemeral port."""
+    service = core.ScanService(make_scanner('threads'), queue_size=8)
+    server = core.create_api_server(service, ('127.0.0.1', 0))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield service, server.server_address[1]
+    server.shutdown()
+    server.server_close()
+    service.close()
+
+
+def post(port, document):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        connection.request('POST', '/scan', json.dumps(document), {'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+def test_api_refuses_unparseable_urls(api, target):
+    _, port = api
+    status, document = post(port, {'urls': [f"{target}/", 'http://[::1/']})
+    assert status == 400
+    assert 'http://[::1/' in document['error']
+    status, _ = post(port, {'url': 'http://localhost:99999/'})
+    assert status == 400
+
+    status, document = post(port, {'urls': [f"{target}/ok"], 'wait': 20})
+    assert status == 200
+    assert document['results'][0]['error'] is None
+
+
+@pytest.mark.parametrize('engine', ['threads', 'async'])
+def test_failed_pass_leaves_the_service_healthy(target, engine):
+    scanner = make_scanner(engine)
+    break_scans_of(scanner, target + FAILING_PATH)
+    service = core.ScanService(scanner, queue_size=8)
+    try:
+        # URLs still buffered and in flight when the pass fails must not leak into later jobs
+        failed = service.submit([f"{target}/first", target + FAILING_PATH]
+                                + [f"{target}/more{i}" for i in range(50)])
+        assert failed.done.wait(20)
+        assert failed.error == 'scan exploded'
+
+        for attempt in range(3):
+            urls = [f"{target}/next{attempt}/{i}" for i in range(5)]
+            job = service.submit(urls)
+            assert job.done.wait(20)
+            assert job.error is None
+            assert [result.url for result in job.results] == urls
+            assert all(result.error is None for result in job.results)
+    finally:
+        service.close()
+
+
+def test_malformed_url_submitted_to_the_service_is_a_per_url_error(target):
+    service = core.ScanService(make_scanner('threads'), queue_size=8)
+    try:
+        job = service.submit([f"{target}/a", 'http://[::1/'])
+        assert job.done.wait(20)
+        assert job.error is None
+        assert job.results[0].error is None
+        assert job.results[1].error
+
+        job = service.submit([f"{target}/b"])
+        assert job.done.wait(20)
+        assert job.results[0].error is None
+    finally:
+        service.close()